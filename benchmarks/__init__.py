@@ -0,0 +1 @@
+"""Load tests for MCP Server."""
@@ -0,0 +1,74 @@
+"""Helpers for starting a local MCP server for load tests."""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MCP_HEADERS = {
+    "accept": "application/json, text/event-stream",
+    "content-type": "application/json",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_bytes(pid: int) -> int:
+    """Resident set size of a process, read from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+@contextmanager
+def run_server(transport: str, port: int, env: dict[str, str] | None = None):
+    """Run ``mcp_server/app.py:mcp`` with ``fastmcp run`` until the block exits."""
+    fastmcp = shutil.which("fastmcp")
+    launcher = (
+        [fastmcp]
+        if fastmcp
+        else [sys.executable, "-c", "from fastmcp.cli import app; app()"]
+    )
+    command = [*launcher, "run", "--transport", transport, "mcp_server/app.py:mcp"]
+    server_env = os.environ | {"HOST": "127.0.0.1", "PORT": str(port)} | (env or {})
+    process = subprocess.Popen(
+        command,
+        cwd=ROOT,
+        env=server_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Server did not start within 30s") from None
+                time.sleep(0.1)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
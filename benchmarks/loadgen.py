@@ -0,0 +1,306 @@
+"""End-to-end load generator.
+
+Starts a local server with JWT authentication backed by a freshly generated
+RSA key pair, mints a token per subject, and drives a weighted mix of tool
+calls at a fixed arrival rate over SSE and/or streamable HTTP. Reports
+throughput, p50/p95/p99 latency and error rates per transport and per tool
+as JSON.
+
+Calls are scheduled open-loop: call ``i`` is due at ``i / rate`` seconds and
+its latency is measured from that time, so a server that falls behind shows
+up as growing latency instead of a silently lowered rate.
+
+Usage:
+    uv run python -m benchmarks.loadgen --rate 200 --duration 30
+    uv run python -m benchmarks.loadgen --transport sse --mix text_analyze_text:1
+    uv run python -m benchmarks.loadgen --env RATE_LIMIT_PER_SECOND=0
+
+Errors are counted by kind: ``transport`` (connection or HTTP failures),
+``protocol`` (JSON-RPC errors and tool exceptions), ``rejected`` (calls
+refused by admission control) and ``tool`` (other results with
+``"success": false``).
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+
+import httpx
+from fastmcp.server.auth.providers.bearer import RSAKeyPair
+
+from benchmarks._server import MCP_HEADERS, free_port, rss_bytes, run_server
+from benchmarks.sessions import INITIALIZE, SSESession, StreamableSession
+
+ISSUER = "https://loadgen.local"
+AUDIENCE = "mcp-server"
+
+SAMPLE_TEXT = (
+    "The quick brown fox jumps over the lazy dog. Contact support@example.com "
+    "or visit https://example.com/help for details. "
+)
+
+# Arguments used for each tool in the call mix
+TOOL_ARGUMENTS = {
+    "text_transform_case": lambda text: {"text": text, "case_type": "snake"},
+    "text_analyze_text": lambda text: {"text": text},
+    "text_clean_text": lambda text: {"text": text},
+    "text_extract_patterns": lambda text: {"text": text, "pattern_type": "all"},
+    "text_word_frequency": lambda text: {"text": text, "ngram_sizes": [1, 2]},
+    "text_encode_text": lambda text: {"text": text, "encoding_type": "base64"},
+    "text_diff": lambda text: {
+        "original": text,
+        "modified": text.replace("lazy", "sleepy"),
+    },
+}
+
+DEFAULT_MIX = (
+    "text_transform_case:4,text_analyze_text:3,text_extract_patterns:2,text_diff:1"
+)
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """Parse ``tool:weight,...`` into a weight per tool."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name not in TOOL_ARGUMENTS:
+            raise argparse.ArgumentTypeError(
+                f"Unknown tool: {name}. Available: {', '.join(TOOL_ARGUMENTS)}"
+            )
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentiles(samples: list[float]) -> dict[str, float | None]:
+    """p50/p95/p99 of ``samples`` in milliseconds."""
+    if len(samples) < 2:
+        value = round(samples[0] * 1000, 3) if samples else None
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {f"p{p}": round(cuts[p - 1] * 1000, 3) for p in (50, 95, 99)}
+
+
+def classify(message: dict) -> str | None:
+    """The error kind of a ``tools/call`` response, or None on success."""
+    if "error" in message:
+        return "protocol"
+    result = message.get("result", {})
+    if result.get("isError"):
+        return "protocol"
+    try:
+        payload = json.loads(result["content"][0]["text"])
+    except (KeyError, IndexError, ValueError):
+        return None
+    if isinstance(payload, dict) and payload.get("success") is False:
+        return "rejected" if payload.get("retryable") else "tool"
+    return None
+
+
+def summarize(
+    calls: list[tuple[str, float, str | None]], seconds: float
+) -> dict[str, object]:
+    """Throughput, latency and error rates for ``(tool, latency, error)`` calls."""
+    errors: dict[str, int] = {}
+    for _, _, error in calls:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+    succeeded = [latency for _, latency, error in calls if error is None]
+    return {
+        "calls": len(calls),
+        "succeeded": len(succeeded),
+        "throughput": round(len(succeeded) / seconds, 2) if seconds else 0,
+        "error_rate": round(sum(errors.values()) / len(calls), 4) if calls else 0,
+        "errors": errors,
+        "latency_ms": percentiles(succeeded),
+    }
+
+
+async def run_load(
+    args: argparse.Namespace,
+    transport: str,
+    base_url: str,
+    pid: int,
+    tokens: list[str],
+) -> dict:
+    rng = random.Random(args.seed)
+    tools = list(args.mix)
+    weights = list(args.mix.values())
+    text = (SAMPLE_TEXT * (args.text_size // len(SAMPLE_TEXT) + 1))[: args.text_size]
+    ids = itertools.count(1)
+
+    clients = [
+        httpx.AsyncClient(
+            headers={"authorization": f"Bearer {token}"} if token else None,
+            limits=httpx.Limits(max_connections=args.connections + args.sessions),
+            timeout=60,
+        )
+        for token in tokens
+    ]
+    sessions: list = []
+    for i in range(args.sessions):
+        client = clients[i % len(clients)]
+        sessions.append(
+            SSESession(client, base_url)
+            if transport == "sse"
+            else StreamableSession(client, f"{base_url}/mcp/")
+        )
+
+    report: dict[str, object] = {"transport": transport}
+    try:
+        # Requests without a token must be refused when auth is enabled
+        async with httpx.AsyncClient(timeout=10) as anonymous:
+            if transport == "sse":
+                request = anonymous.build_request("GET", f"{base_url}/sse")
+            else:
+                request = anonymous.build_request(
+                    "POST", f"{base_url}/mcp/", json=INITIALIZE, headers=MCP_HEADERS
+                )
+            response = await anonymous.send(request, stream=True)
+            report["unauthenticated_status"] = response.status_code
+            await response.aclose()
+
+        await asyncio.gather(*(s.open() for s in sessions))
+
+        semaphore = asyncio.Semaphore(args.connections)
+        calls: list[tuple[str, float, str | None]] = []
+
+        async def call(session, tool: str, due: float) -> None:
+            message = {
+                "jsonrpc": "2.0",
+                "id": next(ids),
+                "method": "tools/call",
+                "params": {"name": tool, "arguments": TOOL_ARGUMENTS[tool](text)},
+            }
+            try:
+                async with semaphore:
+                    error = classify(await session.send(message))
+            except Exception:
+                error = "transport"
+            calls.append((tool, time.perf_counter() - due, error))
+
+        total = int(args.rate * args.duration)
+        rss_before = rss_bytes(pid)
+        started = time.perf_counter()
+        tasks = []
+        for i in range(total):
+            due = started + i / args.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tool = rng.choices(tools, weights)[0]
+            tasks.append(
+                asyncio.create_task(call(sessions[i % len(sessions)], tool, due))
+            )
+        await asyncio.gather(*tasks)
+        seconds = time.perf_counter() - started
+
+        report |= {
+            "target_rate": args.rate,
+            "seconds": round(seconds, 3),
+            **summarize(calls, seconds),
+            "tools": {
+                tool: summarize([c for c in calls if c[0] == tool], seconds)
+                for tool in tools
+            },
+            "server_rss_before": rss_before,
+            "server_rss_after": rss_bytes(pid),
+        }
+    finally:
+        await asyncio.gather(*(s.close() for s in sessions))
+        await asyncio.gather(*(c.aclose() for c in clients))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--transport",
+        choices=["streamable-http", "sse"],
+        nargs="+",
+        default=["streamable-http", "sse"],
+    )
+    parser.add_argument("--rate", type=float, default=100, help="Calls per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Weighted tool mix as tool:weight,...",
+    )
+    parser.add_argument(
+        "--text-size", type=int, default=2000, help="Characters per call"
+    )
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument(
+        "--subjects", type=int, default=10, help="Distinct token subjects"
+    )
+    parser.add_argument(
+        "--connections", type=int, default=100, help="Concurrent calls in flight"
+    )
+    parser.add_argument("--no-auth", action="store_true", help="Run without JWT auth")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra server environment, e.g. WORKER_MODULES=text",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    tokens: list[str] = [""]
+    if not args.no_auth:
+        key_pair = RSAKeyPair.generate()
+        env |= {
+            "JWT_PUBLIC_KEY": key_pair.public_key,
+            "JWT_ISSUER": ISSUER,
+            "JWT_AUDIENCE": AUDIENCE,
+        }
+        tokens = [
+            key_pair.create_token(
+                subject=f"loadgen-{i}",
+                issuer=ISSUER,
+                audience=AUDIENCE,
+                expires_in_seconds=int(args.duration) + 3600,
+            )
+            for i in range(max(args.subjects, 1))
+        ]
+
+    results = []
+    for transport in args.transport:
+        port = free_port()
+        with run_server(transport, port, env) as process:
+            results.append(
+                asyncio.run(
+                    run_load(
+                        args,
+                        transport,
+                        f"http://127.0.0.1:{port}",
+                        process.pid,
+                        tokens,
+                    )
+                )
+            )
+
+    print(
+        json.dumps(
+            {
+                "rate": args.rate,
+                "duration": args.duration,
+                "mix": args.mix,
+                "auth": not args.no_auth,
+                "subjects": len(tokens),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
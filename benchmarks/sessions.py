@@ -0,0 +1,285 @@
+"""Concurrent session load test.
+
+Starts a local server, opens N concurrent MCP sessions, checks every session
+still answers a ``ping``, and reports server memory and session statistics as
+JSON. With ``--idle-timeout`` the server evicts idle sessions and the report
+shows how many were evicted after the sessions go quiet.
+
+Usage:
+    uv run python -m benchmarks.sessions --sessions 10000
+    uv run python -m benchmarks.sessions --transport sse --sessions 1000
+    uv run python -m benchmarks.sessions --sessions 2000 --idle-timeout 2
+
+Sessions of both transports each hold an event stream open, so large runs
+need a raised open file limit (``ulimit -n``).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks._server import MCP_HEADERS, free_port, rss_bytes, run_server
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 0,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-03-26",
+        "capabilities": {},
+        "clientInfo": {"name": "session-load", "version": "0.1.0"},
+    },
+}
+INITIALIZED = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+PING = {"jsonrpc": "2.0", "id": 1, "method": "ping"}
+READ_SESSIONS = {
+    "jsonrpc": "2.0",
+    "id": 2,
+    "method": "resources/read",
+    "params": {"uri": "internal://server/sessions"},
+}
+
+
+def _result(response: httpx.Response) -> dict:
+    """Extract the JSON-RPC message from a JSON or SSE-framed response."""
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data:"):
+                return json.loads(line[5:])
+        return {}
+    return response.json()
+
+
+def _resource_json(message: dict) -> dict:
+    """Decode the JSON body of a ``resources/read`` response."""
+    contents = message.get("result", {}).get("contents", [])
+    return json.loads(contents[0]["text"]) if contents else message
+
+
+class StreamableSession:
+    """A streamable HTTP session; requests share a pooled client.
+
+    Like the stock MCP clients, the session opens a standalone ``GET`` event
+    stream for server messages once it is initialized, and holds it open.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, url: str) -> None:
+        self.client = client
+        self.url = url
+        self.session_id: str | None = None
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def open(self) -> None:
+        response = await self.client.post(
+            self.url, json=INITIALIZE, headers=MCP_HEADERS
+        )
+        response.raise_for_status()
+        self.session_id = response.headers["mcp-session-id"]
+        await self.send(INITIALIZED)
+        self._task = asyncio.create_task(self._listen())
+        await self._ready.wait()
+
+    async def _listen(self) -> None:
+        headers = {
+            "accept": "text/event-stream",
+            "mcp-session-id": self.session_id or "",
+        }
+        try:
+            async with self.client.stream("GET", self.url, headers=headers) as response:
+                self._ready.set()
+                async for _ in response.aiter_lines():
+                    pass
+        finally:
+            self._ready.set()
+
+    async def send(self, message: dict) -> dict:
+        headers = MCP_HEADERS | {"mcp-session-id": self.session_id or ""}
+        response = await self.client.post(self.url, json=message, headers=headers)
+        response.raise_for_status()
+        return _result(response) if response.content else {}
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+class SSESession:
+    """An SSE session holding its own event stream open."""
+
+    def __init__(self, client: httpx.AsyncClient, base_url: str) -> None:
+        self.client = client
+        self.base_url = base_url
+        self.endpoint: str | None = None
+        self._responses: dict[int, asyncio.Future] = {}
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def open(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+        await self._ready.wait()
+        if self.endpoint is None:
+            raise RuntimeError("SSE stream closed before the endpoint event")
+        await self.send(INITIALIZE)
+        await self.send(INITIALIZED)
+
+    async def _listen(self) -> None:
+        try:
+            async with self.client.stream("GET", f"{self.base_url}/sse") as response:
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        data = line[5:].strip()
+                        if event == "endpoint":
+                            self.endpoint = data
+                            self._ready.set()
+                        elif event == "message":
+                            message = json.loads(data)
+                            future = self._responses.pop(message.get("id"), None)
+                            if future is not None and not future.done():
+                                future.set_result(message)
+        finally:
+            self._ready.set()
+            for future in self._responses.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("SSE stream closed"))
+
+    async def send(self, message: dict) -> dict:
+        future = None
+        if "id" in message:
+            future = asyncio.get_running_loop().create_future()
+            self._responses[message["id"]] = future
+        response = await self.client.post(
+            f"{self.base_url}{self.endpoint}", json=message
+        )
+        response.raise_for_status()
+        return await asyncio.wait_for(future, 30) if future else {}
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+async def _gather_limited(coroutines, limit: int) -> list:
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coroutine):
+        async with semaphore:
+            try:
+                await coroutine
+                return None
+            except Exception as e:
+                return e
+
+    return await asyncio.gather(*(run(c) for c in coroutines))
+
+
+async def run_load(args: argparse.Namespace, base_url: str, pid: int) -> dict:
+    limits = httpx.Limits(
+        max_connections=args.sessions + args.connections + 1,
+        max_keepalive_connections=args.connections,
+    )
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        if args.transport == "sse":
+            sessions: list = [
+                SSESession(client, base_url) for _ in range(args.sessions)
+            ]
+        else:
+            sessions = [
+                StreamableSession(client, f"{base_url}/mcp/")
+                for _ in range(args.sessions)
+            ]
+
+        rss_before = rss_bytes(pid)
+        started = time.perf_counter()
+        errors = await _gather_limited((s.open() for s in sessions), args.connections)
+        open_seconds = time.perf_counter() - started
+        opened = [s for s, error in zip(sessions, errors, strict=True) if error is None]
+
+        started = time.perf_counter()
+        ping_errors = await _gather_limited(
+            (s.send(PING) for s in opened), args.connections
+        )
+        ping_seconds = time.perf_counter() - started
+        rss_after = rss_bytes(pid)
+
+        report = {
+            "transport": args.transport,
+            "sessions_requested": args.sessions,
+            "sessions_opened": len(opened),
+            "open_errors": len(sessions) - len(opened),
+            "first_open_error": next((repr(e) for e in errors if e), None),
+            "sessions_responding": sum(1 for e in ping_errors if e is None),
+            "first_ping_error": next((repr(e) for e in ping_errors if e), None),
+            "open_seconds": round(open_seconds, 3),
+            "ping_seconds": round(ping_seconds, 3),
+            "server_rss_before": rss_before,
+            "server_rss_after": rss_after,
+            "server_rss_per_session": (rss_after - rss_before) // max(len(opened), 1),
+        }
+
+        if opened:
+            report["server_sessions"] = _resource_json(
+                await opened[0].send(READ_SESSIONS)
+            )
+
+        if args.idle_timeout:
+            await asyncio.sleep(args.idle_timeout + 2)
+            # Every load session has idled out; read the stats from a fresh one
+            probe = (
+                SSESession(client, base_url)
+                if args.transport == "sse"
+                else StreamableSession(client, f"{base_url}/mcp/")
+            )
+            sessions.append(probe)
+            await probe.open()
+            report["after_idle"] = _resource_json(await probe.send(READ_SESSIONS))
+            report["sessions_responding_after_idle"] = sum(
+                1
+                for e in await _gather_limited(
+                    (s.send(PING) for s in opened), args.connections
+                )
+                if e is None
+            )
+
+        await asyncio.gather(*(s.close() for s in sessions))
+        return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--transport", choices=["streamable-http", "sse"], default="streamable-http"
+    )
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument(
+        "--connections", type=int, default=100, help="Concurrent requests in flight"
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=0,
+        help="Run the server with this idle timeout and report evictions",
+    )
+    args = parser.parse_args()
+
+    env = {"MAX_SESSIONS": str(args.sessions)}
+    if args.idle_timeout:
+        env |= {
+            "SESSION_IDLE_TIMEOUT": str(args.idle_timeout),
+            "SESSION_SWEEP_INTERVAL": "1",
+        }
+
+    port = free_port()
+    with run_server(args.transport, port, env) as process:
+        report = asyncio.run(run_load(args, f"http://127.0.0.1:{port}", process.pid))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
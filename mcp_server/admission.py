@@ -0,0 +1,218 @@
+"""Per-client rate limiting and admission control for tool calls.
+
+Every tool call is admitted against three limits before it runs:
+
+- a token bucket per authenticated subject (``RATE_LIMIT_PER_SECOND`` with
+  bursts of up to ``RATE_LIMIT_BURST`` calls),
+- a cap on concurrent calls per subject (``MAX_IN_FLIGHT_PER_SUBJECT``),
+- a global cap on concurrent calls (``MAX_CONCURRENT_CALLS``) with a bounded
+  wait queue (``MAX_QUEUED_CALLS``).
+
+Calls that exceed a limit are rejected immediately with a retryable error
+instead of being queued without bound. A limit of 0 disables that check.
+Calls waiting in the queue count towards their subject's concurrency, so one
+subject cannot fill the queue. Calls without an authenticated subject (when
+no JWT authentication is configured) only pass the global limits, so
+unauthenticated deployments are not throttled as a single client.
+
+Once admitted, each call reserves its estimated memory from the process-wide
+``MemoryBudget``; heavy calls may wait there for memory to free up. Tools of
+modules running in worker processes use no memory here and are not charged.
+"""
+
+import asyncio
+import functools
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any
+
+from mcp.server.auth.middleware.auth_context import get_access_token
+
+from mcp_server.memory import MemoryBudgetError, budget
+from mcp_server.settings import Config as cfg
+from mcp_server.settings.logging import get_app_logger
+from mcp_server.workers import is_isolated
+
+logger = get_app_logger("mcp_server.admission")
+
+# Subject state is pruned once this many subjects are tracked
+MAX_TRACKED_SUBJECTS = 10_000
+
+
+class AdmissionError(Exception):
+    """Raised when a call is rejected by admission control."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    __slots__ = ("burst", "rate", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; return 0 on success or the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Applies per-subject and global limits to tool calls."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        max_in_flight_per_subject: int,
+        max_concurrent: int,
+        max_queued: int,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_in_flight_per_subject = max_in_flight_per_subject
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._buckets: dict[str, TokenBucket] = {}
+        self._in_flight: dict[str, int] = {}
+        self._running = 0
+        self._queued = 0
+        self._slots = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+        self.rejected = 0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _prune(self) -> None:
+        """Forget subjects with no calls in flight and a full bucket."""
+        now = time.monotonic()
+        for subject, bucket in list(self._buckets.items()):
+            idle = (now - bucket.updated) * bucket.rate + bucket.tokens >= bucket.burst
+            if idle and not self._in_flight.get(subject):
+                del self._buckets[subject]
+
+    def _check_subject(self, subject: str) -> None:
+        if self.rate:
+            bucket = self._buckets.get(subject)
+            if bucket is None:
+                if len(self._buckets) >= MAX_TRACKED_SUBJECTS:
+                    self._prune()
+                bucket = self._buckets[subject] = TokenBucket(self.rate, self.burst)
+            wait = bucket.take()
+            if wait:
+                raise AdmissionError(
+                    f"Rate limit exceeded for {subject}", retry_after=wait
+                )
+
+        if (
+            self.max_in_flight_per_subject
+            and self._in_flight.get(subject, 0) >= self.max_in_flight_per_subject
+        ):
+            raise AdmissionError(
+                f"Too many concurrent calls for {subject}", retry_after=1.0
+            )
+
+    def _release_subject(self, subject: str) -> None:
+        remaining = self._in_flight[subject] - 1
+        if remaining:
+            self._in_flight[subject] = remaining
+        else:
+            del self._in_flight[subject]
+
+    @asynccontextmanager
+    async def admit(self, subject: str | None):
+        """Hold a global slot and a per-subject slot for the duration of a call.
+
+        The per-subject slot is taken before waiting for a global slot, and
+        per-subject limits are skipped when ``subject`` is None.
+        """
+        if subject is not None:
+            self._check_subject(subject)
+            self._in_flight[subject] = self._in_flight.get(subject, 0) + 1
+        try:
+            if self._slots is not None and self._slots.locked():
+                if self._queued >= self.max_queued:
+                    raise AdmissionError("Server is overloaded", retry_after=1.0)
+                self._queued += 1
+                try:
+                    await self._slots.acquire()
+                finally:
+                    self._queued -= 1
+            elif self._slots is not None:
+                await self._slots.acquire()
+
+            self._running += 1
+            try:
+                yield
+            finally:
+                self._running -= 1
+                if self._slots is not None:
+                    self._slots.release()
+        finally:
+            if subject is not None:
+                self._release_subject(subject)
+
+
+controller = AdmissionController(
+    rate=cfg.RATE_LIMIT_PER_SECOND,
+    burst=cfg.RATE_LIMIT_BURST,
+    max_in_flight_per_subject=cfg.MAX_IN_FLIGHT_PER_SUBJECT,
+    max_concurrent=cfg.MAX_CONCURRENT_CALLS,
+    max_queued=cfg.MAX_QUEUED_CALLS,
+)
+
+
+def current_subject() -> str | None:
+    """Return the subject of the validated access token for the current request.
+
+    The bearer provider stores the token's ``client_id`` claim, falling back to
+    ``sub``, as the token's client id. Returns None for unauthenticated requests.
+    """
+    token = get_access_token()
+    return token.client_id if token is not None else None
+
+
+def limited(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Wrap a tool so every call passes admission control first."""
+
+    charged = not is_isolated(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        subject = current_subject()
+        try:
+            async with (
+                controller.admit(subject),
+                budget.reserve(fn.__name__, kwargs) if charged else nullcontext(),
+            ):
+                return await fn(*args, **kwargs)
+        except (AdmissionError, MemoryBudgetError) as e:
+            if isinstance(e, AdmissionError):
+                controller.rejected += 1
+            logger.warning(f"Rejected call to {fn.__name__}: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "retryable": True,
+                "retry_after": round(e.retry_after, 3),
+            }
+
+    return wrapper
@@ -1,22 +1,73 @@
 """FastMCP application instance."""
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Literal
+
 from fastmcp import FastMCP
+from fastmcp.server.http import StarletteWithLifespan
+from starlette.middleware import Middleware
 
 from mcp_server.auth import get_auth_provider
 from mcp_server.loader import load_modules
+from mcp_server.memory import BodySizeLimitMiddleware
+from mcp_server.serialization import serialize_result
+from mcp_server.sessions import SessionMiddleware
 from mcp_server.settings import Config as cfg
 from mcp_server.settings.logging import get_app_logger
+from mcp_server.snapshot import store
 
 logger = get_app_logger("mcp_server.app")
 
+
+class ProductionFastMCP(FastMCP):
+    """FastMCP server that installs body size and session middleware on HTTP."""
+
+    def http_app(
+        self,
+        path: str | None = None,
+        middleware: list[Middleware] | None = None,
+        json_response: bool | None = None,
+        stateless_http: bool | None = None,
+        transport: Literal["streamable-http", "sse"] = "streamable-http",
+    ) -> StarletteWithLifespan:
+        settings = self._deprecated_settings
+        middleware = [Middleware(BodySizeLimitMiddleware), *(middleware or [])]
+
+        if transport == "sse":
+            sse_path = path or settings.sse_path
+            middleware.append(Middleware(SessionMiddleware, transport, sse_path))
+        elif not settings.stateless_http:
+            http_path = path or settings.streamable_http_path
+            middleware.append(Middleware(SessionMiddleware, transport, http_path))
+
+        return super().http_app(
+            path=path,
+            middleware=middleware,
+            json_response=json_response,
+            stateless_http=stateless_http,
+            transport=transport,
+        )
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[Any]:
+    """Start periodic warm-start snapshots once the event loop is running."""
+    store.start()
+    yield {}
+
+
 auth_provider = get_auth_provider()
 
-mcp: FastMCP = FastMCP(
+mcp: FastMCP = ProductionFastMCP(
     name=cfg.MCP_SERVER_NAME,
     host=cfg.HOST,
     port=cfg.PORT,
     log_level=cfg.LOG_LEVEL,
+    stateless_http=cfg.STATELESS_HTTP,
     auth=auth_provider,
+    tool_serializer=serialize_result,
+    lifespan=lifespan,
 )
 
 load_modules(mcp)
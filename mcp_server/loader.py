@@ -4,41 +4,146 @@ This module handles the loading and registration of all MCP server modules
 including tools, prompts, and resources.
 """
 
+from collections.abc import Callable
+from typing import Any
+
 from fastmcp import FastMCP
 
+from mcp_server.admission import limited
+from mcp_server.profiling import traced
+from mcp_server.serialization import compactable
+from mcp_server.workers import isolated
+
+
+def _tool(app: FastMCP, name: str, description: str) -> Callable[[Callable], Any]:
+    """Return a decorator registering a traced tool behind admission control."""
+
+    def decorator(fn: Callable) -> Any:
+        return app.tool(name=name, description=description)(
+            compactable(limited(traced(name)(isolated(fn, tool=True))))
+        )
+
+    return decorator
+
 
 def register_tools(app: FastMCP) -> None:
     """Register text processing tools with the application."""
     from mcp_server.modules.text import tools
 
-    app.tool(
+    _tool(
+        app,
         name="text_transform_case",
         description="Transform text case (upper, lower, title, camel, snake, etc.)",
     )(tools.transform_case)
 
-    app.tool(
-        name="text_analyze_text", description="Analyze text and provide statistics"
+    _tool(
+        app, name="text_analyze_text", description="Analyze text and provide statistics"
     )(tools.analyze_text)
 
-    app.tool(name="text_clean_text", description="Clean and normalize text")(
+    _tool(app, name="text_clean_text", description="Clean and normalize text")(
         tools.clean_text
     )
 
-    app.tool(
+    _tool(
+        app,
         name="text_extract_patterns",
         description="Extract patterns like emails, URLs, phone numbers from text",
     )(tools.extract_patterns)
 
-    app.tool(
+    _tool(
+        app,
+        name="text_word_frequency",
+        description="Count the most frequent words and n-grams in text",
+    )(tools.word_frequency)
+
+    _tool(
+        app,
+        name="text_diff",
+        description="Diff two texts by line, word or character as unified or structured hunks",
+    )(tools.text_diff)
+
+    _tool(
+        app,
+        name="text_apply_patch",
+        description="Apply a unified diff or structured hunks from text_diff to a text",
+    )(tools.apply_patch)
+
+    _tool(
+        app,
         name="text_encode_text",
         description="Encode text using various encoding methods",
     )(tools.encode_text)
 
-    app.tool(
+    _tool(
+        app,
         name="text_format_text",
         description="Format text with various formatting options",
     )(tools.format_text)
 
+    _tool(
+        app,
+        name="text_document_append",
+        description="Append text to a named document and update its analysis index",
+    )(tools.document_append)
+
+    _tool(
+        app,
+        name="text_document_patch",
+        description="Replace a character range of a named document",
+    )(tools.document_patch)
+
+    _tool(
+        app,
+        name="text_document_analyze",
+        description="Get incrementally maintained statistics for a named document",
+    )(tools.document_analyze)
+
+    _tool(
+        app,
+        name="text_document_slice",
+        description="Get a range of lines or sentences from a named document",
+    )(tools.document_slice)
+
+    _tool(app, name="text_document_delete", description="Delete a named document")(
+        tools.document_delete
+    )
+
+    _tool(
+        app,
+        name="text_search_add_documents",
+        description="Add or replace documents in a named full-text search collection",
+    )(tools.search_add_documents)
+
+    _tool(
+        app,
+        name="text_search_remove_documents",
+        description="Remove documents from a named full-text search collection",
+    )(tools.search_remove_documents)
+
+    _tool(
+        app,
+        name="text_search_query",
+        description="Search a collection with BM25 ranking, phrase queries and snippets",
+    )(tools.search_query)
+
+    _tool(
+        app,
+        name="text_search_delete_collection",
+        description="Delete a named full-text search collection",
+    )(tools.search_delete_collection)
+
+    _tool(
+        app,
+        name="text_dedup_documents",
+        description="Cluster near-duplicate documents in a batch or an ongoing collection",
+    )(tools.dedup_documents)
+
+    _tool(
+        app,
+        name="text_dedup_delete_collection",
+        description="Delete a named near-duplicate detection collection",
+    )(tools.dedup_delete_collection)
+
 
 def register_resources(app: FastMCP) -> None:
     """Register text processing resources with the application."""
@@ -49,28 +154,68 @@ def register_resources(app: FastMCP) -> None:
         uri="internal://text/stats",
         description="Comprehensive statistics about text processing operations",
         mime_type="application/json",
-    )(resources.text_stats_resource)
+    )(isolated(resources.text_stats_resource))
 
     app.resource(
         name="text_case_types",
         uri="internal://text/case-types",
         description="List of supported case transformation types",
         mime_type="application/json",
-    )(resources.case_types_resource)
+    )(isolated(resources.case_types_resource))
 
     app.resource(
         name="text_format_operations",
         uri="internal://text/format-operations",
         description="List of supported text formatting operations",
         mime_type="application/json",
-    )(resources.format_operations_resource)
+    )(isolated(resources.format_operations_resource))
 
     app.resource(
         name="text_cleaning_options",
         uri="internal://text/cleaning-options",
         description="List of available text cleaning options",
         mime_type="application/json",
-    )(resources.cleaning_options_resource)
+    )(isolated(resources.cleaning_options_resource))
+
+
+def register_server_resources(app: FastMCP) -> None:
+    """Register server-level resources with the application."""
+    from mcp_server import memory, profiling, sessions, snapshot, workers
+
+    app.resource(
+        name="server_sessions",
+        uri="internal://server/sessions",
+        description="Live session counts, evictions and per-session traffic",
+        mime_type="application/json",
+    )(sessions.sessions_resource)
+
+    app.resource(
+        name="server_memory",
+        uri="internal://server/memory",
+        description="Request size limit, memory budget and sampled per-tool memory use",
+        mime_type="application/json",
+    )(memory.memory_resource)
+
+    app.resource(
+        name="server_profiles",
+        uri="internal://server/profiles",
+        description="Per-tool timings, recent call spans and slow-call profiles",
+        mime_type="application/json",
+    )(profiling.profiles_resource)
+
+    app.resource(
+        name="server_workers",
+        uri="internal://server/workers",
+        description="Worker processes hosting isolated modules and their call counts",
+        mime_type="application/json",
+    )(workers.workers_resource)
+
+    app.resource(
+        name="server_snapshot",
+        uri="internal://server/snapshot",
+        description="Warm-start snapshot status, restored entries and last write",
+        mime_type="application/json",
+    )(snapshot.snapshot_resource)
 
 
 def register_prompts(app: FastMCP) -> None:
@@ -79,33 +224,33 @@ def register_prompts(app: FastMCP) -> None:
 
     app.prompt(
         name="text_summarize", description="Generate a summary of the given text"
-    )(prompts.summarize_prompt)
+    )(isolated(prompts.summarize_prompt))
 
     app.prompt(
         name="text_improve_writing", description="Improve the writing quality of text"
-    )(prompts.improve_text_prompt)
+    )(isolated(prompts.improve_text_prompt))
 
     app.prompt(
         name="text_extract_keywords",
         description="Extract key topics and keywords from text",
-    )(prompts.extract_keywords_prompt)
+    )(isolated(prompts.extract_keywords_prompt))
 
     app.prompt(
         name="text_sentiment_analysis", description="Analyze the sentiment of text"
-    )(prompts.sentiment_analysis_prompt)
+    )(isolated(prompts.sentiment_analysis_prompt))
 
     app.prompt(
         name="text_grammar_check", description="Check and correct grammar in text"
-    )(prompts.grammar_check_prompt)
+    )(isolated(prompts.grammar_check_prompt))
 
     app.prompt(
         name="text_explanation", description="Explain complex text in simple terms"
-    )(prompts.text_explanation_prompt)
+    )(isolated(prompts.text_explanation_prompt))
 
     app.prompt(
         name="text_generate_outline",
         description="Generate an outline from text content",
-    )(prompts.generate_outline_prompt)
+    )(isolated(prompts.generate_outline_prompt))
 
 
 def load_modules(app: FastMCP) -> None:
@@ -117,4 +262,5 @@ def load_modules(app: FastMCP) -> None:
     """
     register_tools(app)
     register_resources(app)
+    register_server_resources(app)
     register_prompts(app)
@@ -0,0 +1,392 @@
+"""Request size limits and memory budget accounting.
+
+``BodySizeLimitMiddleware`` refuses HTTP requests whose body exceeds
+``MAX_REQUEST_BODY_BYTES`` with ``413``, before the body is decoded: from the
+``Content-Length`` header when there is one, otherwise as soon as the bytes
+received cross the limit, so an oversized body is never buffered in full.
+
+``MemoryBudget`` accounts for the memory each tool call is expected to use.
+A call's estimate is the size of its arguments times an amplification ratio
+learned per tool: after every ``MEMORY_SAMPLE_EVERY`` calls, the next call
+that starts with no other call in flight runs with ``tracemalloc`` and its
+peak allocation updates the tool's ratio, so the remaining calls cost only a
+size estimate. ``tracemalloc`` traces the whole process, so a sample is only
+recorded when no other call started while it ran. With
+``MEMORY_BUDGET_BYTES`` set, a call whose estimate is at least
+``MEMORY_HEAVY_CALL_BYTES`` is deferred while the process's resident memory
+plus the estimates of calls in flight would exceed the budget, and rejected
+with a retryable error if that lasts ``MEMORY_DEFER_TIMEOUT`` seconds.
+Lighter calls are never held back. Calls are charged only once admission
+control has let them through, and tools of modules running in worker
+processes are not charged at all.
+
+``tracemalloc`` is shared with the slow-call profiler through ``tracer``,
+which starts tracing for its first user and stops it after its last.
+"""
+
+import asyncio
+import functools
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mcp_server.settings import Config as cfg
+from mcp_server.settings.logging import get_app_logger
+
+logger = get_app_logger("mcp_server.memory")
+
+# Ratio of peak allocation to argument size assumed before a tool is sampled
+DEFAULT_AMPLIFICATION = 4.0
+
+# Weight of each new sample in a tool's amplification ratio
+SAMPLE_WEIGHT = 0.2
+
+# Smaller calls are dominated by fixed overhead and do not update the ratio
+MIN_RATIO_ARGUMENT_BYTES = 65536
+
+# Resident memory is re-read at most this often
+RSS_REFRESH_SECONDS = 0.1
+
+
+class RequestTooLarge(Exception):
+    """A request body exceeded the configured limit while being received."""
+
+
+class MemoryBudgetError(Exception):
+    """A call was refused because the memory budget is exhausted."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def argument_bytes(value: Any, depth: int = 2) -> int:
+    """Approximate memory held by a tool argument and its direct contents."""
+    size = sys.getsizeof(value)
+    if depth and isinstance(value, dict):
+        size += sum(
+            argument_bytes(k, depth - 1) + argument_bytes(v, depth - 1)
+            for k, v in value.items()
+        )
+    elif depth and isinstance(value, (list, tuple)):
+        size += sum(argument_bytes(item, depth - 1) for item in value)
+    return size
+
+
+@functools.cache
+def _page_size() -> int:
+    import resource
+
+    return resource.getpagesize()
+
+
+def read_rss() -> int:
+    """Resident set size of this process, or 0 where ``/proc`` is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _page_size()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class Trace:
+    """A period of allocation tracing held by one user of ``AllocationTracer``."""
+
+    __slots__ = ("shared",)
+
+    def __init__(self) -> None:
+        # Whether other work may have allocated during the trace
+        self.shared = False
+
+
+class AllocationTracer:
+    """Reference-counted ``tracemalloc`` shared by all its users.
+
+    Tracing starts with the first trace and stops when the last one ends,
+    unless it was already started elsewhere. A trace overlapping another,
+    or ``overlap()``, is marked as shared, since peaks are process-wide.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._active: set[Trace] = set()
+        self._owned = False
+
+    def start(self) -> Trace:
+        trace = Trace()
+        with self._lock:
+            if not self._active:
+                if tracemalloc.is_tracing():
+                    # Started elsewhere, so its peak covers more than this trace
+                    trace.shared = True
+                else:
+                    tracemalloc.start()
+                    self._owned = True
+            self._active.add(trace)
+            if len(self._active) > 1:
+                for active in self._active:
+                    active.shared = True
+        return trace
+
+    def stop(self, trace: Trace) -> int:
+        """End ``trace``, returning the peak traced memory while it ran."""
+        with self._lock:
+            self._active.discard(trace)
+            peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+            if not self._active and self._owned:
+                tracemalloc.stop()
+                self._owned = False
+        return peak
+
+    def overlap(self) -> None:
+        """Mark running traces as shared with work that just started."""
+        if self._active:
+            with self._lock:
+                for trace in self._active:
+                    trace.shared = True
+
+
+tracer = AllocationTracer()
+
+
+class ToolMemory:
+    """Sampled memory use of one tool."""
+
+    __slots__ = ("max_peak", "ratio", "ratio_samples", "samples", "total_peak")
+
+    def __init__(self) -> None:
+        self.ratio = DEFAULT_AMPLIFICATION
+        self.ratio_samples = 0
+        self.samples = 0
+        self.total_peak = 0
+        self.max_peak = 0
+
+    def record(self, peak: int, size: int) -> None:
+        self.samples += 1
+        self.total_peak += peak
+        self.max_peak = max(self.max_peak, peak)
+        if size >= MIN_RATIO_ARGUMENT_BYTES:
+            observed = peak / size
+            if self.ratio_samples:
+                self.ratio += SAMPLE_WEIGHT * (observed - self.ratio)
+            else:
+                self.ratio = observed
+            self.ratio_samples += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "amplification": round(self.ratio, 2),
+            "average_peak_bytes": self.total_peak // self.samples
+            if self.samples
+            else None,
+            "max_peak_bytes": self.max_peak if self.samples else None,
+        }
+
+
+class MemoryBudget:
+    """Per-call memory estimates and a process-wide memory budget."""
+
+    def __init__(
+        self,
+        budget: int,
+        heavy_bytes: int,
+        defer_timeout: float,
+        sample_every: int,
+    ) -> None:
+        self.budget = budget
+        self.heavy_bytes = heavy_bytes
+        self.defer_timeout = defer_timeout
+        self.sample_every = sample_every
+        self.tools: dict[str, ToolMemory] = {}
+        self.reserved = 0
+        self.in_flight = 0
+        self.deferred = 0
+        self.rejected = 0
+        self._unsampled = 0
+        self._released = asyncio.Event()
+        self._rss = 0
+        self._rss_read = 0.0
+
+    def rss(self) -> int:
+        now = time.monotonic()
+        if now - self._rss_read >= RSS_REFRESH_SECONDS:
+            self._rss = read_rss()
+            self._rss_read = now
+        return self._rss
+
+    def estimate(self, tool: str, size: int) -> int:
+        memory = self.tools.get(tool)
+        ratio = memory.ratio if memory is not None else DEFAULT_AMPLIFICATION
+        return max(int(size * ratio), size)
+
+    def _fits(self, estimate: int) -> bool:
+        return self.rss() + self.reserved + estimate <= self.budget
+
+    async def _wait_for_room(self, tool: str, estimate: int) -> None:
+        if estimate > self.budget:
+            self.rejected += 1
+            raise MemoryBudgetError(
+                f"Call to {tool} needs about {estimate} bytes, more than the memory budget",
+                retry_after=self.defer_timeout,
+            )
+
+        self.deferred += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.defer_timeout
+        while not self._fits(estimate):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self.rejected += 1
+                raise MemoryBudgetError(
+                    "Memory budget exhausted", retry_after=self.defer_timeout
+                )
+            try:
+                await asyncio.wait_for(self._released.wait(), remaining)
+            except TimeoutError:
+                pass
+
+    @asynccontextmanager
+    async def reserve(self, tool: str, arguments: dict[str, Any]) -> AsyncIterator[int]:
+        """Hold a call's estimated memory for its duration, waiting for room."""
+        size = argument_bytes(arguments)
+        estimate = self.estimate(tool, size)
+        if self.budget and estimate >= self.heavy_bytes and not self._fits(estimate):
+            await self._wait_for_room(tool, estimate)
+
+        # Traces of calls already running now include this one's allocations
+        tracer.overlap()
+        trace = None
+        self._unsampled += 1
+        due = self.sample_every and self._unsampled >= self.sample_every
+        if due and not self.in_flight:
+            trace = tracer.start()
+            self._unsampled = 0
+
+        self.reserved += estimate
+        self.in_flight += 1
+        completed = False
+        try:
+            yield estimate
+            completed = True
+        finally:
+            self.reserved -= estimate
+            self.in_flight -= 1
+            if trace is not None:
+                peak = tracer.stop(trace)
+                # Calls cut short or sharing the process with other calls say
+                # nothing about the tool's memory use
+                if completed and not trace.shared:
+                    memory = self.tools.get(tool)
+                    if memory is None:
+                        memory = self.tools[tool] = ToolMemory()
+                    memory.record(peak, size)
+            released, self._released = self._released, asyncio.Event()
+            released.set()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "budget_bytes": self.budget,
+            "rss_bytes": self.rss(),
+            "reserved_bytes": self.reserved,
+            "in_flight": self.in_flight,
+            "heavy_call_bytes": self.heavy_bytes,
+            "deferred": self.deferred,
+            "rejected": self.rejected,
+            "sample_every": self.sample_every,
+            "tools": {tool: memory.stats() for tool, memory in self.tools.items()},
+        }
+
+
+budget = MemoryBudget(
+    budget=cfg.MEMORY_BUDGET_BYTES,
+    heavy_bytes=cfg.MEMORY_HEAVY_CALL_BYTES,
+    defer_timeout=cfg.MEMORY_DEFER_TIMEOUT,
+    sample_every=cfg.MEMORY_SAMPLE_EVERY,
+)
+
+
+class BodySizeLimitMiddleware:
+    """ASGI middleware refusing request bodies larger than ``max_bytes``."""
+
+    rejected = 0
+
+    def __init__(
+        self, app: ASGIApp, max_bytes: int = cfg.MAX_REQUEST_BODY_BYTES
+    ) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise RequestTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            # Drop whatever error response the app makes of the refused body
+            if exceeded and not response_started:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except RequestTooLarge:
+            pass
+        if exceeded and not response_started:
+            await self._reject(send)
+
+    async def _reject(self, send: Send) -> None:
+        BodySizeLimitMiddleware.rejected += 1
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": f"Request body exceeds {self.max_bytes} bytes".encode(),
+            }
+        )
+
+
+def memory_resource() -> dict[str, Any]:
+    """Request size limit and memory budget statistics resource."""
+    return {
+        "success": True,
+        "max_request_body_bytes": cfg.MAX_REQUEST_BODY_BYTES,
+        "oversized_requests_rejected": BodySizeLimitMiddleware.rejected,
+        "memory": budget.stats(),
+    }
@@ -0,0 +1,280 @@
+"""Near-duplicate detection with MinHash signatures and LSH banding.
+
+Documents are reduced to word shingles, and each shingle is hashed once.
+Signatures use one-permutation MinHash: the top bits of a shingle's hash pick
+one of ``SIGNATURE_SIZE`` buckets and every bucket keeps its minimum, so a
+whole signature costs a single pass over the shingle hashes instead of one
+pass per hash function. Empty buckets are filled from the next non-empty
+bucket (rotation densification) so that signatures of short documents stay
+comparable.
+
+Signatures are split into bands and indexed by band, so candidate pairs are
+only the documents sharing at least one band; candidates are then confirmed
+by their estimated Jaccard similarity. ``DedupIndex`` keeps at most
+``TEXT_DEDUP_MAX_SIGNATURES`` signatures, dropping the oldest first.
+"""
+
+import hashlib
+import re
+from array import array
+from collections import OrderedDict
+
+from mcp_server.settings import Config as cfg
+from mcp_server.snapshot import store
+
+SIGNATURE_SIZE = 128
+_BUCKET_SHIFT = 64 - (SIGNATURE_SIZE.bit_length() - 1)
+# Low hash bits kept per bucket; the bits above record densification distance
+_VALUE_BITS = 48
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+_EMPTY = (1 << 64) - 1
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, shingle_size: int) -> set[int]:
+    """Hash the distinct word shingles of ``text`` to 64-bit integers."""
+    tokens = [token.casefold() for token in _TOKEN_PATTERN.findall(text)]
+    if not tokens:
+        return set()
+    count = max(len(tokens) - shingle_size + 1, 1)
+    return {
+        int.from_bytes(
+            hashlib.blake2b(
+                " ".join(tokens[i : i + shingle_size]).encode(), digest_size=8
+            ).digest(),
+            "little",
+        )
+        for i in range(count)
+    }
+
+
+def minhash(hashes: set[int]) -> array:
+    """Compute a one-permutation MinHash signature from shingle hashes."""
+    signature = array("Q", [_EMPTY]) * SIGNATURE_SIZE
+    for h in hashes:
+        bucket = h >> _BUCKET_SHIFT
+        signature[bucket] = min(signature[bucket], h & _VALUE_MASK)
+
+    if not hashes or _EMPTY not in signature:
+        return signature
+
+    # Rotation densification: borrow from the next non-empty bucket, tagged
+    # with the distance so borrowed values only match equally borrowed ones
+    filled = signature[:]
+    for i in range(SIGNATURE_SIZE):
+        distance = 1
+        while filled[i] == _EMPTY:
+            source = signature[(i + distance) % SIGNATURE_SIZE]
+            if source != _EMPTY:
+                filled[i] = source | (distance << _VALUE_BITS)
+            distance += 1
+    return filled
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimate the Jaccard similarity of two documents from their signatures."""
+    return sum(x == y for x, y in zip(a, b, strict=True)) / SIGNATURE_SIZE
+
+
+def band_rows(threshold: float) -> int:
+    """Rows per band for an LSH similarity threshold safely below ``threshold``.
+
+    With ``b`` bands of ``r`` rows, documents become candidates around a
+    similarity of ``(1 / b) ** (1 / r)``. Keeping that a margin below the
+    requested threshold means true duplicates are rarely missed; false
+    candidates are filtered by their estimated similarity afterwards.
+    """
+    rows = 1
+    for r in range(1, SIGNATURE_SIZE + 1):
+        if (
+            SIGNATURE_SIZE % r == 0
+            and (r / SIGNATURE_SIZE) ** (1 / r) <= threshold - 0.05
+        ):
+            rows = r
+    return rows
+
+
+class DedupIndex:
+    """Bounded LSH index of MinHash signatures."""
+
+    def __init__(self, threshold: float, shingle_size: int) -> None:
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.rows = band_rows(threshold)
+        self._signatures: OrderedDict[str, array] = OrderedDict()
+        self._bands: list[dict[bytes, set[str]]] = [
+            {} for _ in range(SIGNATURE_SIZE // self.rows)
+        ]
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self._signatures
+
+    def state(self) -> tuple:
+        """Settings and signatures in a form ``marshal`` can store."""
+        return (
+            self.threshold,
+            self.shingle_size,
+            self.evicted,
+            [
+                (name, signature.tobytes())
+                for name, signature in self._signatures.items()
+            ],
+        )
+
+    @classmethod
+    def from_state(cls, state: tuple) -> "DedupIndex":
+        """Rebuild an index from ``state()`` without rehashing any text."""
+        threshold, shingle_size, evicted, signatures = state
+        index = cls(threshold, shingle_size)
+        for name, data in signatures:
+            signature = array("Q")
+            signature.frombytes(data)
+            index.add(name, signature)
+        index.evicted = evicted
+        return index
+
+    def _band_keys(self, signature: array) -> list[bytes]:
+        rows = self.rows
+        return [
+            signature[i : i + rows].tobytes() for i in range(0, SIGNATURE_SIZE, rows)
+        ]
+
+    def signature(self, text: str) -> array:
+        return minhash(shingle_hashes(text, self.shingle_size))
+
+    def matches(self, signature: array) -> list[tuple[str, float]]:
+        """Indexed documents at least ``threshold`` similar to ``signature``."""
+        candidates: set[str] = set()
+        for band, key in zip(self._bands, self._band_keys(signature), strict=True):
+            candidates.update(band.get(key, ()))
+
+        found = []
+        for document_id in candidates:
+            score = similarity(signature, self._signatures[document_id])
+            if score >= self.threshold:
+                found.append((document_id, score))
+        return found
+
+    def add(self, document_id: str, signature: array) -> None:
+        """Index a signature, replacing any previous one for ``document_id``."""
+        self.remove(document_id)
+        self._signatures[document_id] = signature
+        for band, key in zip(self._bands, self._band_keys(signature), strict=True):
+            band.setdefault(key, set()).add(document_id)
+
+        limit = cfg.TEXT_DEDUP_MAX_SIGNATURES
+        while limit and len(self._signatures) > limit:
+            self.remove(next(iter(self._signatures)))
+            self.evicted += 1
+
+    def remove(self, document_id: str) -> bool:
+        signature = self._signatures.pop(document_id, None)
+        if signature is None:
+            return False
+        for band, key in zip(self._bands, self._band_keys(signature), strict=True):
+            members = band[key]
+            members.discard(document_id)
+            if not members:
+                del band[key]
+        return True
+
+
+def find_clusters(index: DedupIndex, documents: dict[str, str]) -> list[dict]:
+    """Add a batch to ``index`` and cluster it with its near-duplicates.
+
+    Each document is matched against everything indexed before it, including
+    earlier documents of the same batch. Clusters are reported when they
+    contain at least one batch document. The representative is a previously
+    indexed member when there is one, otherwise the earliest batch document.
+    """
+    parent: dict[str, str] = {}
+    seen: dict[str, int] = {}
+
+    def find(name: str) -> str:
+        root = name
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while name != root:
+            parent[name], name = root, parent[name]
+        return root
+
+    def first_seen(name: str) -> int:
+        # Members indexed before this batch sort before the batch itself
+        return seen.get(name, -1)
+
+    for position, (document_id, text) in enumerate(documents.items()):
+        signature = index.signature(text)
+        index.remove(document_id)
+        seen[document_id] = position
+        for match, _ in index.matches(signature):
+            a, b = find(document_id), find(match)
+            if a != b:
+                if (first_seen(a), a) < (first_seen(b), b):
+                    a, b = b, a
+                parent[a] = b
+        index.add(document_id, signature)
+
+    members: dict[str, list[str]] = {}
+    for name in set(parent) | set(parent.values()):
+        members.setdefault(find(name), []).append(name)
+
+    clusters = []
+    for root in sorted(members, key=lambda name: (first_seen(name), name)):
+        ids = members[root]
+        if len(ids) < 2 or not any(name in seen for name in ids):
+            continue
+        ids.sort(key=lambda name: (first_seen(name), name))
+        clusters.append({"representative": root, "ids": ids})
+    return clusters
+
+
+SNAPSHOT_SECTION = "text.dedup"
+# Bump when ``state()`` changes layout
+SNAPSHOT_SCHEMA = 1
+
+_indexes: OrderedDict[str, DedupIndex] = OrderedDict()
+
+
+def get_index(
+    name: str, threshold: float, shingle_size: int, create: bool = False
+) -> DedupIndex | None:
+    """Look up a named dedup index, optionally creating it.
+
+    Indexes missing from memory are restored from the warm-start snapshot
+    when it has them. Adding an index beyond ``TEXT_MAX_DEDUP_COLLECTIONS``
+    evicts the least recently used one.
+    """
+    index = _indexes.get(name)
+    if index is not None:
+        _indexes.move_to_end(name)
+        return index
+
+    index = store.take(SNAPSHOT_SECTION, name, DedupIndex.from_state)
+    if index is None:
+        if not create:
+            return None
+        index = DedupIndex(threshold, shingle_size)
+
+    _indexes[name] = index
+    while len(_indexes) > cfg.TEXT_MAX_DEDUP_COLLECTIONS:
+        _indexes.popitem(last=False)
+    return index
+
+
+def delete_index(name: str) -> bool:
+    """Remove a dedup index, returning whether it existed."""
+    existed = _indexes.pop(name, None) is not None
+    return store.discard(SNAPSHOT_SECTION, name) or existed
+
+
+store.register(
+    SNAPSHOT_SECTION,
+    lambda: [(name, index.state()) for name, index in _indexes.items()],
+    limit=cfg.TEXT_MAX_DEDUP_COLLECTIONS,
+    schema=SNAPSHOT_SCHEMA,
+)
@@ -0,0 +1,428 @@
+"""Linear-space text diff and patch application.
+
+Texts are split into line, word or character tokens, interned to integers and
+compared with Myers' O((N+M)D) algorithm in its linear-space form: each step
+finds the middle snake of the remaining range by searching forwards and
+backwards at once, then splits the range there. Common prefixes and suffixes
+are trimmed before every search. Memory is linear in the input, unlike
+``difflib`` whose matching is quadratic on large, dissimilar inputs.
+
+Word and character diffs are computed in two passes: lines are diffed first
+and only replaced blocks of lines are diffed again token by token, which
+keeps D, and so the running time, small for large documents with scattered
+edits. Tokens never span lines.
+
+If the search runs past its deadline the remaining ranges are reported as
+plain replacements, so the diff is still correct but may not be minimal.
+
+Diffs are rendered either as unified diffs (line granularity) or as
+structured hunks carrying character offsets and the removed and inserted
+text, both of which ``apply_hunks`` and ``apply_unified`` can apply.
+"""
+
+import re
+import time
+from typing import Any
+
+# Lines split on "\n" only, matching how unified diffs are applied
+_LINE_PATTERN = re.compile(r"[^\n]*\n|[^\n]+")
+# Words and whitespace runs; a whitespace run ends at the first newline
+_WORD_PATTERN = re.compile(r"\S+|[^\S\n]*\n|[^\S\n]+")
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+NO_NEWLINE_MARKER = "\\ No newline at end of file"
+
+GRANULARITIES = ("line", "word", "char")
+
+
+class PatchError(ValueError):
+    """A patch does not apply to the given text."""
+
+
+def split_tokens(text: str, granularity: str) -> list[str]:
+    """Split text into tokens that concatenate back to the original text."""
+    if granularity == "line":
+        return _LINE_PATTERN.findall(text)
+    if granularity == "word":
+        return _WORD_PATTERN.findall(text)
+    return list(text)
+
+
+def _intern(a: list[str], b: list[str]) -> tuple[list[int], list[int]]:
+    ids: dict[str, int] = {}
+    return (
+        [ids.setdefault(token, len(ids)) for token in a],
+        [ids.setdefault(token, len(ids)) for token in b],
+    )
+
+
+def _middle_snake(
+    a: list[int], b: list[int], a0: int, a1: int, b0: int, b1: int, deadline: float
+) -> tuple[int, int] | None:
+    """Find where a shortest edit script of the range crosses its middle.
+
+    Returns the split point as offsets into the range, or ``None`` when the
+    deadline passes first. The furthest reaching paths are kept per diagonal
+    in dicts, so each search costs O(D) memory rather than O(N + M).
+    """
+    n = a1 - a0
+    m = b1 - b0
+    delta = n - m
+    # Odd deltas meet while extending forwards, even ones while extending back
+    odd = delta % 2 != 0
+    forward = {1: 0}
+    backward = {1: 0}
+    k1_start = k1_end = k2_start = k2_end = 0
+
+    for d in range((n + m + 1) // 2):
+        if time.monotonic() > deadline:
+            return None
+
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            if k1 == -d or (k1 != d and forward[k1 - 1] < forward[k1 + 1]):
+                x1 = forward[k1 + 1]
+            else:
+                x1 = forward[k1 - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[a0 + x1] == b[b0 + y1]:
+                x1 += 1
+                y1 += 1
+            forward[k1] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif odd:
+                reached = backward.get(delta - k1)
+                if reached is not None and x1 >= n - reached:
+                    return x1, y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            if k2 == -d or (k2 != d and backward[k2 - 1] < backward[k2 + 1]):
+                x2 = backward[k2 + 1]
+            else:
+                x2 = backward[k2 - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[a1 - x2 - 1] == b[b1 - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            backward[k2] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not odd:
+                k1 = delta - k2
+                reached = forward.get(k1)
+                if reached is not None and reached >= n - x2:
+                    return reached, reached - k1
+
+    # The paths never overlap when the ranges have nothing in common
+    return n, 0
+
+
+def diff_opcodes(
+    a: list[str], b: list[str], deadline: float
+) -> tuple[list[tuple[str, int, int, int, int]], bool]:
+    """Diff two token lists into ``difflib``-style opcodes.
+
+    Returns the opcodes and whether the deadline cut the search short.
+    """
+    ia, ib = _intern(a, b)
+    timed_out = False
+    # Equal runs and single changes, in order, as (equal, a0, a1, b0, b1)
+    edits: list[tuple[bool, int, int, int, int]] = []
+    # Ranges still to diff, plus equal suffixes to emit once a range is done
+    stack: list[tuple[bool, int, int, int, int]] = [(False, 0, len(ia), 0, len(ib))]
+
+    while stack:
+        done, a0, a1, b0, b1 = stack.pop()
+        if done:
+            edits.append((True, a0, a1, b0, b1))
+            continue
+
+        start_a, start_b = a0, b0
+        while a0 < a1 and b0 < b1 and ia[a0] == ib[b0]:
+            a0 += 1
+            b0 += 1
+        if a0 > start_a:
+            edits.append((True, start_a, a0, start_b, b0))
+
+        end_a, end_b = a1, b1
+        while a1 > a0 and b1 > b0 and ia[a1 - 1] == ib[b1 - 1]:
+            a1 -= 1
+            b1 -= 1
+        if a1 < end_a:
+            stack.append((True, a1, end_a, b1, end_b))
+
+        if a0 == a1 or b0 == b1:
+            edits.append((False, a0, a1, b0, b1))
+            continue
+
+        split = _middle_snake(ia, ib, a0, a1, b0, b1, deadline)
+        if split is None:
+            timed_out = True
+            edits.append((False, a0, a1, b0, b1))
+            continue
+
+        x, y = split
+        stack.append((False, a0 + x, a1, b0 + y, b1))
+        stack.append((False, a0, a0 + x, b0, b0 + y))
+
+    return _merge(edits), timed_out
+
+
+def diff_texts(
+    a: str, b: str, granularity: str, timeout: float
+) -> tuple[list[str], list[str], list[tuple[str, int, int, int, int]], bool]:
+    """Tokenize and diff two texts.
+
+    Returns both token lists, the opcodes over them and whether the deadline
+    cut the search short.
+    """
+    deadline = time.monotonic() + timeout
+    a_lines = split_tokens(a, "line")
+    b_lines = split_tokens(b, "line")
+    line_opcodes, timed_out = diff_opcodes(a_lines, b_lines, deadline)
+    if granularity == "line":
+        return a_lines, b_lines, line_opcodes, timed_out
+
+    a_tokens: list[str] = []
+    b_tokens: list[str] = []
+    edits: list[tuple[bool, int, int, int, int]] = []
+    for tag, la0, la1, lb0, lb1 in line_opcodes:
+        a_start, b_start = len(a_tokens), len(b_tokens)
+        for line in a_lines[la0:la1]:
+            a_tokens.extend(split_tokens(line, granularity))
+        for line in b_lines[lb0:lb1]:
+            b_tokens.extend(split_tokens(line, granularity))
+
+        if tag != "replace":
+            edits.append(
+                (tag == "equal", a_start, len(a_tokens), b_start, len(b_tokens))
+            )
+            continue
+
+        block, block_timed_out = diff_opcodes(
+            a_tokens[a_start:], b_tokens[b_start:], deadline
+        )
+        timed_out = timed_out or block_timed_out
+        edits.extend(
+            (op == "equal", a_start + a0, a_start + a1, b_start + b0, b_start + b1)
+            for op, a0, a1, b0, b1 in block
+        )
+
+    return a_tokens, b_tokens, _merge(edits), timed_out
+
+
+def _merge(
+    edits: list[tuple[bool, int, int, int, int]],
+) -> list[tuple[str, int, int, int, int]]:
+    """Join adjacent edits into equal, delete, insert and replace opcodes."""
+    opcodes: list[tuple[str, int, int, int, int]] = []
+    pending: list[int] | None = None
+    for equal, a0, a1, b0, b1 in edits:
+        if a0 == a1 and b0 == b1:
+            continue
+        if equal:
+            if pending is not None:
+                opcodes.append(_change(*pending))
+                pending = None
+            if opcodes and opcodes[-1][0] == "equal":
+                _, pa0, _, pb0, _ = opcodes.pop()
+                a0, b0 = pa0, pb0
+            opcodes.append(("equal", a0, a1, b0, b1))
+        elif pending is None:
+            pending = [a0, a1, b0, b1]
+        else:
+            pending[1] = a1
+            pending[3] = b1
+    if pending is not None:
+        opcodes.append(_change(*pending))
+    return opcodes
+
+
+def _change(a0: int, a1: int, b0: int, b1: int) -> tuple[str, int, int, int, int]:
+    if a0 == a1:
+        return ("insert", a0, a1, b0, b1)
+    if b0 == b1:
+        return ("delete", a0, a1, b0, b1)
+    return ("replace", a0, a1, b0, b1)
+
+
+def _offsets(tokens: list[str]) -> list[int]:
+    """Character offset of every token, plus the total length."""
+    offsets = [0]
+    total = 0
+    for token in tokens:
+        total += len(token)
+        offsets.append(total)
+    return offsets
+
+
+def structured_hunks(
+    a: list[str], b: list[str], opcodes: list[tuple[str, int, int, int, int]]
+) -> list[dict[str, Any]]:
+    """Render the changes as hunks with character offsets into both texts."""
+    a_offsets = _offsets(a)
+    b_offsets = _offsets(b)
+    return [
+        {
+            "op": tag,
+            "a_start": a_offsets[a0],
+            "a_end": a_offsets[a1],
+            "b_start": b_offsets[b0],
+            "b_end": b_offsets[b1],
+            "removed": "".join(a[a0:a1]),
+            "inserted": "".join(b[b0:b1]),
+        }
+        for tag, a0, a1, b0, b1 in opcodes
+        if tag != "equal"
+    ]
+
+
+def _grouped(
+    opcodes: list[tuple[str, int, int, int, int]], context: int
+) -> list[list[tuple[str, int, int, int, int]]]:
+    """Group changes with up to ``context`` unchanged lines around each."""
+    groups: list[list[tuple[str, int, int, int, int]]] = []
+    group: list[tuple[str, int, int, int, int]] = []
+    for i, (tag, a0, a1, b0, b1) in enumerate(opcodes):
+        if tag != "equal":
+            group.append((tag, a0, a1, b0, b1))
+            continue
+        first = i == 0
+        last = i == len(opcodes) - 1
+        if not first and not last and a1 - a0 <= 2 * context:
+            group.append((tag, a0, a1, b0, b1))
+            continue
+        if not first:
+            group.append((tag, a0, min(a1, a0 + context), b0, min(b1, b0 + context)))
+            groups.append(group)
+        group = []
+        if not last:
+            group.append((tag, max(a0, a1 - context), a1, max(b0, b1 - context), b1))
+    if any(tag != "equal" for tag, *_ in group):
+        groups.append(group)
+    return groups
+
+
+def _range(start: int, length: int) -> str:
+    # Unified diffs number lines from 1; empty ranges name the line before
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+
+def _unified_line(prefix: str, line: str) -> str:
+    if line.endswith("\n"):
+        return prefix + line
+    return f"{prefix}{line}\n{NO_NEWLINE_MARKER}\n"
+
+
+def unified_diff(
+    a: list[str],
+    b: list[str],
+    opcodes: list[tuple[str, int, int, int, int]],
+    context: int = 3,
+    from_name: str = "original",
+    to_name: str = "modified",
+) -> str:
+    """Render line opcodes as a unified diff."""
+    groups = _grouped(opcodes, context)
+    if not groups:
+        return ""
+
+    out = [f"--- {from_name}\n", f"+++ {to_name}\n"]
+    for group in groups:
+        a0, b0 = group[0][1], group[0][3]
+        a1, b1 = group[-1][2], group[-1][4]
+        out.append(f"@@ -{_range(a0, a1 - a0)} +{_range(b0, b1 - b0)} @@\n")
+        for tag, ga0, ga1, gb0, gb1 in group:
+            if tag == "equal":
+                out.extend(_unified_line(" ", line) for line in a[ga0:ga1])
+                continue
+            out.extend(_unified_line("-", line) for line in a[ga0:ga1])
+            out.extend(_unified_line("+", line) for line in b[gb0:gb1])
+    return "".join(out)
+
+
+def apply_hunks(text: str, hunks: list[dict[str, Any]]) -> str:
+    """Apply structured hunks, checking the removed text of each one."""
+    parts = []
+    position = 0
+    for hunk in sorted(hunks, key=lambda h: h["a_start"]):
+        start = hunk["a_start"]
+        removed = hunk.get("removed", "")
+        end = hunk.get("a_end", start + len(removed))
+        if start < position or end > len(text):
+            raise PatchError(f"Hunk at offset {start} is out of range or overlaps")
+        if text[start:end] != removed:
+            raise PatchError(f"Hunk at offset {start} does not match the text")
+        parts.append(text[position:start])
+        parts.append(hunk.get("inserted", ""))
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def _parse_unified(patch: str) -> list[tuple[int, list[str], list[str]]]:
+    """Parse a unified diff into (start line, old lines, new lines) hunks.
+
+    Each hunk's body is read for exactly the line counts in its ``@@`` header,
+    so lines such as ``-- comment`` are content rather than file headers.
+    Anything between hunks, like ``---``/``+++`` headers, is skipped.
+    """
+    hunks: list[tuple[int, list[str], list[str]]] = []
+    old: list[str] = []
+    new: list[str] = []
+    old_left = new_left = 0
+    last: list[list[str]] = []
+    for line in split_tokens(patch, "line"):
+        header = _HUNK_HEADER.match(line)
+        if header:
+            old, new = [], []
+            start = int(header.group(1))
+            old_left = 1 if header.group(2) is None else int(header.group(2))
+            new_left = 1 if header.group(4) is None else int(header.group(4))
+            hunks.append((start - 1 if old_left else start, old, new))
+        elif line.startswith(NO_NEWLINE_MARKER):
+            for lines in last:
+                lines[-1] = lines[-1].rstrip("\n")
+        elif not old_left and not new_left:
+            continue
+        elif line[:1] in (" ", "\n", "-", "+"):
+            takes_old = line[:1] != "+"
+            takes_new = line[:1] != "-"
+            if (takes_old and not old_left) or (takes_new and not new_left):
+                raise PatchError(
+                    f"Hunk at line {hunks[-1][0] + 1} is longer than its header"
+                )
+            content = line if line[:1] == "\n" else line[1:]
+            last = []
+            if takes_old:
+                old.append(content)
+                old_left -= 1
+                last.append(old)
+            if takes_new:
+                new.append(content)
+                new_left -= 1
+                last.append(new)
+        else:
+            raise PatchError(f"Unexpected line in patch: {line[:40]!r}")
+    return hunks
+
+
+def apply_unified(text: str, patch: str) -> str:
+    """Apply a unified diff, checking every context and removed line."""
+    lines = split_tokens(text, "line")
+    out: list[str] = []
+    position = 0
+    for start, old, new in _parse_unified(patch):
+        if start < position or lines[start : start + len(old)] != old:
+            raise PatchError(f"Hunk at line {start + 1} does not match the text")
+        out.extend(lines[position:start])
+        out.extend(new)
+        position = start + len(old)
+    out.extend(lines[position:])
+    return "".join(out)
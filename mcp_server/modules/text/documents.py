@@ -0,0 +1,488 @@
+"""Incrementally maintained per-document analysis index.
+
+A ``DocumentIndex`` keeps the statistics reported by ``analyze_text`` together
+with sentence and line boundaries for a single named document. Appends and
+patches only rescan the text around the edited range (widened to the nearest
+word and sentence boundaries) and only rebuild the chunks of text holding it,
+so the cost of an update is proportional to the size of the change rather
+than the size of the document.
+"""
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from mcp_server.settings import Config as cfg
+from mcp_server.snapshot import store
+
+SENTENCE_TERMINATORS = ".!?"
+
+_SEGMENT_PATTERN = re.compile(r"[^.!?]+")
+
+# Documents are stored in chunks of at least this many characters
+CHUNK_SIZE = 16384
+
+
+def _char_counts(text: str) -> tuple[int, int, int, int]:
+    """Count letters, digits, whitespace and alphanumerics in ``text``."""
+    letters = digits = spaces = alnum = 0
+    for c in text:
+        if c.isalnum():
+            alnum += 1
+            if c.isalpha():
+                letters += 1
+            elif c.isdigit():
+                digits += 1
+        elif c.isspace():
+            spaces += 1
+    return letters, digits, spaces, alnum
+
+
+def _word_stats(text: str) -> tuple[int, int]:
+    """Return the number of words and their combined length."""
+    words = text.split()
+    return len(words), sum(len(word) for word in words)
+
+
+def _sentence_segments(text: str, offset: int) -> tuple[list[int], list[int]]:
+    """Return start and end offsets of the non-blank sentences in ``text``."""
+    starts: list[int] = []
+    ends: list[int] = []
+    for match in _SEGMENT_PATTERN.finditer(text):
+        if match.group().strip():
+            starts.append(match.start() + offset)
+            ends.append(match.end() + offset)
+    return starts, ends
+
+
+def _ints(data: bytes) -> array:
+    """Decode offsets stored with ``array("q").tobytes()``."""
+    values = array("q")
+    values.frombytes(data)
+    return values
+
+
+def _newlines(text: str, offset: int) -> list[int]:
+    """Return the offsets of the newlines in ``text``."""
+    positions = []
+    pos = text.find("\n")
+    while pos != -1:
+        positions.append(pos + offset)
+        pos = text.find("\n", pos + 1)
+    return positions
+
+
+class _Chunk:
+    """A run of document text and the boundaries that fall inside it.
+
+    Boundaries are offsets relative to the start of the chunk. Sentences are
+    stored by their first and last character, so each boundary lies in the
+    chunk holding the character it refers to.
+    """
+
+    __slots__ = ("lasts", "newlines", "starts", "text")
+
+    # Offset arrays, in the order the constructor takes them
+    OFFSETS = ("starts", "lasts", "newlines")
+
+    def __init__(self, text: str, starts: array, lasts: array, newlines: array) -> None:
+        self.text = text
+        self.starts = starts
+        self.lasts = lasts
+        self.newlines = newlines
+
+
+def _shift(values: array, delta: int) -> array:
+    return array("q", [value + delta for value in values]) if delta else values
+
+
+def _window(values: array, lo: int, hi: int) -> array:
+    """The offsets in ``lo:hi``, made relative to ``lo``."""
+    return _shift(values[bisect_left(values, lo) : bisect_left(values, hi)], -lo)
+
+
+def _replace(
+    values: array, start: int, end: int, replacement: list[int], delta: int
+) -> None:
+    """Replace the offsets in ``start:end`` and shift the ones after it."""
+    lo = bisect_left(values, start)
+    hi = bisect_left(values, end)
+    tail = _shift(values[hi:], delta)
+    values[lo:] = array("q", replacement)
+    values.extend(tail)
+
+
+def _split(chunk: _Chunk) -> list[_Chunk]:
+    """Cut a chunk into chunks of ``CHUNK_SIZE`` to ``2 * CHUNK_SIZE``."""
+    text = chunk.text
+    count = max(len(text) // CHUNK_SIZE, 1)
+    if count == 1:
+        return [chunk]
+    size = -(-len(text) // count)
+    chunks = []
+    for i in range(count):
+        lo = i * size
+        hi = len(text) if i == count - 1 else lo + size
+        chunks.append(
+            _Chunk(
+                text[lo:hi],
+                _window(chunk.starts, lo, hi),
+                _window(chunk.lasts, lo, hi),
+                _window(chunk.newlines, lo, hi),
+            )
+        )
+    return chunks
+
+
+class DocumentIndex:
+    """Text plus incrementally maintained statistics and boundaries.
+
+    The text is held in chunks of ``CHUNK_SIZE`` to ``2 * CHUNK_SIZE``
+    characters, each with the sentence and line boundaries inside it. A
+    patch edits only the chunks covering the rescanned region; offsets in
+    later chunks are relative to their chunk, so they are left untouched and
+    only the per-chunk running totals are updated.
+    """
+
+    def __init__(self, text: str = "") -> None:
+        self.version = 0
+        self.letters = self.digits = self.spaces = self.alnum = 0
+        self.word_count = 0
+        self.word_chars = 0
+        # Sentences are raw segments between terminator runs; only segments
+        # containing non-whitespace are kept.
+        self._chunks = [_Chunk("", array("q"), array("q"), array("q"))]
+        # Running totals before each chunk, with the overall total last
+        self._offsets = [0, 0]
+        self._start_counts = [0, 0]
+        self._last_counts = [0, 0]
+        self._newline_counts = [0, 0]
+        if text:
+            self.append(text)
+
+    @property
+    def text(self) -> str:
+        return "".join(chunk.text for chunk in self._chunks)
+
+    def state(self) -> tuple:
+        """Text, statistics and boundaries in a form ``marshal`` can store."""
+        starts, ends, line_starts = array("q"), array("q"), array("q", [0])
+        for offset, chunk in zip(self._offsets, self._chunks):
+            starts.extend(start + offset for start in chunk.starts)
+            ends.extend(last + offset + 1 for last in chunk.lasts)
+            line_starts.extend(newline + offset + 1 for newline in chunk.newlines)
+        return (
+            self.text,
+            self.version,
+            self.letters,
+            self.digits,
+            self.spaces,
+            self.alnum,
+            self.word_count,
+            self.word_chars,
+            starts.tobytes(),
+            ends.tobytes(),
+            line_starts.tobytes(),
+        )
+
+    @classmethod
+    def from_state(cls, state: tuple) -> "DocumentIndex":
+        """Rebuild a document from ``state()`` without rescanning its text."""
+        document = cls()
+        (
+            text,
+            document.version,
+            document.letters,
+            document.digits,
+            document.spaces,
+            document.alnum,
+            document.word_count,
+            document.word_chars,
+            sentence_starts,
+            sentence_ends,
+            line_starts,
+        ) = state
+        chunk = _Chunk(
+            text,
+            _ints(sentence_starts),
+            _shift(_ints(sentence_ends), -1),
+            _shift(_ints(line_starts)[1:], -1),
+        )
+        document._chunks = _split(chunk)
+        document._recount(0, 0, len(document._chunks))
+        return document
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    def _recount(self, first: int, last: int, count: int) -> None:
+        """Update running totals after chunks ``first:last + 1`` became ``count``."""
+        totals = (
+            (self._offsets, lambda chunk: len(chunk.text)),
+            (self._start_counts, lambda chunk: len(chunk.starts)),
+            (self._last_counts, lambda chunk: len(chunk.lasts)),
+            (self._newline_counts, lambda chunk: len(chunk.newlines)),
+        )
+        for total, size in totals:
+            running = total[first]
+            rebuilt = []
+            for chunk in self._chunks[first : first + count]:
+                running += size(chunk)
+                rebuilt.append(running)
+            delta = running - total[last + 1]
+            tail = total[last + 2 :]
+            total[first + 1 :] = rebuilt + (
+                [t + delta for t in tail] if delta else tail
+            )
+
+    def _chunk_at(self, position: int) -> int:
+        """Index of the chunk holding ``position`` (the last one at the end)."""
+        return min(bisect_right(self._offsets, position), len(self._chunks)) - 1
+
+    def _slice(self, start: int, end: int) -> str:
+        """Return ``self.text[start:end]`` for ``start <= end``."""
+        k = self._chunk_at(start)
+        parts = []
+        while start < end:
+            offset = self._offsets[k]
+            parts.append(self._chunks[k].text[start - offset : end - offset])
+            start = self._offsets[k + 1]
+            k += 1
+        return "".join(parts)
+
+    def _nth(self, counts: list[int], name: str, index: int) -> int:
+        """Document offset of boundary ``index`` of kind ``name``."""
+        k = bisect_right(counts, index) - 1
+        return getattr(self._chunks[k], name)[index - counts[k]] + self._offsets[k]
+
+    def _rank(self, counts: list[int], name: str, position: int) -> int:
+        """Number of boundaries of kind ``name`` at or before ``position``."""
+        k = self._chunk_at(position)
+        local = bisect_right(
+            getattr(self._chunks[k], name), position - self._offsets[k]
+        )
+        return counts[k] + local
+
+    def append(self, text: str) -> None:
+        """Append ``text`` to the end of the document."""
+        end = len(self)
+        self.patch(end, end, text)
+
+    def patch(self, start: int, end: int, text: str) -> None:
+        """Replace ``self.text[start:end]`` with ``text``."""
+        length = len(self)
+        if not 0 <= start <= end <= length:
+            raise ValueError(
+                f"Invalid range {start}:{end} for document of length {length}"
+            )
+
+        delta = len(text) - (end - start)
+        word_start, word_end = self._word_region(start, end)
+        sent_start, sent_end = self._sentence_region(start, end)
+
+        # Edit only the chunks covering the rescanned region, plus a
+        # neighbour when they would otherwise shrink below half a chunk
+        lo = min(word_start, sent_start)
+        hi = max(word_end, sent_end)
+        first = self._chunk_at(lo)
+        last = self._chunk_at(max(hi - 1, lo))
+        if self._offsets[last + 1] - self._offsets[first] + delta < CHUNK_SIZE // 2:
+            if last + 1 < len(self._chunks):
+                last += 1
+            elif first > 0:
+                first -= 1
+        base = self._offsets[first]
+        if first == last:
+            piece = self._chunks[first]
+        else:
+            chunks = list(zip(self._offsets[first:], self._chunks[first : last + 1]))
+            piece = _Chunk(
+                "".join(chunk.text for _, chunk in chunks),
+                *(
+                    array(
+                        "q",
+                        [
+                            value + offset - base
+                            for offset, chunk in chunks
+                            for value in getattr(chunk, name)
+                        ],
+                    )
+                    for name in _Chunk.OFFSETS
+                ),
+            )
+
+        old = piece.text
+        start, end = start - base, end - base
+        new = old[:start] + text + old[end:]
+
+        # Character classes only depend on the replaced characters
+        removed = _char_counts(old[start:end])
+        added = _char_counts(text)
+        self.letters += added[0] - removed[0]
+        self.digits += added[1] - removed[1]
+        self.spaces += added[2] - removed[2]
+        self.alnum += added[3] - removed[3]
+
+        # Word regions start and end on whitespace, so counts are additive
+        word_start, word_end = word_start - base, word_end - base
+        old_words = _word_stats(old[word_start:word_end])
+        new_words = _word_stats(new[word_start : word_end + delta])
+        self.word_count += new_words[0] - old_words[0]
+        self.word_chars += new_words[1] - old_words[1]
+
+        # Sentence regions start after and end on a terminator
+        sent_start, sent_end = sent_start - base, sent_end - base
+        starts, ends = _sentence_segments(
+            new[sent_start : sent_end + delta], sent_start
+        )
+        _replace(piece.starts, sent_start, sent_end, starts, delta)
+        lasts = [e - 1 for e in ends]
+        _replace(piece.lasts, sent_start, sent_end, lasts, delta)
+
+        # Lines end at each newline in the replaced range
+        _replace(piece.newlines, start, end, _newlines(text, start), delta)
+
+        piece.text = new
+        rebuilt = _split(piece)
+        self._chunks[first : last + 1] = rebuilt
+        self._recount(first, last, len(rebuilt))
+        self.version += 1
+
+    def _word_region(self, start: int, end: int) -> tuple[int, int]:
+        """Widen ``start:end`` to whitespace (or document) boundaries."""
+        while start > 0:
+            k = self._chunk_at(start - 1)
+            text = self._chunks[k].text
+            i = start - 1 - self._offsets[k]
+            while i >= 0 and not text[i].isspace():
+                i -= 1
+            start = self._offsets[k] + i + 1
+            if i >= 0:
+                break
+        while end < len(self):
+            k = self._chunk_at(end)
+            text = self._chunks[k].text
+            i = end - self._offsets[k]
+            while i < len(text) and not text[i].isspace():
+                i += 1
+            end = self._offsets[k] + i
+            if i < len(text):
+                break
+        return start, end
+
+    def _sentence_region(self, start: int, end: int) -> tuple[int, int]:
+        """Widen ``start:end`` to the surrounding sentence terminators.
+
+        The returned start follows a terminator (or is 0) and the returned
+        end is a terminator position (or the document length). Known sentence
+        starts bound the scan so only the affected sentences are searched.
+        """
+        i = self._rank(self._start_counts, "starts", start)
+        floor = self._nth(self._start_counts, "starts", i - 1) if i else 0
+        before = self._slice(floor, start)
+        region_start = max(before.rfind(c) for c in SENTENCE_TERMINATORS)
+        region_start = floor + region_start + 1 if region_start != -1 else floor
+
+        i = self._rank(self._start_counts, "starts", end)
+        ceiling = (
+            self._nth(self._start_counts, "starts", i)
+            if i < self.sentence_count
+            else len(self)
+        )
+        after = self._slice(end, ceiling)
+        found = [
+            pos for pos in (after.find(c) for c in SENTENCE_TERMINATORS) if pos != -1
+        ]
+        region_end = end + min(found) if found else len(self)
+        return region_start, region_end
+
+    @property
+    def sentence_count(self) -> int:
+        return self._start_counts[-1]
+
+    @property
+    def line_count(self) -> int:
+        return self._newline_counts[-1] + 1 if len(self) else 0
+
+    def sentence(self, index: int) -> str:
+        """Return the sentence at ``index`` with surrounding whitespace removed."""
+        start = self._nth(self._start_counts, "starts", index)
+        last = self._nth(self._last_counts, "lasts", index)
+        return self._slice(start, last + 1).strip()
+
+    def line(self, index: int) -> str:
+        """Return the line at ``index`` without its trailing newline."""
+        counts = self._newline_counts
+        start = self._nth(counts, "newlines", index - 1) + 1 if index else 0
+        if index < counts[-1]:
+            return self._slice(start, self._nth(counts, "newlines", index))
+        return self._slice(start, len(self))
+
+    def analysis(self) -> dict:
+        """Return statistics in the same shape as ``analyze_text``."""
+        total = len(self)
+        return {
+            "word_count": self.word_count,
+            "sentence_count": self.sentence_count,
+            "line_count": self.line_count,
+            "character_counts": {
+                "total": total,
+                "letters": self.letters,
+                "digits": self.digits,
+                "spaces": self.spaces,
+                "punctuation": total - self.alnum - self.spaces,
+            },
+            "average_word_length": self.word_chars / self.word_count
+            if self.word_count
+            else 0,
+            "average_sentence_length": self.word_count / self.sentence_count
+            if self.sentence_count
+            else 0,
+        }
+
+
+SNAPSHOT_SECTION = "text.documents"
+# Bump when ``state()`` changes layout
+SNAPSHOT_SCHEMA = 1
+
+# Named documents, least recently used first
+_documents: OrderedDict[str, DocumentIndex] = OrderedDict()
+
+
+def get_document(document_id: str, create: bool = False) -> DocumentIndex | None:
+    """Look up a document by id, optionally creating it.
+
+    Documents missing from memory are restored from the warm-start snapshot
+    when it has them. Adding a document beyond ``TEXT_MAX_DOCUMENTS`` evicts
+    the least recently used one.
+    """
+    document = _documents.get(document_id)
+    if document is not None:
+        _documents.move_to_end(document_id)
+        return document
+
+    document = store.take(SNAPSHOT_SECTION, document_id, DocumentIndex.from_state)
+    if document is None:
+        if not create:
+            return None
+        document = DocumentIndex()
+
+    _documents[document_id] = document
+    while len(_documents) > cfg.TEXT_MAX_DOCUMENTS:
+        _documents.popitem(last=False)
+    return document
+
+
+def delete_document(document_id: str) -> bool:
+    """Remove a document, returning whether it existed."""
+    existed = _documents.pop(document_id, None) is not None
+    return store.discard(SNAPSHOT_SECTION, document_id) or existed
+
+
+store.register(
+    SNAPSHOT_SECTION,
+    lambda: [(name, document.state()) for name, document in _documents.items()],
+    limit=cfg.TEXT_MAX_DOCUMENTS,
+    schema=SNAPSHOT_SCHEMA,
+)
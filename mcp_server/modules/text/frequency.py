@@ -0,0 +1,337 @@
+"""Streaming word and n-gram frequency counting.
+
+Text is tokenized lazily and every n-gram size is counted in the same single
+pass, so memory grows with the vocabulary rather than the input. N-grams are
+taken from the full token stream, so they keep the stopwords inside them;
+only n-grams made up entirely of stopwords are skipped. Counts are
+exact until a size's vocabulary exceeds ``TEXT_FREQUENCY_MAX_VOCABULARY``
+distinct terms; from then on that size is counted with a count-min sketch,
+and a bounded heap tracks the current top-k candidates by their estimated
+counts. Sketch estimates never undercount and overcount by at most
+``error_bound`` with high probability.
+"""
+
+import heapq
+import math
+import re
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+
+from mcp_server.settings import Config as cfg
+
+# Count-min sketch dimensions: error bound e/width of the total, with
+# probability 1 - exp(-depth)
+SKETCH_WIDTH_BITS = 16
+SKETCH_DEPTH = 4
+
+# Odd multipliers giving each sketch row an independent multiply-shift hash
+_ROW_MULTIPLIERS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+    0xD6E8FEB86659FD93,
+)
+_MASK64 = (1 << 64) - 1
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+ENGLISH_STOPWORDS = frozenset(
+    [
+        "a",
+        "about",
+        "above",
+        "after",
+        "again",
+        "against",
+        "all",
+        "am",
+        "an",
+        "and",
+        "any",
+        "are",
+        "as",
+        "at",
+        "be",
+        "because",
+        "been",
+        "before",
+        "being",
+        "below",
+        "between",
+        "both",
+        "but",
+        "by",
+        "can",
+        "could",
+        "did",
+        "do",
+        "does",
+        "doing",
+        "down",
+        "during",
+        "each",
+        "few",
+        "for",
+        "from",
+        "further",
+        "had",
+        "has",
+        "have",
+        "having",
+        "he",
+        "her",
+        "here",
+        "hers",
+        "herself",
+        "him",
+        "himself",
+        "his",
+        "how",
+        "i",
+        "if",
+        "in",
+        "into",
+        "is",
+        "it",
+        "its",
+        "itself",
+        "just",
+        "me",
+        "more",
+        "most",
+        "my",
+        "myself",
+        "no",
+        "nor",
+        "not",
+        "now",
+        "of",
+        "off",
+        "on",
+        "once",
+        "only",
+        "or",
+        "other",
+        "our",
+        "ours",
+        "ourselves",
+        "out",
+        "over",
+        "own",
+        "same",
+        "she",
+        "should",
+        "so",
+        "some",
+        "such",
+        "than",
+        "that",
+        "the",
+        "their",
+        "theirs",
+        "them",
+        "themselves",
+        "then",
+        "there",
+        "these",
+        "they",
+        "this",
+        "those",
+        "through",
+        "to",
+        "too",
+        "under",
+        "until",
+        "up",
+        "very",
+        "was",
+        "we",
+        "were",
+        "what",
+        "when",
+        "where",
+        "which",
+        "while",
+        "who",
+        "whom",
+        "why",
+        "will",
+        "with",
+        "would",
+        "you",
+        "your",
+        "yours",
+        "yourself",
+        "yourselves",
+    ]
+)
+
+STOPWORD_LISTS = {
+    "none": frozenset(),
+    "english": ENGLISH_STOPWORDS,
+}
+
+
+def iter_tokens(text: str, case_fold: bool = True) -> Iterator[str]:
+    """Yield word tokens one at a time."""
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        yield token.casefold() if case_fold else token
+
+
+class CountMinSketch:
+    """Fixed-size frequency sketch; estimates never undercount."""
+
+    def __init__(
+        self, width_bits: int = SKETCH_WIDTH_BITS, depth: int = SKETCH_DEPTH
+    ) -> None:
+        self.width = 1 << width_bits
+        self.shift = 64 - width_bits
+        self.multipliers = _ROW_MULTIPLIERS[:depth]
+        self.rows = [array("Q", bytes(8 * self.width)) for _ in self.multipliers]
+        self.total = 0
+
+    def add(self, term: str, count: int = 1) -> int:
+        """Add ``count`` occurrences of ``term`` and return its new estimate."""
+        self.total += count
+        h = hash(term) & _MASK64
+        shift = self.shift
+        estimate = _MASK64
+        for multiplier, row in zip(self.multipliers, self.rows, strict=True):
+            i = ((h * multiplier) & _MASK64) >> shift
+            value = row[i] + count
+            row[i] = value
+            estimate = min(estimate, value)
+        return estimate
+
+    @property
+    def error_bound(self) -> int:
+        return math.ceil(math.e / self.width * self.total)
+
+
+class TopK:
+    """The ``k`` terms with the highest counts seen so far.
+
+    Counts only ever grow, so a term displaced from the top-k can re-enter
+    once its count exceeds the current minimum. The heap is invalidated lazily:
+    entries whose count no longer matches ``counts`` are skipped and the heap
+    is rebuilt once stale entries dominate it.
+    """
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self.counts: dict[str, int] = {}
+        self._heap: list[tuple[int, str]] = []
+
+    def offer(self, term: str, count: int) -> None:
+        if term in self.counts or len(self.counts) < self.k:
+            self.counts[term] = count
+        elif count > self._min():
+            _, evicted = heapq.heappop(self._heap)
+            del self.counts[evicted]
+            self.counts[term] = count
+        else:
+            return
+
+        heapq.heappush(self._heap, (count, term))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(c, t) for t, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _min(self) -> int:
+        heap = self._heap
+        while self.counts.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0]
+
+    def items(self) -> list[tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+class NgramCounter:
+    """Counts n-grams of one size, switching to a sketch for large vocabularies."""
+
+    def __init__(self, n: int, k: int, max_vocabulary: int) -> None:
+        self.n = n
+        self.k = k
+        self.max_vocabulary = max_vocabulary
+        self.total = 0
+        self.counts: dict[str, int] | None = {}
+        self.sketch: CountMinSketch | None = None
+        self.top: TopK | None = None
+
+    def add(self, term: str) -> None:
+        self.total += 1
+        if self.counts is not None:
+            self.counts[term] = self.counts.get(term, 0) + 1
+            if len(self.counts) > self.max_vocabulary:
+                self._switch_to_sketch()
+        else:
+            assert self.sketch is not None and self.top is not None
+            self.top.offer(term, self.sketch.add(term))
+
+    def _switch_to_sketch(self) -> None:
+        assert self.counts is not None
+        self.sketch = CountMinSketch()
+        self.top = TopK(self.k)
+        for term, count in self.counts.items():
+            self.top.offer(term, self.sketch.add(term, count))
+        self.counts = None
+
+    def report(self) -> dict:
+        if self.counts is not None:
+            top = heapq.nsmallest(
+                self.k, self.counts.items(), key=lambda item: (-item[1], item[0])
+            )
+            return {
+                "total": self.total,
+                "distinct": len(self.counts),
+                "exact": True,
+                "top": [{"term": term, "count": count} for term, count in top],
+            }
+
+        assert self.sketch is not None and self.top is not None
+        return {
+            "total": self.total,
+            "distinct": None,
+            "exact": False,
+            "error_bound": self.sketch.error_bound,
+            "top": [{"term": term, "count": count} for term, count in self.top.items()],
+        }
+
+
+def count_ngrams(
+    tokens: Iterable[str],
+    sizes: Iterable[int],
+    k: int,
+    max_vocabulary: int | None = None,
+    stopwords: frozenset[str] = frozenset(),
+) -> dict[int, dict]:
+    """Count every requested n-gram size over ``tokens`` in a single pass.
+
+    Stopwords are matched against each token in lower case, and n-grams
+    consisting only of stopwords are not counted.
+    """
+    if max_vocabulary is None:
+        max_vocabulary = cfg.TEXT_FREQUENCY_MAX_VOCABULARY
+    counters = [NgramCounter(n, k, max_vocabulary) for n in sorted(set(sizes))]
+    window: deque[str] = deque(maxlen=max(c.n for c in counters))
+    # Number of stopwords at the end of the window
+    trailing_stopwords = 0
+
+    for token in tokens:
+        window.append(token)
+        if token.lower() in stopwords:
+            trailing_stopwords += 1
+        else:
+            trailing_stopwords = 0
+        for counter in counters:
+            if len(window) < counter.n or trailing_stopwords >= counter.n:
+                continue
+            if counter.n == 1:
+                counter.add(token)
+            else:
+                counter.add(" ".join(list(window)[-counter.n :]))
+
+    return {counter.n: counter.report() for counter in counters}
@@ -1,6 +1,9 @@
 """Helper functions for text processing operations."""
 
 import re
+from typing import Any
+
+from mcp_server.settings import Config as cfg
 
 
 def to_camel_case(text: str) -> str:
@@ -38,3 +41,19 @@ def to_kebab_case(text: str) -> str:
 def to_constant_case(text: str) -> str:
     """Convert text to CONSTANT_CASE."""
     return to_snake_case(text).upper()
+
+
+def compact_response(
+    result: dict[str, Any], compact: bool | None, *echoes: str
+) -> dict[str, Any]:
+    """Drop echoed input and options from a result in compact mode.
+
+    ``compact`` overrides the server-wide ``COMPACT_RESPONSES`` setting when
+    given, so callers can opt in or out per call.
+    """
+    if compact is None:
+        compact = cfg.COMPACT_RESPONSES
+    if compact:
+        for key in echoes:
+            result.pop(key, None)
+    return result
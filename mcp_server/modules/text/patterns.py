@@ -0,0 +1,388 @@
+"""Built-in and caller-supplied extraction patterns.
+
+Custom patterns are compiled once and kept in a bounded LRU cache keyed by
+pattern text and flags. CPython's regex engine cannot be interrupted, so
+patterns prone to catastrophic backtracking are rejected before they are
+compiled. Only exponential shapes are rejected, meaning a pattern where:
+
+- a long repeat is nested in another repeat and can run into what follows
+  it there, such as ``(a+)+``, ``(\\w+\\s?)*`` or ``(?:x.*){10}``;
+- a long repeat repeats a group that can match the same text in several
+  ways, such as ``(a|aa)+`` or ``(a{1,2})*``; or
+- bounded repeats and overlapping alternatives multiply into more than
+  ``MAX_BACKTRACKING_WAYS`` ways to split a match, such as ``(a{1,50}){1,50}``.
+
+Possessive repeats and atomic groups never backtrack, so they can be used to
+express such patterns safely, e.g. ``(?:\\w+\\s?)*+``. Repeats that merely
+compete for the same characters in a sequence, such as ``\\d*\\d*`` or
+``.*a.*b``, take polynomial time on large texts; extract_patterns bounds them
+by running custom patterns in a worker process with a deadline.
+
+Large extractions are paged with ``iter_matches``, which runs each pattern's
+``finditer`` in turn and so never materializes more matches than a page.
+A cursor records the pattern and text position to resume from, plus a
+fingerprint of the text and patterns it was issued for.
+"""
+
+import base64
+import functools
+import json
+import math
+import re
+import re._constants as sre_constants  # type: ignore[import-not-found]
+import re._parser as sre_parse  # type: ignore[import-not-found]
+import string
+import zlib
+from collections.abc import Iterator
+from typing import Any
+
+from mcp_server.settings import Config as cfg
+
+BUILTIN_PATTERNS = {
+    "email": re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"),
+    "url": re.compile(
+        r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
+    ),
+    "phone": re.compile(
+        r"(\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})"
+    ),
+    "hashtag": re.compile(r"#\w+"),
+    "mention": re.compile(r"@\w+"),
+    "ip": re.compile(r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b"),
+}
+
+PATTERN_FLAGS = {
+    "ignorecase": re.IGNORECASE,
+    "multiline": re.MULTILINE,
+    "dotall": re.DOTALL,
+    "ascii": re.ASCII,
+}
+
+# Repeats spanning more iterations than this are treated like unbounded ones
+MAX_BOUNDED_REPEAT = 100
+
+# Most ways bounded repeats and alternations may split a match
+MAX_BACKTRACKING_WAYS = 10_000
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+_CHARACTERS = (
+    sre_constants.LITERAL,
+    sre_constants.NOT_LITERAL,
+    sre_constants.ANY,
+    sre_constants.IN,
+)
+_ZERO_WIDTH = (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: re.compile(r"\d"),
+    sre_constants.CATEGORY_NOT_DIGIT: re.compile(r"\D"),
+    sre_constants.CATEGORY_SPACE: re.compile(r"\s"),
+    sre_constants.CATEGORY_NOT_SPACE: re.compile(r"\S"),
+    sre_constants.CATEGORY_WORD: re.compile(r"\w"),
+    sre_constants.CATEGORY_NOT_WORD: re.compile(r"\W"),
+}
+
+# Characters probed to decide whether two character sets overlap
+_PROBES = string.printable + "\u00a0\u00df\u00e9\u0663\u2028\u4e2d"
+
+
+class UnsafePatternError(ValueError):
+    """A pattern is likely to backtrack catastrophically."""
+
+
+def parse_flags(names: list[str] | None) -> int:
+    """Combine flag names into ``re`` flags."""
+    flags = 0
+    for name in names or []:
+        key = name.lower().strip()
+        if key not in PATTERN_FLAGS:
+            raise ValueError(
+                f"Unsupported flag: {name}. Available: {', '.join(PATTERN_FLAGS.keys())}"
+            )
+        flags |= PATTERN_FLAGS[key]
+    return flags
+
+
+def _matches(item: Any, char: str) -> bool:
+    op, av = item
+    if op == sre_constants.LITERAL:
+        return ord(char) == av
+    if op == sre_constants.NOT_LITERAL:
+        return ord(char) != av
+    if op == sre_constants.ANY:
+        return True
+    matched = False
+    negated = False
+    for member_op, member in av:
+        if member_op == sre_constants.NEGATE:
+            negated = True
+        elif member_op == sre_constants.LITERAL:
+            matched = matched or ord(char) == member
+        elif member_op == sre_constants.RANGE:
+            matched = matched or member[0] <= ord(char) <= member[1]
+        elif member_op == sre_constants.CATEGORY and member in _CATEGORIES:
+            matched = matched or bool(_CATEGORIES[member].match(char))
+        else:
+            # Unknown members are assumed to match anything
+            return True
+    return matched != negated
+
+
+def _overlap(first: Any | None, second: Any | None, ignore_case: bool) -> bool:
+    """Whether two character items can match the same character.
+
+    Unknown items (None) are assumed to overlap with everything.
+    """
+    if first is None or second is None:
+        return True
+    for probe in _PROBES:
+        chars = {probe, probe.swapcase()} if ignore_case else {probe}
+        if any(_matches(first, c) for c in chars) and any(
+            _matches(second, c) for c in chars
+        ):
+            return True
+    return False
+
+
+def _is_long(low: int, high: int) -> bool:
+    return high == sre_constants.MAXREPEAT or high - low > MAX_BOUNDED_REPEAT
+
+
+def _power(base: float, exponent: float) -> float:
+    if base <= 1:
+        return 1
+    try:
+        return base**exponent
+    except OverflowError:
+        return math.inf
+
+
+def _characters(items: Any) -> list[Any | None]:
+    """Every character item a sequence can consume; None for unknown items."""
+    characters: list[Any | None] = []
+    for op, av in items:
+        if op in _CHARACTERS:
+            characters.append((op, av))
+        elif op in _REPEATS or op == sre_constants.POSSESSIVE_REPEAT:
+            characters += _characters(av[2])
+        elif op == sre_constants.SUBPATTERN:
+            characters += _characters(av[3])
+        elif op == sre_constants.ATOMIC_GROUP:
+            characters += _characters(av)
+        elif op == sre_constants.BRANCH:
+            for branch in av[1]:
+                characters += _characters(branch)
+        elif op == sre_constants.GROUPREF_EXISTS:
+            for branch in av[1:]:
+                if branch is not None:
+                    characters += _characters(branch)
+        elif op not in _ZERO_WIDTH:
+            characters.append(None)
+    return characters
+
+
+def _nullable(items: Any) -> bool:
+    """Whether a sequence can match the empty string."""
+    for op, av in items:
+        if op in _CHARACTERS:
+            return False
+        if op in _REPEATS or op == sre_constants.POSSESSIVE_REPEAT:
+            if av[0] > 0 and not _nullable(av[2]):
+                return False
+        elif op == sre_constants.SUBPATTERN:
+            if not _nullable(av[3]):
+                return False
+        elif op == sre_constants.ATOMIC_GROUP:
+            if not _nullable(av):
+                return False
+        elif op == sre_constants.BRANCH and not any(
+            _nullable(branch) for branch in av[1]
+        ):
+            return False
+    return True
+
+
+def _firsts(items: Any, follow: list[Any | None]) -> list[Any | None]:
+    """The character items that can start a sequence followed by ``follow``."""
+    firsts: list[Any | None] = []
+    for index, (op, av) in enumerate(items):
+        if op in _CHARACTERS:
+            return firsts + [(op, av)]
+        if op in _ZERO_WIDTH:
+            continue
+        if op in _REPEATS or op == sre_constants.POSSESSIVE_REPEAT:
+            body = [av[2]]
+        elif op == sre_constants.SUBPATTERN:
+            body = [av[3]]
+        elif op == sre_constants.ATOMIC_GROUP:
+            body = [av]
+        elif op == sre_constants.BRANCH:
+            body = av[1]
+        elif op == sre_constants.GROUPREF_EXISTS:
+            body = [branch or [] for branch in av[1:]]
+        else:
+            return firsts + [None]
+        for branch in body:
+            firsts += _firsts(branch, [])
+        if not _nullable([(op, av)]):
+            return firsts
+    return firsts + follow
+
+
+def _overlaps(
+    first: list[Any | None], second: list[Any | None], ignore_case: bool
+) -> bool:
+    return any(_overlap(a, b, ignore_case) for a in first for b in second)
+
+
+def _ways(
+    items: Any, follow: list[Any | None], iterating: bool, ignore_case: bool
+) -> float:
+    """Estimate the ways a sequence can split the text it matches.
+
+    ``follow`` holds the characters that can come after the sequence. A
+    repeat that can consume what follows it has a choice of where to stop.
+    Bounded repeats and overlapping alternatives with such choices multiply
+    the ways a failing match is retried. A single long repeat only adds
+    polynomial work, which the extraction deadline bounds, unless it sits in
+    a repeat that iterates (``iterating``) or repeats a body that can itself
+    match in several ways; both are exponential.
+    """
+    total: float = 1
+    for index, (op, av) in enumerate(items):
+        after = _firsts(items[index + 1 :], follow)
+        if op in _REPEATS:
+            low, high, body = av
+            stops = _overlaps(_characters(body), after, ignore_case)
+            # An iterating body runs into its own next iteration
+            body_follow = _firsts(body, []) if high > 1 else after
+            body_ways = _ways(body, body_follow, iterating or high > 1, ignore_case)
+            if _is_long(low, high):
+                if iterating and stops:
+                    raise UnsafePatternError(
+                        "Nested repeats can backtrack catastrophically"
+                    )
+                if body_ways > 1:
+                    raise UnsafePatternError(
+                        "Repeating a group that matches the same text in several ways can backtrack catastrophically"
+                    )
+            else:
+                choices = high - low + 1 if stops else 1
+                total *= choices * _power(body_ways, high)
+        elif op in (sre_constants.POSSESSIVE_REPEAT, sre_constants.ATOMIC_GROUP):
+            # Never backtracks into its body, so only the body itself matters
+            body = av[2] if op == sre_constants.POSSESSIVE_REPEAT else av
+            _check(body, ignore_case)
+        elif op == sre_constants.BRANCH:
+            branches = av[1]
+            firsts = [_firsts(branch, after) for branch in branches]
+            ambiguous = any(
+                _overlaps(firsts[i], firsts[j], ignore_case)
+                for i in range(len(firsts))
+                for j in range(i + 1, len(firsts))
+            )
+            ways = [_ways(branch, after, iterating, ignore_case) for branch in branches]
+            total *= sum(ways) if ambiguous else max(ways)
+        elif op == sre_constants.SUBPATTERN:
+            total *= _ways(av[3], after, iterating, ignore_case)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            _check(av[1], ignore_case)
+        elif op == sre_constants.GROUPREF_EXISTS:
+            total *= max(
+                _ways(branch, after, iterating, ignore_case)
+                for branch in av[1:]
+                if branch is not None
+            )
+    return total
+
+
+def _check(items: Any, ignore_case: bool) -> None:
+    if _ways(items, [], False, ignore_case) > MAX_BACKTRACKING_WAYS:
+        raise UnsafePatternError(
+            f"Pattern can backtrack in more than {MAX_BACKTRACKING_WAYS} ways"
+        )
+
+
+def check_pattern(pattern: str, flags: int = 0) -> None:
+    """Raise ``UnsafePatternError`` for patterns prone to catastrophic backtracking."""
+    if len(pattern) > cfg.TEXT_MAX_PATTERN_LENGTH:
+        raise UnsafePatternError(
+            f"Pattern is longer than {cfg.TEXT_MAX_PATTERN_LENGTH} characters"
+        )
+    parsed = sre_parse.parse(pattern, flags)
+    ignore_case = bool((flags | parsed.state.flags) & re.IGNORECASE)
+    _check(parsed, ignore_case)
+
+
+@functools.lru_cache(maxsize=cfg.TEXT_PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern[str]:
+    """Check and compile a custom pattern, caching the result."""
+    check_pattern(pattern, flags)
+    return re.compile(pattern, flags)
+
+
+class InvalidCursorError(ValueError):
+    """A cursor is malformed or was issued for a different request."""
+
+
+def fingerprint(text: str, patterns: dict[str, re.Pattern[str]]) -> int:
+    """Checksum tying a cursor to the text and patterns it was issued for."""
+    checksum = zlib.crc32(text.encode("utf-8", "surrogatepass"))
+    for name, pattern in patterns.items():
+        checksum = zlib.crc32(
+            f"{name}\0{pattern.pattern}\0{pattern.flags}".encode(), checksum
+        )
+    return checksum
+
+
+def encode_cursor(checksum: int, index: int, position: int, after_empty: bool) -> str:
+    """Opaque cursor resuming pattern ``index`` at ``position`` of the text."""
+    state = json.dumps([checksum, index, position, after_empty]).encode()
+    return base64.urlsafe_b64encode(state).decode()
+
+
+def decode_cursor(cursor: str, checksum: int) -> tuple[int, int, bool]:
+    """Decode a cursor into ``(index, position, after_empty)``."""
+    try:
+        issued, index, position, after_empty = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Malformed cursor: {e}") from None
+    if issued != checksum:
+        raise InvalidCursorError("Cursor was issued for a different text or patterns")
+    return int(index), int(position), bool(after_empty)
+
+
+def iter_matches(
+    patterns: dict[str, re.Pattern[str]],
+    text: str,
+    index: int = 0,
+    position: int = 0,
+    after_empty: bool = False,
+) -> Iterator[tuple[int, str, re.Match[str]]]:
+    """Lazily yield ``(pattern index, name, match)`` for every pattern in turn.
+
+    Iteration starts at pattern ``index`` and text ``position``. Searching
+    from a position keeps lookbehinds and anchors relative to the whole text,
+    so resumed iteration yields exactly the matches a full one would;
+    ``after_empty`` skips an empty match at ``position`` that was already
+    returned.
+    """
+    for i, (name, pattern) in enumerate(patterns.items()):
+        if i < index:
+            continue
+        start = position if i == index else 0
+        for match in pattern.finditer(text, start):
+            if i == index and after_empty and match.end() == match.start() == start:
+                continue
+            yield i, name, match
+
+
+def match_record(name: str, match: re.Match[str]) -> dict[str, Any]:
+    """A match with its pattern name and character offsets."""
+    return {
+        "type": name,
+        "match": match.group(),
+        "start": match.start(),
+        "end": match.end(),
+    }
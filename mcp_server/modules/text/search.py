@@ -0,0 +1,352 @@
+"""In-process full-text search over named document collections.
+
+Each ``SearchCollection`` keeps an inverted index whose postings are stored in
+flat ``array`` buffers (document ids, term frequencies and token positions)
+rather than per-document Python objects. Documents can be added and removed
+incrementally; removals leave tombstones that are compacted away once they
+outnumber the live documents. Queries are ranked with BM25 and may contain
+quoted phrases. The search tools refuse to grow a collection's text beyond
+``TEXT_MAX_SEARCH_CHARACTERS`` characters.
+"""
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from collections.abc import Sequence
+
+from mcp_server.settings import Config as cfg
+from mcp_server.snapshot import store
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Tokens on either side of the first match included in a snippet
+SNIPPET_TOKENS = 8
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> list[tuple[str, int, int]]:
+    """Split text into lowercase tokens with their character offsets."""
+    return [
+        (match.group().lower(), match.start(), match.end())
+        for match in _TOKEN_PATTERN.finditer(text)
+    ]
+
+
+def parse_query(query: str) -> list[list[str]]:
+    """Split a query into clauses; quoted phrases become multi-term clauses."""
+    clauses = []
+    for phrase, word in _QUERY_PATTERN.findall(query):
+        terms = [token for token, _, _ in tokenize(phrase or word)]
+        if terms:
+            clauses.append(terms)
+    return clauses
+
+
+class _Postings:
+    """Postings list for a single term.
+
+    ``docs`` is sorted; the positions of the term in ``docs[i]`` are
+    ``positions[starts[i] : starts[i] + freqs[i]]``.
+    """
+
+    __slots__ = ("docs", "freqs", "positions", "starts")
+
+    def __init__(self) -> None:
+        self.docs = array("I")
+        self.freqs = array("I")
+        self.starts = array("I")
+        self.positions = array("I")
+
+    def add(self, doc: int, positions: list[int]) -> None:
+        self.docs.append(doc)
+        self.freqs.append(len(positions))
+        self.starts.append(len(self.positions))
+        self.positions.extend(positions)
+
+    def positions_for(self, index: int) -> array:
+        start = self.starts[index]
+        return self.positions[start : start + self.freqs[index]]
+
+    def find(self, doc: int) -> int:
+        """Return the index of ``doc`` in the postings, or -1."""
+        i = bisect_left(self.docs, doc)
+        return i if i < len(self.docs) and self.docs[i] == doc else -1
+
+
+class SearchCollection:
+    """Inverted index over a named set of documents."""
+
+    def __init__(self) -> None:
+        self._postings: dict[str, _Postings] = {}
+        self._ids: dict[str, int] = {}
+        # Indexed by internal document number; None marks a removed document
+        self._names: list[str | None] = []
+        self._texts: list[str | None] = []
+        self._offsets: list[array | None] = []
+        self._lengths = array("I")
+        self._total_length = 0
+        self._characters = 0
+        self._removed = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def term_count(self) -> int:
+        return len(self._postings)
+
+    @property
+    def characters(self) -> int:
+        """Total length of the indexed documents' text."""
+        return self._characters
+
+    def text_length(self, document_id: str) -> int:
+        """Length of an indexed document's text, or 0 if it is not indexed."""
+        doc = self._ids.get(document_id)
+        text = self._texts[doc] if doc is not None else None
+        return len(text) if text is not None else 0
+
+    def add(self, document_id: str, text: str) -> None:
+        """Index ``text`` under ``document_id``, replacing any previous version."""
+        if document_id in self._ids:
+            self.remove(document_id)
+
+        doc = len(self._names)
+        tokens = tokenize(text)
+        term_positions: dict[str, list[int]] = defaultdict(list)
+        for position, (term, _, _) in enumerate(tokens):
+            term_positions[term].append(position)
+
+        for term, positions in term_positions.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+            postings.add(doc, positions)
+
+        self._ids[document_id] = doc
+        self._names.append(document_id)
+        self._texts.append(text)
+        self._offsets.append(array("I", (start for _, start, _ in tokens)))
+        self._lengths.append(len(tokens))
+        self._total_length += len(tokens)
+        self._characters += len(text)
+
+    def remove(self, document_id: str) -> bool:
+        """Remove a document, returning whether it was indexed."""
+        doc = self._ids.pop(document_id, None)
+        if doc is None:
+            return False
+
+        self._characters -= len(self._texts[doc] or "")
+        self._names[doc] = None
+        self._texts[doc] = None
+        self._offsets[doc] = None
+        self._total_length -= self._lengths[doc]
+        self._removed += 1
+        if self._removed > len(self._ids):
+            self._compact()
+        return True
+
+    def state(self) -> list[tuple[str, str]]:
+        """The indexed documents, in the form ``marshal`` can store."""
+        return [
+            (name, text)
+            for name, text in zip(self._names, self._texts, strict=True)
+            if name is not None and text is not None
+        ]
+
+    @classmethod
+    def from_state(cls, state: list[tuple[str, str]]) -> "SearchCollection":
+        """Rebuild a collection by reindexing the documents from ``state()``."""
+        collection = cls()
+        for name, text in state:
+            collection.add(name, text)
+        return collection
+
+    def _compact(self) -> None:
+        """Drop removed documents from the postings and renumber the rest."""
+        remap = array("i", [-1]) * len(self._names)
+        live = 0
+        for doc, name in enumerate(self._names):
+            if name is not None:
+                remap[doc] = live
+                live += 1
+
+        for term in list(self._postings):
+            old = self._postings[term]
+            new = _Postings()
+            for i, doc in enumerate(old.docs):
+                if remap[doc] != -1:
+                    new.add(remap[doc], old.positions_for(i).tolist())
+            if new.docs:
+                self._postings[term] = new
+            else:
+                del self._postings[term]
+
+        keep = [doc for doc, name in enumerate(self._names) if name is not None]
+        self._names = [self._names[doc] for doc in keep]
+        self._texts = [self._texts[doc] for doc in keep]
+        self._offsets = [self._offsets[doc] for doc in keep]
+        self._lengths = array("I", (self._lengths[doc] for doc in keep))
+        self._ids = {
+            name: doc for doc, name in enumerate(self._names) if name is not None
+        }
+        self._removed = 0
+
+    def _phrase_matches(self, terms: list[str]) -> dict[int, list[int]]:
+        """Return the start positions of ``terms`` as a phrase, per document."""
+        postings = []
+        for term in terms:
+            term_postings = self._postings.get(term)
+            if term_postings is None:
+                return {}
+            postings.append(term_postings)
+
+        rarest = min(postings, key=lambda p: len(p.docs))
+        matches: dict[int, list[int]] = {}
+        for doc in rarest.docs:
+            if self._names[doc] is None:
+                continue
+            indices = [p.find(doc) for p in postings]
+            if -1 in indices:
+                continue
+            following = [
+                set(p.positions_for(i))
+                for p, i in zip(postings[1:], indices[1:], strict=True)
+            ]
+            starts = [
+                pos
+                for pos in postings[0].positions_for(indices[0])
+                if all(pos + j in positions for j, positions in enumerate(following, 1))
+            ]
+            if starts:
+                matches[doc] = starts
+        return matches
+
+    def search(
+        self, query: str, limit: int = 10, require_all: bool = False
+    ) -> list[dict]:
+        """Rank documents against ``query`` with BM25.
+
+        Args:
+            query: Terms and quoted phrases to search for
+            limit: Maximum number of results
+            require_all: Only return documents matching every clause
+        """
+        live = len(self._ids)
+        clauses = parse_query(query)
+        if not live or not clauses:
+            return []
+
+        average_length = self._total_length / live or 1
+        scores: dict[int, float] = defaultdict(float)
+        hits: dict[int, int] = defaultdict(int)
+        first_match: dict[int, int] = {}
+
+        for terms in clauses:
+            # Each clause yields per-document match positions
+            if len(terms) == 1:
+                postings = self._postings.get(terms[0])
+                matches: dict[int, Sequence[int]] = {}
+                if postings is not None:
+                    for i, doc in enumerate(postings.docs):
+                        if self._names[doc] is not None:
+                            matches[doc] = postings.positions_for(i)
+            else:
+                matches = dict(self._phrase_matches(terms))
+
+            if not matches:
+                continue
+
+            df = len(matches)
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            for doc, positions in matches.items():
+                tf = len(positions)
+                norm = BM25_K1 * (
+                    1 - BM25_B + BM25_B * self._lengths[doc] / average_length
+                )
+                scores[doc] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                hits[doc] += 1
+                first = positions[0]
+                if doc not in first_match or first < first_match[doc]:
+                    first_match[doc] = first
+
+        if require_all:
+            candidates = [doc for doc in scores if hits[doc] == len(clauses)]
+        else:
+            candidates = list(scores)
+
+        top = heapq.nlargest(limit, candidates, key=scores.__getitem__)
+        return [
+            {
+                "document_id": self._names[doc],
+                "score": round(scores[doc], 6),
+                "snippet": self._snippet(doc, first_match[doc]),
+            }
+            for doc in top
+        ]
+
+    def _snippet(self, doc: int, position: int) -> str:
+        """Return the text surrounding the token at ``position``."""
+        text = self._texts[doc]
+        offsets = self._offsets[doc]
+        assert text is not None and offsets is not None
+        start = offsets[max(position - SNIPPET_TOKENS, 0)]
+        stop = position + SNIPPET_TOKENS + 1
+        end = offsets[stop] if stop < len(offsets) else len(text)
+        snippet = " ".join(text[start:end].split())
+        prefix = "..." if start > 0 else ""
+        suffix = "..." if end < len(text) else ""
+        return f"{prefix}{snippet}{suffix}"
+
+
+SNAPSHOT_SECTION = "text.search"
+# Bump when ``state()`` changes layout
+SNAPSHOT_SCHEMA = 1
+
+# Named collections, least recently used first
+_collections: OrderedDict[str, SearchCollection] = OrderedDict()
+
+
+def get_collection(name: str, create: bool = False) -> SearchCollection | None:
+    """Look up a collection by name, optionally creating it.
+
+    Collections missing from memory are rebuilt from the warm-start snapshot
+    when it has them. Adding a collection beyond
+    ``TEXT_MAX_SEARCH_COLLECTIONS`` evicts the least recently used one.
+    """
+    collection = _collections.get(name)
+    if collection is not None:
+        _collections.move_to_end(name)
+        return collection
+
+    collection = store.take(SNAPSHOT_SECTION, name, SearchCollection.from_state)
+    if collection is None:
+        if not create:
+            return None
+        collection = SearchCollection()
+
+    _collections[name] = collection
+    while len(_collections) > cfg.TEXT_MAX_SEARCH_COLLECTIONS:
+        _collections.popitem(last=False)
+    return collection
+
+
+def delete_collection(name: str) -> bool:
+    """Remove a collection, returning whether it existed."""
+    existed = _collections.pop(name, None) is not None
+    return store.discard(SNAPSHOT_SECTION, name) or existed
+
+
+store.register(
+    SNAPSHOT_SECTION,
+    lambda: [(name, collection.state()) for name, collection in _collections.items()],
+    limit=cfg.TEXT_MAX_SEARCH_COLLECTIONS,
+    schema=SNAPSHOT_SCHEMA,
+)
@@ -3,23 +3,61 @@
 import hashlib
 import re
 import urllib.parse
-from typing import Any, Dict
+from typing import Any
 
+from mcp_server.settings import Config as cfg
+from mcp_server.settings.logging import get_app_logger
+from mcp_server.workers import WorkerPool, WorkerUnavailable, deadline, in_worker
+
+from .dedup import DedupIndex, delete_index, find_clusters, get_index
+from .diff import (
+    GRANULARITIES,
+    PatchError,
+    apply_hunks,
+    apply_unified,
+    diff_texts,
+    structured_hunks,
+    unified_diff,
+)
+from .documents import delete_document, get_document
+from .frequency import STOPWORD_LISTS, count_ngrams, iter_tokens
 from .helpers import (
+    compact_response,
     to_camel_case,
     to_constant_case,
     to_kebab_case,
     to_pascal_case,
     to_snake_case,
 )
+from .patterns import (
+    BUILTIN_PATTERNS,
+    InvalidCursorError,
+    UnsafePatternError,
+    compile_pattern,
+    decode_cursor,
+    encode_cursor,
+    fingerprint,
+    iter_matches,
+    match_record,
+    parse_flags,
+)
+from .search import delete_collection, get_collection
+
+logger = get_app_logger("mcp_server.modules.text.tools")
+
+# Custom patterns run here so a runaway match can be killed at its deadline
+pattern_workers = WorkerPool(cfg.TEXT_PATTERN_PROCESSES)
 
 
-async def transform_case(text: str, case_type: str) -> Dict[str, Any]:
+async def transform_case(
+    text: str, case_type: str, compact: bool | None = None
+) -> dict[str, Any]:
     """Transform text case.
 
     Args:
         text: Input text to transform
         case_type: Type of case transformation (upper, lower, title, camel, snake, kebab, pascal)
+        compact: Omit echoed input, options and indentation (default: server setting)
     """
     try:
         case_type = case_type.lower().strip()
@@ -43,25 +81,32 @@ async def transform_case(text: str, case_type: str) -> Dict[str, Any]:
             }
 
         result = transformations[case_type]
-        return {
-            "success": True,
-            "original": text,
-            "transformed": result,
-            "case_type": case_type,
-        }
+        return compact_response(
+            {
+                "success": True,
+                "original": text,
+                "transformed": result,
+                "case_type": case_type,
+            },
+            compact,
+            "original",
+            "case_type",
+        )
 
     except Exception as e:
+        logger.exception("Case transformation failed")
         return {
             "success": False,
-            "error": f"Case transformation failed: {str(e)}",
+            "error": f"Case transformation failed: {e}",
         }
 
 
-async def analyze_text(text: str) -> Dict[str, Any]:
+async def analyze_text(text: str, compact: bool | None = None) -> dict[str, Any]:
     """Analyze text and provide statistics.
 
     Args:
         text: Input text to analyze
+        compact: Omit echoed input, options and indentation (default: server setting)
     """
     try:
         words = text.split()
@@ -93,9 +138,10 @@ async def analyze_text(text: str) -> Dict[str, Any]:
         }
 
     except Exception as e:
+        logger.exception("Text analysis failed")
         return {
             "success": False,
-            "error": f"Text analysis failed: {str(e)}",
+            "error": f"Text analysis failed: {e}",
         }
 
 
@@ -104,7 +150,8 @@ async def clean_text(
     remove_html: bool = True,
     remove_urls: bool = True,
     normalize_whitespace: bool = True,
-) -> Dict[str, Any]:
+    compact: bool | None = None,
+) -> dict[str, Any]:
     """Clean and normalize text.
 
     Args:
@@ -112,6 +159,7 @@ async def clean_text(
         remove_html: Whether to remove HTML tags
         remove_urls: Whether to remove URLs
         normalize_whitespace: Whether to normalize whitespace
+        compact: Omit echoed input, options and indentation (default: server setting)
     """
     try:
         cleaned = text
@@ -129,77 +177,429 @@ async def clean_text(
             # Normalize whitespace
             cleaned = re.sub(r"\s+", " ", cleaned).strip()
 
-        return {
-            "success": True,
-            "original": text,
-            "cleaned": cleaned,
-            "operations": {
-                "remove_html": remove_html,
-                "remove_urls": remove_urls,
-                "normalize_whitespace": normalize_whitespace,
+        return compact_response(
+            {
+                "success": True,
+                "original": text,
+                "cleaned": cleaned,
+                "operations": {
+                    "remove_html": remove_html,
+                    "remove_urls": remove_urls,
+                    "normalize_whitespace": normalize_whitespace,
+                },
             },
-        }
+            compact,
+            "original",
+            "operations",
+        )
 
     except Exception as e:
+        logger.exception("Text cleaning failed")
         return {
             "success": False,
-            "error": f"Text cleaning failed: {str(e)}",
+            "error": f"Text cleaning failed: {e}",
+        }
+
+
+def find_matches(
+    text: str,
+    patterns: dict[str, re.Pattern[str]],
+    builtin: set[str],
+    counts_only: bool,
+    first_n: int,
+    page_size: int | None,
+    checksum: int | None,
+    resume: tuple[int, int, bool] | None,
+) -> dict[str, Any]:
+    """Run the extraction for extract_patterns, possibly in a worker process.
+
+    Args:
+        text: Input text to search
+        patterns: Compiled patterns by name
+        builtin: Names of the built-in patterns
+        counts_only: Count matches per type instead of returning them
+        first_n: With counts_only, number of leading matches to return per type
+        page_size: Maximum number of matches per page
+        checksum: Fingerprint of the text and patterns, when paging
+        resume: Pattern index, position and empty-match flag to page from
+    """
+    if counts_only:
+        counts = dict.fromkeys(patterns, 0)
+        first: dict[str, list[dict[str, Any]]] = {name: [] for name in patterns}
+        for _, name, match in iter_matches(patterns, text):
+            counts[name] += 1
+            if len(first[name]) < first_n:
+                first[name].append(match_record(name, match))
+        found: dict[str, Any] = {
+            "counts": counts,
+            "total_matches": sum(counts.values()),
         }
+        if first_n:
+            found["first"] = first
+        return found
 
+    if resume is not None and checksum is not None:
+        limit = page_size or cfg.TEXT_MAX_PAGE_SIZE
+        page: list[dict[str, Any]] = []
+        next_cursor = None
+        for i, name, match in iter_matches(patterns, text, *resume):
+            if len(page) == limit:
+                next_cursor = encode_cursor(checksum, *resume)
+                break
+            page.append(match_record(name, match))
+            # Resume after the last returned match
+            resume = (i, match.end(), match.start() == match.end())
+        return {
+            "matches": page,
+            "next_cursor": next_cursor,
+        }
+
+    results = {
+        name: pattern.findall(text)
+        if name in builtin
+        else [match.group() for match in pattern.finditer(text)]
+        for name, pattern in patterns.items()
+    }
+    return {
+        "results": results,
+        "total_matches": sum(len(matches) for matches in results.values()),
+    }
 
-async def extract_patterns(text: str, pattern_type: str = "all") -> Dict[str, Any]:
+
+async def extract_patterns(
+    text: str,
+    pattern_type: str = "all",
+    custom_patterns: dict[str, str] | None = None,
+    flags: list[str] | None = None,
+    page_size: int | None = None,
+    cursor: str | None = None,
+    counts_only: bool = False,
+    first_n: int = 0,
+    compact: bool | None = None,
+) -> dict[str, Any]:
     """Extract patterns from text.
 
+    Custom patterns are extracted alongside the selected built-in type and
+    return the full text of every match. They run in a separate process,
+    which is killed if they take longer than ``TEXT_PATTERN_TIMEOUT`` seconds.
+    When this module itself runs in a worker, they run in that worker and are
+    interrupted at the same deadline.
+
+    By default every match is returned at once. With ``page_size`` or
+    ``cursor``, matches are returned one page at a time, grouped by pattern
+    type, as ``{type, match, start, end}`` records with ``next_cursor`` set
+    while more remain. With ``counts_only``, only the number of matches per
+    type is returned, plus the first ``first_n`` matches of each type.
+
     Args:
         text: Input text to search
-        pattern_type: Type of pattern to extract (email, url, phone, hashtag, mention, ip, all)
+        pattern_type: Type of pattern to extract (email, url, phone, hashtag, mention, ip, all, custom)
+        custom_patterns: Mapping of name to regular expression for additional patterns
+        flags: Regex flags for the custom patterns (ignorecase, multiline, dotall, ascii)
+        page_size: Maximum number of matches per page
+        cursor: Cursor from a previous page's next_cursor
+        counts_only: Return match counts per type instead of matches
+        first_n: With counts_only, number of leading matches to return per type
+        compact: Omit echoed input, options and indentation (default: server setting)
     """
     try:
-        patterns = {
-            "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-            "url": r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+",
-            "phone": r"(\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})",
-            "hashtag": r"#\w+",
-            "mention": r"@\w+",
-            "ip": r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b",
-        }
+        custom_patterns = custom_patterns or {}
+        if len(custom_patterns) > cfg.TEXT_MAX_CUSTOM_PATTERNS:
+            return {
+                "success": False,
+                "error": f"At most {cfg.TEXT_MAX_CUSTOM_PATTERNS} custom patterns are allowed",
+            }
+
+        clashes = set(custom_patterns) & set(BUILTIN_PATTERNS)
+        if clashes:
+            return {
+                "success": False,
+                "error": f"Custom pattern names clash with built-in types: {', '.join(sorted(clashes))}",
+            }
 
-        results = {}
+        patterns = {}
 
         if pattern_type.lower() == "all":
-            for name, pattern in patterns.items():
-                matches = re.findall(pattern, text)
-                results[name] = matches
-        elif pattern_type.lower() in patterns:
-            pattern = patterns[pattern_type.lower()]
-            matches = re.findall(pattern, text)
-            results[pattern_type.lower()] = matches
+            patterns.update(BUILTIN_PATTERNS)
+        elif pattern_type.lower() in BUILTIN_PATTERNS:
+            patterns[pattern_type.lower()] = BUILTIN_PATTERNS[pattern_type.lower()]
+        elif pattern_type.lower() != "custom":
+            return {
+                "success": False,
+                "error": f"Unsupported pattern type: {pattern_type}. Available: {', '.join(BUILTIN_PATTERNS.keys())}, all, custom",
+            }
+        builtin = set(patterns)
+
+        if page_size is not None and not 1 <= page_size <= cfg.TEXT_MAX_PAGE_SIZE:
+            return {
+                "success": False,
+                "error": f"page_size must be between 1 and {cfg.TEXT_MAX_PAGE_SIZE}",
+            }
+        if not 0 <= first_n <= cfg.TEXT_MAX_PAGE_SIZE:
+            return {
+                "success": False,
+                "error": f"first_n must be between 0 and {cfg.TEXT_MAX_PAGE_SIZE}",
+            }
+
+        try:
+            regex_flags = parse_flags(flags)
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": str(e),
+            }
+
+        for name, source in custom_patterns.items():
+            try:
+                compiled = compile_pattern(source, regex_flags)
+            except (re.error, UnsafePatternError) as e:
+                return {
+                    "success": False,
+                    "error": f"Invalid custom pattern {name}: {e}",
+                }
+            patterns[name] = compiled
+
+        checksum = None
+        resume = None
+        if page_size is not None or cursor is not None:
+            checksum = fingerprint(text, patterns)
+            try:
+                resume = decode_cursor(cursor, checksum) if cursor else (0, 0, False)
+            except InvalidCursorError as e:
+                return {
+                    "success": False,
+                    "error": str(e),
+                }
+
+        arguments = (
+            text,
+            patterns,
+            builtin,
+            counts_only,
+            first_n,
+            page_size,
+            checksum,
+            resume,
+        )
+        timeout = cfg.TEXT_PATTERN_TIMEOUT
+        try:
+            if not custom_patterns or not timeout:
+                found = find_matches(*arguments)
+            elif in_worker():
+                # Workers cannot start processes of their own
+                with deadline(timeout):
+                    found = find_matches(*arguments)
+            else:
+                found = await pattern_workers.call(
+                    find_matches, arguments, {}, timeout=timeout
+                )
+        except (WorkerUnavailable, TimeoutError):
+            return {
+                "success": False,
+                "error": f"Custom patterns did not finish within {timeout}s",
+            }
+
+        return compact_response(
+            {"success": True, "pattern_type": pattern_type, **found},
+            compact,
+            "pattern_type",
+        )
+
+    except Exception as e:
+        logger.exception("Pattern extraction failed")
+        return {
+            "success": False,
+            "error": f"Pattern extraction failed: {e}",
+        }
+
+
+async def word_frequency(
+    text: str,
+    ngram_sizes: list[int] | None = None,
+    top_k: int = 20,
+    case_fold: bool = True,
+    stopword_list: str = "none",
+    stopwords: list[str] | None = None,
+    compact: bool | None = None,
+) -> dict[str, Any]:
+    """Count the most frequent words and n-grams in text.
+
+    Args:
+        text: Input text to count
+        ngram_sizes: N-gram sizes to count, from 1 to 5 (default: [1])
+        top_k: Number of most frequent terms to return per size (default: 20)
+        case_fold: Whether to count terms case-insensitively
+        stopword_list: Built-in stopwords to skip, alone or in n-grams of only stopwords (none, english)
+        stopwords: Additional words to skip, in any case
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        sizes = ngram_sizes or [1]
+        if any(n < 1 or n > 5 for n in sizes):
+            return {
+                "success": False,
+                "error": "N-gram sizes must be between 1 and 5",
+            }
+
+        if top_k < 1 or top_k > 1000:
+            return {
+                "success": False,
+                "error": "top_k must be between 1 and 1000",
+            }
+
+        stopword_list = stopword_list.lower().strip()
+        if stopword_list not in STOPWORD_LISTS:
+            return {
+                "success": False,
+                "error": f"Unsupported stopword list: {stopword_list}. Available: {', '.join(STOPWORD_LISTS.keys())}",
+            }
+
+        extra = stopwords or []
+        skipped = STOPWORD_LISTS[stopword_list] | {
+            word.casefold() if case_fold else word.lower() for word in extra
+        }
+
+        counts = count_ngrams(
+            iter_tokens(text, case_fold), sizes, top_k, stopwords=skipped
+        )
+        return {
+            "success": True,
+            "ngrams": {str(n): report for n, report in counts.items()},
+        }
+
+    except Exception as e:
+        logger.exception("Word frequency failed")
+        return {
+            "success": False,
+            "error": f"Word frequency failed: {e}",
+        }
+
+
+async def text_diff(
+    original: str,
+    modified: str,
+    granularity: str = "line",
+    output_format: str = "unified",
+    context_lines: int = 3,
+    compact: bool | None = None,
+) -> dict[str, Any]:
+    """Compute the differences between two texts.
+
+    Args:
+        original: Original text
+        modified: Modified text
+        granularity: Unit to compare (line, word, char)
+        output_format: Diff format (unified, structured); unified requires line granularity
+        context_lines: Unchanged lines shown around each unified hunk (default: 3)
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        granularity = granularity.lower().strip()
+        if granularity not in GRANULARITIES:
+            return {
+                "success": False,
+                "error": f"Unsupported granularity: {granularity}. Available: {', '.join(GRANULARITIES)}",
+            }
+
+        output_format = output_format.lower().strip()
+        if output_format not in ("unified", "structured"):
+            return {
+                "success": False,
+                "error": f"Unsupported output format: {output_format}. Available: unified, structured",
+            }
+
+        if output_format == "unified" and granularity != "line":
+            return {
+                "success": False,
+                "error": "Unified output requires line granularity",
+            }
+
+        a, b, opcodes, timed_out = diff_texts(
+            original, modified, granularity, cfg.TEXT_DIFF_TIMEOUT
+        )
+        changes = [op for op in opcodes if op[0] != "equal"]
+        result: dict[str, Any] = {
+            "success": True,
+            "granularity": granularity,
+            "output_format": output_format,
+            "identical": not changes,
+            "timed_out": timed_out,
+            "stats": {
+                "changes": len(changes),
+                "removed": sum(a1 - a0 for _, a0, a1, _, _ in changes),
+                "inserted": sum(b1 - b0 for _, _, _, b0, b1 in changes),
+            },
+        }
+
+        if output_format == "unified":
+            result["diff"] = unified_diff(a, b, opcodes, max(context_lines, 0))
         else:
+            result["hunks"] = structured_hunks(a, b, opcodes)
+        return compact_response(result, compact, "granularity", "output_format")
+
+    except Exception as e:
+        logger.exception("Text diff failed")
+        return {
+            "success": False,
+            "error": f"Text diff failed: {e}",
+        }
+
+
+async def apply_patch(
+    text: str,
+    diff: str | None = None,
+    hunks: list[dict[str, Any]] | None = None,
+    compact: bool | None = None,
+) -> dict[str, Any]:
+    """Apply a diff produced by text_diff to a text.
+
+    Args:
+        text: Text to patch
+        diff: Unified diff to apply
+        hunks: Structured hunks to apply
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        if (diff is None) == (hunks is None):
             return {
                 "success": False,
-                "error": f"Unsupported pattern type: {pattern_type}. Available: {', '.join(patterns.keys())}, all",
+                "error": "Provide exactly one of diff or hunks",
             }
 
+        if diff is not None:
+            patched = apply_unified(text, diff)
+        else:
+            assert hunks is not None
+            patched = apply_hunks(text, hunks)
+
         return {
             "success": True,
-            "pattern_type": pattern_type,
-            "results": results,
-            "total_matches": sum(len(matches) for matches in results.values()),
+            "patched": patched,
+        }
+
+    except PatchError as e:
+        return {
+            "success": False,
+            "error": f"Patch does not apply: {e}",
         }
 
     except Exception as e:
+        logger.exception("Patch application failed")
         return {
             "success": False,
-            "error": f"Pattern extraction failed: {str(e)}",
+            "error": f"Patch application failed: {e}",
         }
 
 
-async def encode_text(text: str, encoding_type: str) -> Dict[str, Any]:
+async def encode_text(
+    text: str, encoding_type: str, compact: bool | None = None
+) -> dict[str, Any]:
     """Encode text using various methods.
 
     Args:
         text: Input text to encode
         encoding_type: Type of encoding (base64, url, html, hex, md5, sha256)
+        compact: Omit echoed input, options and indentation (default: server setting)
     """
     try:
         import base64
@@ -223,27 +623,36 @@ async def encode_text(text: str, encoding_type: str) -> Dict[str, Any]:
             }
 
         encoded = encodings[encoding_type](text)
-        return {
-            "success": True,
-            "original": text,
-            "encoded": encoded,
-            "encoding_type": encoding_type,
-        }
+        return compact_response(
+            {
+                "success": True,
+                "original": text,
+                "encoded": encoded,
+                "encoding_type": encoding_type,
+            },
+            compact,
+            "original",
+            "encoding_type",
+        )
 
     except Exception as e:
+        logger.exception("Text encoding failed")
         return {
             "success": False,
-            "error": f"Text encoding failed: {str(e)}",
+            "error": f"Text encoding failed: {e}",
         }
 
 
-async def format_text(text: str, format_type: str, width: int = 80) -> Dict[str, Any]:
+async def format_text(
+    text: str, format_type: str, width: int = 80, compact: bool | None = None
+) -> dict[str, Any]:
     """Format text with various options.
 
     Args:
         text: Input text to format
         format_type: Type of formatting (wrap, indent, center, justify, reverse, sort_lines)
         width: Width for formatting operations (default: 80)
+        compact: Omit echoed input, options and indentation (default: server setting)
     """
     try:
         import textwrap
@@ -268,16 +677,488 @@ async def format_text(text: str, format_type: str, width: int = 80) -> Dict[str,
             }
 
         formatted = formatters[format_type](text, width)
+        return compact_response(
+            {
+                "success": True,
+                "original": text,
+                "formatted": formatted,
+                "format_type": format_type,
+                "width": width,
+            },
+            compact,
+            "original",
+            "format_type",
+            "width",
+        )
+
+    except Exception as e:
+        logger.exception("Text formatting failed")
         return {
-            "success": True,
-            "original": text,
-            "formatted": formatted,
-            "format_type": format_type,
-            "width": width,
+            "success": False,
+            "error": f"Text formatting failed: {e}",
+        }
+
+
+async def document_append(
+    document_id: str, text: str, compact: bool | None = None
+) -> dict[str, Any]:
+    """Append text to a named document, creating it if needed.
+
+    Args:
+        document_id: Identifier of the document to append to
+        text: Text to append
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        document = get_document(document_id, create=True)
+        assert document is not None
+        document.append(text)
+        return compact_response(
+            {
+                "success": True,
+                "document_id": document_id,
+                "length": len(document),
+                "version": document.version,
+            },
+            compact,
+            "document_id",
+        )
+
+    except Exception as e:
+        logger.exception("Document append failed")
+        return {
+            "success": False,
+            "error": f"Document append failed: {e}",
+        }
+
+
+async def document_patch(
+    document_id: str,
+    start: int,
+    end: int,
+    text: str,
+    compact: bool | None = None,
+) -> dict[str, Any]:
+    """Replace a character range of a named document.
+
+    Args:
+        document_id: Identifier of the document to patch
+        start: Start offset of the range to replace
+        end: End offset (exclusive) of the range to replace
+        text: Replacement text
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        document = get_document(document_id)
+        if document is None:
+            return {
+                "success": False,
+                "error": f"Unknown document: {document_id}",
+            }
+
+        document.patch(start, end, text)
+        return compact_response(
+            {
+                "success": True,
+                "document_id": document_id,
+                "length": len(document),
+                "version": document.version,
+            },
+            compact,
+            "document_id",
+        )
+
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": f"Document patch failed: {e}",
+        }
+    except Exception as e:
+        logger.exception("Document patch failed")
+        return {
+            "success": False,
+            "error": f"Document patch failed: {e}",
+        }
+
+
+async def document_analyze(
+    document_id: str, compact: bool | None = None
+) -> dict[str, Any]:
+    """Return the statistics of a named document.
+
+    Args:
+        document_id: Identifier of the document to analyze
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        document = get_document(document_id)
+        if document is None:
+            return {
+                "success": False,
+                "error": f"Unknown document: {document_id}",
+            }
+
+        return compact_response(
+            {
+                "success": True,
+                "document_id": document_id,
+                "version": document.version,
+                "analysis": document.analysis(),
+            },
+            compact,
+            "document_id",
+        )
+
+    except Exception as e:
+        logger.exception("Document analysis failed")
+        return {
+            "success": False,
+            "error": f"Document analysis failed: {e}",
+        }
+
+
+async def document_slice(
+    document_id: str,
+    unit: str = "line",
+    start: int = 0,
+    end: int | None = None,
+    compact: bool | None = None,
+) -> dict[str, Any]:
+    """Return a range of lines or sentences from a named document.
+
+    Args:
+        document_id: Identifier of the document to slice
+        unit: Unit to slice by (line, sentence)
+        start: Index of the first unit to return
+        end: Index after the last unit to return (default: all remaining)
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        document = get_document(document_id)
+        if document is None:
+            return {
+                "success": False,
+                "error": f"Unknown document: {document_id}",
+            }
+
+        unit = unit.lower().strip()
+        getters = {
+            "line": (document.line, document.line_count),
+            "sentence": (document.sentence, document.sentence_count),
+        }
+
+        if unit not in getters:
+            return {
+                "success": False,
+                "error": f"Unsupported unit: {unit}. Available: {', '.join(getters.keys())}",
+            }
+
+        getter, count = getters[unit]
+        indices = range(count)[start:end]
+        return compact_response(
+            {
+                "success": True,
+                "document_id": document_id,
+                "unit": unit,
+                "start": indices.start,
+                "total": count,
+                "items": [getter(i) for i in indices],
+            },
+            compact,
+            "document_id",
+            "unit",
+        )
+
+    except Exception as e:
+        logger.exception("Document slice failed")
+        return {
+            "success": False,
+            "error": f"Document slice failed: {e}",
+        }
+
+
+async def document_delete(
+    document_id: str, compact: bool | None = None
+) -> dict[str, Any]:
+    """Delete a named document.
+
+    Args:
+        document_id: Identifier of the document to delete
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        return compact_response(
+            {
+                "success": True,
+                "document_id": document_id,
+                "deleted": delete_document(document_id),
+            },
+            compact,
+            "document_id",
+        )
+
+    except Exception as e:
+        logger.exception("Document deletion failed")
+        return {
+            "success": False,
+            "error": f"Document deletion failed: {e}",
+        }
+
+
+async def search_add_documents(
+    collection: str, documents: dict[str, str], compact: bool | None = None
+) -> dict[str, Any]:
+    """Add or replace documents in a search collection.
+
+    Nothing is added if the collection's text would grow beyond
+    ``TEXT_MAX_SEARCH_CHARACTERS`` characters.
+
+    Args:
+        collection: Name of the collection, created if needed
+        documents: Mapping of document id to document text
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        index = get_collection(collection, create=True)
+        assert index is not None
+        limit = cfg.TEXT_MAX_SEARCH_CHARACTERS
+        growth = sum(
+            len(text) - index.text_length(document_id)
+            for document_id, text in documents.items()
+        )
+        if limit and index.characters + growth > limit:
+            return {
+                "success": False,
+                "error": f"Collection {collection} would exceed {limit} characters of text",
+            }
+
+        for document_id, text in documents.items():
+            index.add(document_id, text)
+
+        return compact_response(
+            {
+                "success": True,
+                "collection": collection,
+                "added": len(documents),
+                "document_count": len(index),
+                "term_count": index.term_count,
+            },
+            compact,
+            "collection",
+        )
+
+    except Exception as e:
+        logger.exception("Search indexing failed")
+        return {
+            "success": False,
+            "error": f"Search indexing failed: {e}",
+        }
+
+
+async def search_remove_documents(
+    collection: str, document_ids: list[str], compact: bool | None = None
+) -> dict[str, Any]:
+    """Remove documents from a search collection.
+
+    Args:
+        collection: Name of the collection
+        document_ids: Ids of the documents to remove
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        index = get_collection(collection)
+        if index is None:
+            return {
+                "success": False,
+                "error": f"Unknown collection: {collection}",
+            }
+
+        removed = sum(index.remove(document_id) for document_id in document_ids)
+        return compact_response(
+            {
+                "success": True,
+                "collection": collection,
+                "removed": removed,
+                "document_count": len(index),
+            },
+            compact,
+            "collection",
+        )
+
+    except Exception as e:
+        logger.exception("Search removal failed")
+        return {
+            "success": False,
+            "error": f"Search removal failed: {e}",
+        }
+
+
+async def search_query(
+    collection: str,
+    query: str,
+    limit: int = 10,
+    require_all: bool = False,
+    compact: bool | None = None,
+) -> dict[str, Any]:
+    """Search a collection with BM25 ranking.
+
+    Args:
+        collection: Name of the collection to search
+        query: Search terms; wrap phrases in double quotes
+        limit: Maximum number of results (default: 10)
+        require_all: Only return documents matching every term and phrase
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        index = get_collection(collection)
+        if index is None:
+            return {
+                "success": False,
+                "error": f"Unknown collection: {collection}",
+            }
+
+        results = index.search(query, limit=limit, require_all=require_all)
+        return compact_response(
+            {
+                "success": True,
+                "collection": collection,
+                "query": query,
+                "results": results,
+                "total_results": len(results),
+            },
+            compact,
+            "collection",
+            "query",
+        )
+
+    except Exception as e:
+        logger.exception("Search failed")
+        return {
+            "success": False,
+            "error": f"Search failed: {e}",
         }
 
+
+async def search_delete_collection(
+    collection: str, compact: bool | None = None
+) -> dict[str, Any]:
+    """Delete a search collection.
+
+    Args:
+        collection: Name of the collection to delete
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        return compact_response(
+            {
+                "success": True,
+                "collection": collection,
+                "deleted": delete_collection(collection),
+            },
+            compact,
+            "collection",
+        )
+
+    except Exception as e:
+        logger.exception("Collection deletion failed")
+        return {
+            "success": False,
+            "error": f"Collection deletion failed: {e}",
+        }
+
+
+async def dedup_documents(
+    documents: dict[str, str],
+    collection: str | None = None,
+    threshold: float = 0.8,
+    shingle_size: int = 5,
+    compact: bool | None = None,
+) -> dict[str, Any]:
+    """Find clusters of near-duplicate documents.
+
+    Args:
+        documents: Mapping of document id to document text
+        collection: Name of a collection to check against and add the batch to
+        threshold: Minimum estimated Jaccard similarity of duplicates (default: 0.8)
+        shingle_size: Number of words per shingle (default: 5)
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        if not 0 < threshold <= 1:
+            return {
+                "success": False,
+                "error": "Threshold must be between 0 and 1",
+            }
+
+        if shingle_size < 1:
+            return {
+                "success": False,
+                "error": "Shingle size must be at least 1",
+            }
+
+        if collection is None:
+            index: DedupIndex | None = DedupIndex(threshold, shingle_size)
+        else:
+            index = get_index(collection, threshold, shingle_size, create=True)
+        assert index is not None
+
+        if (index.threshold, index.shingle_size) != (threshold, shingle_size):
+            return {
+                "success": False,
+                "error": f"Collection {collection} uses threshold {index.threshold} and shingle size {index.shingle_size}",
+            }
+
+        clusters = find_clusters(index, documents)
+        duplicates = sum(
+            1
+            for cluster in clusters
+            for document_id in cluster["ids"]
+            if document_id != cluster["representative"] and document_id in documents
+        )
+        return compact_response(
+            {
+                "success": True,
+                "collection": collection,
+                "clusters": clusters,
+                "duplicate_count": duplicates,
+                "unique_count": len(documents) - duplicates,
+                "indexed_count": len(index),
+            },
+            compact,
+            "collection",
+        )
+
+    except Exception as e:
+        logger.exception("Deduplication failed")
+        return {
+            "success": False,
+            "error": f"Deduplication failed: {e}",
+        }
+
+
+async def dedup_delete_collection(
+    collection: str, compact: bool | None = None
+) -> dict[str, Any]:
+    """Delete a near-duplicate detection collection.
+
+    Args:
+        collection: Name of the collection to delete
+        compact: Omit echoed input, options and indentation (default: server setting)
+    """
+    try:
+        return compact_response(
+            {
+                "success": True,
+                "collection": collection,
+                "deleted": delete_index(collection),
+            },
+            compact,
+            "collection",
+        )
+
     except Exception as e:
+        logger.exception("Collection deletion failed")
         return {
             "success": False,
-            "error": f"Text formatting failed: {str(e)}",
+            "error": f"Collection deletion failed: {e}",
         }
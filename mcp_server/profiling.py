@@ -0,0 +1,293 @@
+"""Tool call tracing and slow-call profiling.
+
+Every tool registered by the loader is wrapped by ``traced``, which records a
+span (tool name, argument sizes, duration and outcome) and hands it to the
+configured ``SpanExporter``. The default ``InMemoryExporter`` keeps recent
+spans and per-tool aggregates in memory.
+
+Calls running longer than ``SLOW_CALL_THRESHOLD_MS`` are profiled by a
+background sampler thread: once a call crosses the threshold the thread
+samples the stack of the thread running it every
+``PROFILE_SAMPLE_INTERVAL_MS`` and traces allocations through the shared
+``memory.tracer`` to capture the peak for the rest of the call. Until a call
+crosses the threshold the sampler sleeps, so the cost for fast calls is two
+clock reads and a dict update.
+
+Async tools all run on the event loop thread, so a stack sampled while other
+calls are in flight on that thread may belong to any of them; such samples
+are counted as ``shared_samples`` instead of being attributed. Calls handed
+off to a worker process or another thread only show the loop waiting. The
+peak is process-wide: ``tracemalloc_peak_shared`` is set when other calls
+started while it was traced.
+"""
+
+import functools
+import itertools
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from mcp_server.memory import Trace, tracer
+from mcp_server.settings import Config as cfg
+from mcp_server.settings.logging import get_app_logger
+from mcp_server.snapshot import store
+
+logger = get_app_logger("mcp_server.profiling")
+
+# Deepest stack recorded per profile sample
+MAX_STACK_DEPTH = 40
+
+# Distinct stacks reported per slow call
+MAX_PROFILE_STACKS = 25
+
+
+def _size(value: Any) -> int | None:
+    """Cheap size of a tool argument: length for sized values."""
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+class SpanExporter(ABC):
+    """Receives a span for every finished tool call."""
+
+    @abstractmethod
+    def export(self, span: dict[str, Any]) -> None:
+        """Handle a finished span; errors are logged and never fail the call."""
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps the most recent spans and per-tool aggregates.
+
+    Per-tool aggregates carry over restarts through the warm-start snapshot.
+    """
+
+    snapshot_section = "server.tools"
+    # Bump when the per-tool aggregates change layout
+    snapshot_schema = 1
+
+    def __init__(self, max_spans: int) -> None:
+        self.spans: deque[dict[str, Any]] = deque(maxlen=max_spans)
+        self.tools: dict[str, dict[str, Any]] = {}
+        store.register(
+            self.snapshot_section,
+            lambda: list(self.tools.items()),
+            schema=self.snapshot_schema,
+        )
+
+    @staticmethod
+    def _new_stats() -> dict[str, Any]:
+        return {
+            "calls": 0,
+            "errors": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+        }
+
+    @classmethod
+    def _load_stats(cls, stats: dict[str, Any]) -> dict[str, Any]:
+        """Per-tool aggregates restored from a snapshot entry."""
+        return {key: stats[key] for key in cls._new_stats()}
+
+    def restore(self) -> None:
+        """Merge in the per-tool aggregates left in the snapshot."""
+        for tool, stats in store.take_all(self.snapshot_section, self._load_stats):
+            self.tools.setdefault(tool, stats)
+
+    def export(self, span: dict[str, Any]) -> None:
+        self.spans.append(span)
+        stats = self.tools.get(span["tool"])
+        if stats is None:
+            stats = self.tools[span["tool"]] = (
+                store.take(self.snapshot_section, span["tool"], self._load_stats)
+                or self._new_stats()
+            )
+        stats["calls"] += 1
+        stats["errors"] += span["outcome"] != "ok"
+        stats["total_ms"] += span["duration_ms"]
+        stats["max_ms"] = max(stats["max_ms"], span["duration_ms"])
+
+
+class _Call:
+    """A tool call in flight, as seen by the sampler thread."""
+
+    __slots__ = (
+        "deadline",
+        "peak",
+        "samples",
+        "shared_samples",
+        "started",
+        "thread_id",
+        "tool",
+        "trace",
+    )
+
+    def __init__(self, tool: str, threshold: float) -> None:
+        self.tool = tool
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self.deadline = self.started + threshold
+        self.samples: Counter[str] | None = None
+        # Samples taken while other calls ran on the same thread
+        self.shared_samples = 0
+        self.peak: int | None = None
+        self.trace: Trace | None = None
+
+
+def _collapse(frame: Any) -> str:
+    """Render a stack as ``outer;...;inner`` frames, flamegraph style."""
+    frames: list[str] = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class SlowCallSampler:
+    """Background thread that profiles calls exceeding a duration threshold."""
+
+    def __init__(self, threshold_ms: float, interval_ms: float, max_reports: int):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.reports: deque[dict[str, Any]] = deque(maxlen=max_reports)
+        self._calls: dict[int, _Call] = {}
+        self._ids = itertools.count()
+        self._wakeup = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def begin(self, tool: str) -> int:
+        # Peaks of slow calls being traced now include this call's allocations
+        tracer.overlap()
+        call_id = next(self._ids)
+        with self._wakeup:
+            self._calls[call_id] = _Call(tool, self.threshold)
+            if len(self._calls) == 1:
+                self._wakeup.notify()
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="slow-call-sampler", daemon=True
+            )
+            self._thread.start()
+        return call_id
+
+    def end(self, call_id: int, span: dict[str, Any]) -> None:
+        with self._wakeup:
+            call = self._calls.pop(call_id)
+            if call.samples is None:
+                return
+        if call.trace is not None:
+            call.peak = tracer.stop(call.trace)
+
+        stacks = call.samples.most_common(MAX_PROFILE_STACKS)
+        self.reports.append(
+            span
+            | {
+                "samples": sum(call.samples.values()),
+                "shared_samples": call.shared_samples,
+                "sample_interval_ms": self.interval * 1000,
+                "tracemalloc_peak_bytes": call.peak,
+                "tracemalloc_peak_shared": call.trace is None or call.trace.shared,
+                "profile": [{"stack": s, "samples": n} for s, n in stacks],
+            }
+        )
+
+    def _run(self) -> None:
+        with self._wakeup:
+            while True:
+                if not self._calls:
+                    self._wakeup.wait()
+                    continue
+
+                now = time.perf_counter()
+                slow = [c for c in self._calls.values() if c.deadline <= now]
+                if not slow:
+                    next_deadline = min(c.deadline for c in self._calls.values())
+                    self._wakeup.wait(next_deadline - now)
+                    continue
+
+                frames = sys._current_frames()
+                threads = Counter(c.thread_id for c in self._calls.values())
+                for call in slow:
+                    if call.samples is None:
+                        call.samples = Counter()
+                        call.trace = tracer.start()
+                        if len(self._calls) > 1:
+                            call.trace.shared = True
+                    if threads[call.thread_id] > 1:
+                        call.shared_samples += 1
+                        continue
+                    frame = frames.get(call.thread_id)
+                    if frame is not None:
+                        call.samples[_collapse(frame)] += 1
+                del frames
+                self._wakeup.wait(self.interval)
+
+
+exporter: SpanExporter = InMemoryExporter(cfg.TRACE_BUFFER_SIZE)
+
+sampler = SlowCallSampler(
+    threshold_ms=cfg.SLOW_CALL_THRESHOLD_MS,
+    interval_ms=cfg.PROFILE_SAMPLE_INTERVAL_MS,
+    max_reports=cfg.SLOW_CALL_BUFFER_SIZE,
+)
+
+
+def set_exporter(new_exporter: SpanExporter) -> None:
+    """Replace the exporter that receives tool call spans."""
+    global exporter
+    exporter = new_exporter
+
+
+def traced(
+    name: str,
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Wrap a tool so every call is recorded as a span."""
+
+    def decorator(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            call_id = sampler.begin(name)
+            started = time.perf_counter()
+            outcome = "exception"
+            try:
+                result = await fn(*args, **kwargs)
+                failed = isinstance(result, dict) and result.get("success") is False
+                outcome = "error" if failed else "ok"
+                return result
+            finally:
+                span = {
+                    "tool": name,
+                    "timestamp": time.time(),
+                    "duration_ms": (time.perf_counter() - started) * 1000,
+                    "argument_sizes": {k: _size(v) for k, v in kwargs.items()},
+                    "outcome": outcome,
+                }
+                sampler.end(call_id, span)
+                try:
+                    exporter.export(span)
+                except Exception:
+                    logger.exception(f"Span export for {name} failed")
+
+        return wrapper
+
+    return decorator
+
+
+def profiles_resource() -> dict[str, Any]:
+    """Tool timing and slow-call profile resource."""
+    result: dict[str, Any] = {
+        "success": True,
+        "slow_call_threshold_ms": sampler.threshold * 1000,
+        "slow_calls": list(sampler.reports),
+    }
+    if isinstance(exporter, InMemoryExporter):
+        exporter.restore()
+        result["tools"] = exporter.tools
+        result["recent_spans"] = list(exporter.spans)[-50:]
+    return result
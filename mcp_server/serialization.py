@@ -0,0 +1,41 @@
+"""Serialization of tool results.
+
+Tool results are JSON encoded with ``pydantic_core``, as FastMCP's default
+serializer does. In compact mode (``COMPACT_RESPONSES``, or a tool's
+``compact`` argument for a single call) results are written without
+indentation, which makes responses smaller rather than faster to encode.
+"""
+
+import functools
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any
+
+import pydantic_core
+
+from mcp_server.settings import Config as cfg
+
+# The current tool call's compact argument, read when its result is serialized
+_compact: ContextVar[bool | None] = ContextVar("compact", default=None)
+
+
+def compactable(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Wrap a tool so its ``compact`` argument also applies to serialization."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        _compact.set(kwargs.get("compact"))
+        return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+def serialize_result(data: Any) -> str:
+    """Serialize a tool result to the text sent back to the client."""
+    if isinstance(data, str):
+        return data
+    compact = _compact.get()
+    if compact is None:
+        compact = cfg.COMPACT_RESPONSES
+    indent = None if compact else 2
+    return pydantic_core.to_json(data, fallback=str, indent=indent).decode()
@@ -0,0 +1,393 @@
+"""Session tracking, limits and idle eviction for the HTTP transports.
+
+``SessionMiddleware`` sits in front of the MCP endpoints and records every
+session created over SSE or stateful streamable HTTP in a bounded
+``SessionTable``. Sessions that have had no request in flight for
+``SESSION_IDLE_TIMEOUT`` seconds are evicted by a background sweep. Event
+streams held open for server messages (the SSE stream, and the standalone
+``GET`` stream of streamable HTTP) do not count as requests in flight:
+
+- SSE sessions are ended by reporting a client disconnect to the event
+  stream, which closes the session's streams.
+- Streamable HTTP sessions are terminated with a ``DELETE`` request, exactly
+  as a client ending its session would, and their ``GET`` stream is ended
+  the same way as an SSE stream.
+
+New sessions beyond ``MAX_SESSIONS`` are refused with ``503`` once idle
+sessions have been evicted. Request and response bytes are accounted per
+session as a cheap proxy for the memory each session pins.
+
+In stateless streamable HTTP mode (``STATELESS_HTTP``) no session state is
+kept, so any worker can serve any request and the middleware is not used.
+"""
+
+import asyncio
+import time
+from typing import Any
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mcp_server.settings import Config as cfg
+from mcp_server.settings.logging import get_app_logger
+
+logger = get_app_logger("mcp_server.sessions")
+
+MCP_SESSION_ID_HEADER = b"mcp-session-id"
+
+_FORWARDED_HEADERS = {b"authorization", b"host"}
+
+
+class Session:
+    """Bookkeeping for a single client session."""
+
+    __slots__ = (
+        "active",
+        "bytes_in",
+        "bytes_out",
+        "created",
+        "evicted",
+        "last_seen",
+        "scope",
+        "session_id",
+        "transport",
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        transport: str,
+        scope: Scope,
+        evicted: asyncio.Event | None = None,
+    ) -> None:
+        self.session_id = session_id
+        self.transport = transport
+        # Copy of the creating request's scope, used to replay auth on eviction
+        self.scope = scope
+        self.created = self.last_seen = time.monotonic()
+        self.active = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.evicted = evicted or asyncio.Event()
+
+    def idle_for(self, now: float) -> float:
+        return 0.0 if self.active else now - self.last_seen
+
+
+class SessionTable:
+    """Bounded table of live sessions with idle eviction."""
+
+    def __init__(
+        self, max_sessions: int, idle_timeout: float, sweep_interval: float
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self._sessions: dict[str, Session] = {}
+        self._app: ASGIApp | None = None
+        self._sweeper: asyncio.Task | None = None
+        self.created = 0
+        self.evicted = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Session | None:
+        return self._sessions.get(session_id)
+
+    def add(self, session: Session) -> None:
+        self._sessions[session.session_id] = session
+        self.created += 1
+
+    def discard(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def is_full(self) -> bool:
+        return bool(self.max_sessions) and len(self._sessions) >= self.max_sessions
+
+    def start(self, app: ASGIApp) -> None:
+        """Start the background sweep, once, in the running event loop."""
+        if self._sweeper is None or self._sweeper.done():
+            self._app = app
+            if self.idle_timeout:
+                self._sweeper = asyncio.get_running_loop().create_task(self._sweep())
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.evict_idle()
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    async def evict_idle(self) -> int:
+        """Evict every session idle for longer than the idle timeout."""
+        if not self.idle_timeout:
+            return 0
+        now = time.monotonic()
+        idle = [
+            session
+            for session in self._sessions.values()
+            if session.idle_for(now) > self.idle_timeout
+        ]
+        for session in idle:
+            await self.evict(session)
+        return len(idle)
+
+    async def evict(self, session: Session) -> None:
+        """End a session the same way a client disconnecting would."""
+        self.discard(session.session_id)
+        self.evicted += 1
+        session.evicted.set()
+        if session.transport == "streamable-http" and self._app is not None:
+            await self._terminate(session)
+        logger.info(f"Evicted idle {session.transport} session {session.session_id}")
+
+    async def _terminate(self, session: Session) -> None:
+        """Send a DELETE for the session through the wrapped application."""
+        assert self._app is not None
+        headers = [
+            (name, value)
+            for name, value in session.scope["headers"]
+            if name in _FORWARDED_HEADERS
+        ]
+        headers.append((MCP_SESSION_ID_HEADER, session.session_id.encode()))
+        scope = dict(session.scope, method="DELETE", headers=headers, query_string=b"")
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: Message) -> None:
+            pass
+
+        await self._app(scope, receive, send)
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        sessions = self._sessions.values()
+        return {
+            "active_sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "idle_timeout": self.idle_timeout,
+            "created": self.created,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+            "bytes_in": sum(s.bytes_in for s in sessions),
+            "bytes_out": sum(s.bytes_out for s in sessions),
+            "largest_sessions": [
+                {
+                    "session_id": s.session_id,
+                    "transport": s.transport,
+                    "bytes_in": s.bytes_in,
+                    "bytes_out": s.bytes_out,
+                    "idle_seconds": round(s.idle_for(now), 3),
+                }
+                for s in sorted(
+                    sessions, key=lambda s: s.bytes_in + s.bytes_out, reverse=True
+                )[:10]
+            ],
+        }
+
+
+sessions = SessionTable(
+    max_sessions=cfg.MAX_SESSIONS,
+    idle_timeout=cfg.SESSION_IDLE_TIMEOUT,
+    sweep_interval=cfg.SESSION_SWEEP_INTERVAL,
+)
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _evictable(receive: Receive, evicted: asyncio.Event) -> Receive:
+    """Wrap ``receive`` to report a client disconnect once ``evicted`` is set."""
+
+    async def evictable_receive() -> Message:
+        receiving = asyncio.ensure_future(receive())
+        eviction = asyncio.ensure_future(evicted.wait())
+        done, _ = await asyncio.wait(
+            {receiving, eviction}, return_when=asyncio.FIRST_COMPLETED
+        )
+        if receiving in done:
+            eviction.cancel()
+            return receiving.result()
+        receiving.cancel()
+        return {"type": "http.disconnect"}
+
+    return evictable_receive
+
+
+class SessionMiddleware:
+    """ASGI middleware tracking sessions of one HTTP transport."""
+
+    def __init__(
+        self, app: ASGIApp, transport: str, path: str, table: SessionTable = sessions
+    ) -> None:
+        self.app = app
+        self.transport = transport
+        self.path = path.rstrip("/")
+        self.table = table
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.table.start(self.app)
+        opens_session = scope["path"].rstrip("/") == self.path
+
+        if self.transport == "sse":
+            session_id = parse_qs(scope["query_string"].decode()).get(
+                "session_id", [None]
+            )[0]
+            if opens_session and scope["method"] == "GET":
+                await self._open_sse(scope, receive, send)
+                return
+        else:
+            session_id = _header(scope, MCP_SESSION_ID_HEADER)
+            if opens_session and scope["method"] == "POST" and session_id is None:
+                await self._open_streamable(scope, receive, send)
+                return
+
+        session = self.table.get(session_id) if session_id else None
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        if opens_session and scope["method"] == "GET":
+            await self._listen(session, scope, receive, send)
+            return
+
+        await self._track(session, scope, receive, send)
+        if scope["method"] == "DELETE":
+            self.table.discard(session.session_id)
+
+    async def _reject_if_full(self, scope: Scope, receive: Receive, send: Send) -> bool:
+        if self.table.is_full():
+            await self.table.evict_idle()
+        if not self.table.is_full():
+            return False
+
+        self.table.rejected += 1
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"text/plain"),
+                    (b"retry-after", b"5"),
+                ],
+            }
+        )
+        await send(
+            {"type": "http.response.body", "body": b"Too many sessions, retry later"}
+        )
+        return True
+
+    async def _track(
+        self, session: Session, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Forward a request for a known session, accounting its traffic."""
+
+        async def counting_receive() -> Message:
+            message = await receive()
+            session.bytes_in += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            session.bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        session.active += 1
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            session.active -= 1
+            session.last_seen = time.monotonic()
+
+    async def _listen(
+        self, session: Session, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Serve a streamable HTTP session's standalone event stream.
+
+        The stream stays open while the client is connected, so it is not
+        counted as activity; it is ended when the session is evicted.
+        """
+
+        async def counting_send(message: Message) -> None:
+            session.bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, _evictable(receive, session.evicted), counting_send)
+
+    async def _open_streamable(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Forward a session-creating request and record the issued session id."""
+        if await self._reject_if_full(scope, receive, send):
+            return
+
+        session: Session | None = None
+        # Copied before routing, which updates the scope in place
+        original_scope = dict(scope)
+
+        async def recording_send(message: Message) -> None:
+            nonlocal session
+            if message["type"] == "http.response.start":
+                for name, value in message.get("headers", []):
+                    if name.lower() == MCP_SESSION_ID_HEADER:
+                        session = Session(
+                            value.decode(), self.transport, original_scope
+                        )
+                        session.active = 1
+                        self.table.add(session)
+            elif session is not None:
+                session.bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            if session is not None:
+                session.active -= 1
+                session.last_seen = time.monotonic()
+
+    async def _open_sse(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve an SSE stream, recording its session until it disconnects."""
+        if await self._reject_if_full(scope, receive, send):
+            return
+
+        session: Session | None = None
+        original_scope = dict(scope)
+        evicted = asyncio.Event()
+
+        async def recording_send(message: Message) -> None:
+            nonlocal session
+            body = message.get("body", b"")
+            if session is None and b"session_id=" in body:
+                session_id = body.split(b"session_id=", 1)[1].split()[0].decode()
+                session = Session(session_id, self.transport, original_scope, evicted)
+                self.table.add(session)
+            elif session is not None:
+                session.bytes_out += len(body)
+            await send(message)
+
+        try:
+            await self.app(scope, _evictable(receive, evicted), recording_send)
+        finally:
+            if session is not None:
+                self.table.discard(session.session_id)
+
+
+def sessions_resource():
+    """Session table statistics resource."""
+    return {
+        "success": True,
+        "stateless": cfg.STATELESS_HTTP,
+        "sessions": sessions.stats(),
+    }
@@ -15,6 +15,14 @@ class Config:
     # Transport: stdio for MCP, sse for HTTP deployment
     TRANSPORT: str = os.getenv("TRANSPORT", "sse")
 
+    # Stateless streamable HTTP keeps no per-session state between requests
+    STATELESS_HTTP: bool = os.getenv("STATELESS_HTTP", "false").lower() == "true"
+
+    # HTTP session limits (0 disables a limit)
+    MAX_SESSIONS: int = int(os.getenv("MAX_SESSIONS", "10000"))
+    SESSION_IDLE_TIMEOUT: float = float(os.getenv("SESSION_IDLE_TIMEOUT", "900"))
+    SESSION_SWEEP_INTERVAL: float = float(os.getenv("SESSION_SWEEP_INTERVAL", "30"))
+
     # Logging configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
 
@@ -29,6 +37,69 @@ class Config:
         else []
     )
 
+    # Admission control (0 disables a limit)
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "40"))
+    MAX_IN_FLIGHT_PER_SUBJECT: int = int(os.getenv("MAX_IN_FLIGHT_PER_SUBJECT", "8"))
+    MAX_CONCURRENT_CALLS: int = int(os.getenv("MAX_CONCURRENT_CALLS", "64"))
+    MAX_QUEUED_CALLS: int = int(os.getenv("MAX_QUEUED_CALLS", "256"))
+
+    # Request size limit and memory budget (0 disables)
+    MAX_REQUEST_BODY_BYTES: int = int(os.getenv("MAX_REQUEST_BODY_BYTES", "10485760"))
+    MEMORY_BUDGET_BYTES: int = int(os.getenv("MEMORY_BUDGET_BYTES", "0"))
+    MEMORY_HEAVY_CALL_BYTES: int = int(os.getenv("MEMORY_HEAVY_CALL_BYTES", "1048576"))
+    MEMORY_DEFER_TIMEOUT: float = float(os.getenv("MEMORY_DEFER_TIMEOUT", "5"))
+    MEMORY_SAMPLE_EVERY: int = int(os.getenv("MEMORY_SAMPLE_EVERY", "100"))
+
+    # Tool call tracing and slow-call profiling
+    TRACE_BUFFER_SIZE: int = int(os.getenv("TRACE_BUFFER_SIZE", "1000"))
+    SLOW_CALL_THRESHOLD_MS: float = float(os.getenv("SLOW_CALL_THRESHOLD_MS", "1000"))
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(
+        os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")
+    )
+    SLOW_CALL_BUFFER_SIZE: int = int(os.getenv("SLOW_CALL_BUFFER_SIZE", "50"))
+
+    # Modules run in dedicated worker processes instead of the server process
+    WORKER_MODULES: tuple[str, ...] = tuple(
+        module.strip()
+        for module in os.getenv("WORKER_MODULES", "").split(",")
+        if module.strip()
+    )
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+    WORKER_CALL_TIMEOUT: float = float(os.getenv("WORKER_CALL_TIMEOUT", "60"))
+
+    # Warm-start snapshot of documents, indexes and tool statistics
+    SNAPSHOT_PATH: str = os.getenv("SNAPSHOT_PATH", "")
+    SNAPSHOT_INTERVAL: float = float(os.getenv("SNAPSHOT_INTERVAL", "300"))
+
+    # Compact tool responses omit echoed input and options and skip indentation
+    COMPACT_RESPONSES: bool = os.getenv("COMPACT_RESPONSES", "false").lower() == "true"
+
+    # Text module settings
+    TEXT_MAX_DOCUMENTS: int = int(os.getenv("TEXT_MAX_DOCUMENTS", "1000"))
+    TEXT_MAX_SEARCH_COLLECTIONS: int = int(
+        os.getenv("TEXT_MAX_SEARCH_COLLECTIONS", "100")
+    )
+    TEXT_MAX_SEARCH_CHARACTERS: int = int(
+        os.getenv("TEXT_MAX_SEARCH_CHARACTERS", "50000000")
+    )
+    TEXT_FREQUENCY_MAX_VOCABULARY: int = int(
+        os.getenv("TEXT_FREQUENCY_MAX_VOCABULARY", "100000")
+    )
+    TEXT_DIFF_TIMEOUT: float = float(os.getenv("TEXT_DIFF_TIMEOUT", "5"))
+    TEXT_MAX_DEDUP_COLLECTIONS: int = int(
+        os.getenv("TEXT_MAX_DEDUP_COLLECTIONS", "100")
+    )
+    TEXT_DEDUP_MAX_SIGNATURES: int = int(
+        os.getenv("TEXT_DEDUP_MAX_SIGNATURES", "20000")
+    )
+    TEXT_PATTERN_CACHE_SIZE: int = int(os.getenv("TEXT_PATTERN_CACHE_SIZE", "256"))
+    TEXT_MAX_CUSTOM_PATTERNS: int = int(os.getenv("TEXT_MAX_CUSTOM_PATTERNS", "20"))
+    TEXT_MAX_PATTERN_LENGTH: int = int(os.getenv("TEXT_MAX_PATTERN_LENGTH", "500"))
+    TEXT_PATTERN_TIMEOUT: float = float(os.getenv("TEXT_PATTERN_TIMEOUT", "5"))
+    TEXT_PATTERN_PROCESSES: int = int(os.getenv("TEXT_PATTERN_PROCESSES", "1"))
+    TEXT_MAX_PAGE_SIZE: int = int(os.getenv("TEXT_MAX_PAGE_SIZE", "1000"))
+
     @classmethod
     def is_production(cls) -> bool:
         """Helper method to check if running in production mode"""
@@ -0,0 +1,326 @@
+"""Warm-start snapshot of in-memory state.
+
+When ``SNAPSHOT_PATH`` is set, state registered by modules (named documents,
+search collections, dedup indexes and per-tool statistics) is written to a
+single binary file every ``SNAPSHOT_INTERVAL`` seconds and again when the
+process exits, so a restarted server starts warm.
+
+The file starts with a fixed header and a compatibility tag (snapshot format,
+server version and Python bytecode tag, since entries are encoded with
+``marshal``), followed by the encoded entries and an index mapping each
+section to its schema version and each key to the entry's offset and length:
+
+    header | tag | entry | entry | ... | index
+
+On startup the file is memory-mapped and only the header and index are read.
+An entry is decoded when its module first asks for it, so restoring a large
+snapshot costs nothing until the state is used. Snapshots whose tag differs
+from the running server are ignored, as are sections whose schema version
+differs from the one their module registers, and entries the module fails to
+restore. Entries that have not been asked for are copied into the next
+snapshot as they are.
+
+Only state held by the server process is captured; modules running in worker
+processes start cold.
+"""
+
+import asyncio
+import atexit
+import marshal
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from collections.abc import Callable, Iterable
+from typing import Any, TypeVar
+
+from mcp_server.settings import Config as cfg
+from mcp_server.settings.logging import get_app_logger
+
+logger = get_app_logger("mcp_server.snapshot")
+
+T = TypeVar("T")
+
+MAGIC = b"MCPSNAP\0"
+FORMAT_VERSION = 2
+
+# magic, format version, index offset, index length, index CRC, tag length
+_HEADER = struct.Struct("<8sIQQIH")
+
+
+def compatibility_tag() -> bytes:
+    """Tag a snapshot must carry to be loaded by this server."""
+    return (
+        f"{FORMAT_VERSION}/{cfg.MCP_SERVER_VERSION}/"
+        f"{sys.implementation.cache_tag}/marshal{marshal.version}"
+    ).encode()
+
+
+class SnapshotError(Exception):
+    """A snapshot file is missing, corrupt or from an incompatible server."""
+
+
+class SnapshotReader:
+    """Memory-mapped snapshot file; entries are decoded on demand."""
+
+    def __init__(self, path: str) -> None:
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map {path}: {e}") from None
+
+        if len(self._map) < _HEADER.size:
+            raise SnapshotError("File is too short")
+        magic, version, offset, length, checksum, tag_length = _HEADER.unpack_from(
+            self._map
+        )
+        if magic != MAGIC:
+            raise SnapshotError("Not a snapshot file")
+        tag = self._map[_HEADER.size : _HEADER.size + tag_length]
+        if version != FORMAT_VERSION or tag != compatibility_tag():
+            raise SnapshotError(f"Stale snapshot ({tag.decode(errors='replace')})")
+
+        raw = self._map[offset : offset + length]
+        if len(raw) != length or zlib.crc32(raw) != checksum:
+            raise SnapshotError("Index is corrupt")
+        # Schema version and remaining entries per section:
+        # key -> (offset, length)
+        sections: dict[str, tuple[int, dict[str, tuple[int, int]]]] = marshal.loads(raw)
+        self.schemas = {section: schema for section, (schema, _) in sections.items()}
+        self.index = {section: entries for section, (_, entries) in sections.items()}
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self._map[offset : offset + length]
+
+
+class SnapshotStore:
+    """Registry of snapshot sections and the periodic snapshot writer."""
+
+    def __init__(self, path: str, interval: float) -> None:
+        self.path = path
+        self.interval = interval
+        self._sections: dict[str, tuple[Callable[[], Iterable], int, int]] = {}
+        self._reader: SnapshotReader | None = None
+        self._opened = False
+        self._writer: asyncio.Task | None = None
+        self._started = False
+        self.restored = 0
+        self.writes = 0
+        self.last_write: dict[str, Any] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def disable(self) -> None:
+        """Stop reading and writing snapshots in this process."""
+        self.path = ""
+        self._reader = None
+
+    def register(
+        self,
+        section: str,
+        dump: Callable[[], Iterable],
+        limit: int = 0,
+        schema: int = 1,
+    ) -> None:
+        """Include a section in snapshots.
+
+        ``dump`` returns the section's live ``(key, value)`` pairs, least
+        recently used first; values must be encodable by ``marshal``. With a
+        ``limit``, only the most recent entries are written. ``schema`` is
+        the version of the values' layout: bump it whenever that changes, so
+        entries written in the old layout are dropped instead of restored.
+        """
+        self._sections[section] = (dump, limit, schema)
+
+    def _entries(self, section: str) -> dict[str, tuple[int, int]]:
+        if not self._opened:
+            self._opened = True
+            if self.enabled and os.path.exists(self.path):
+                try:
+                    self._reader = SnapshotReader(self.path)
+                    logger.info(f"Mapped snapshot {self.path}")
+                except SnapshotError as e:
+                    logger.warning(f"Ignoring snapshot {self.path}: {e}")
+        if self._reader is None:
+            return {}
+        entries = self._reader.index.get(section, {})
+        registered = self._sections.get(section)
+        schema = self._reader.schemas.get(section)
+        if entries and registered is not None and schema != registered[2]:
+            logger.warning(
+                f"Dropping snapshot section {section} with schema {schema}, "
+                f"expected {registered[2]}"
+            )
+            entries.clear()
+        return entries
+
+    def take(
+        self, section: str, key: str, load: Callable[[Any], T] | None = None
+    ) -> T | None:
+        """Decode and remove an entry, returning None when there is none.
+
+        ``load`` rebuilds the caller's state from the decoded value; entries
+        it fails on are dropped like corrupt ones. The caller becomes the
+        owner of the state: a taken entry is only written to later snapshots
+        through the section's ``dump``.
+        """
+        location = self._entries(section).pop(key, None)
+        if location is None:
+            return None
+        assert self._reader is not None
+        try:
+            value = marshal.loads(self._reader.read(*location))
+        except (EOFError, ValueError, TypeError) as e:
+            logger.warning(f"Dropping corrupt snapshot entry {section}/{key}: {e}")
+            return None
+        if load is not None:
+            try:
+                value = load(value)
+            except Exception:
+                logger.warning(
+                    f"Dropping unreadable snapshot entry {section}/{key}",
+                    exc_info=True,
+                )
+                return None
+        self.restored += 1
+        return value
+
+    def take_all(
+        self, section: str, load: Callable[[Any], T] | None = None
+    ) -> list[tuple[str, T]]:
+        """Take every remaining entry of a section."""
+        taken = []
+        for key in list(self._entries(section)):
+            value = self.take(section, key, load)
+            if value is not None:
+                taken.append((key, value))
+        return taken
+
+    def discard(self, section: str, key: str) -> bool:
+        """Drop an entry without decoding it, returning whether it existed."""
+        return self._entries(section).pop(key, None) is not None
+
+    def collect(self) -> dict[str, list[tuple[str, bytes]]]:
+        """Encode every section: untaken entries first, then live state."""
+        sections = {}
+        for section, (dump, limit, _) in self._sections.items():
+            pending = self._entries(section)
+            reader = self._reader
+            encoded = (
+                {key: reader.read(*location) for key, location in pending.items()}
+                if reader is not None
+                else {}
+            )
+            for key, value in dump():
+                encoded.pop(key, None)
+                encoded[key] = marshal.dumps(value)
+            entries = list(encoded.items())
+            sections[section] = entries[-limit:] if limit else entries
+        return sections
+
+    def write_file(self, sections: dict[str, list[tuple[str, bytes]]]) -> int:
+        """Atomically replace the snapshot file, returning its size."""
+        tag = compatibility_tag()
+        index: dict[str, tuple[int, dict[str, tuple[int, int]]]] = {}
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(bytes(_HEADER.size))
+            f.write(tag)
+            offset = _HEADER.size + len(tag)
+            for section, entries in sections.items():
+                locations: dict[str, tuple[int, int]] = {}
+                index[section] = (self._sections[section][2], locations)
+                for key, data in entries:
+                    f.write(data)
+                    locations[key] = (offset, len(data))
+                    offset += len(data)
+            raw = marshal.dumps(index)
+            f.write(raw)
+            f.seek(0)
+            f.write(
+                _HEADER.pack(
+                    MAGIC, FORMAT_VERSION, offset, len(raw), zlib.crc32(raw), len(tag)
+                )
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        # Entries not yet taken stay readable through the old mapping
+        os.replace(temporary, self.path)
+        return offset + len(raw)
+
+    def write(self) -> None:
+        """Write a snapshot now."""
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        sections = self.collect()
+        size = self.write_file(sections)
+        self._record(sections, size, started)
+
+    def _record(self, sections: dict, size: int, started: float) -> None:
+        self.writes += 1
+        self.last_write = {
+            "timestamp": time.time(),
+            "bytes": size,
+            "entries": {section: len(entries) for section, entries in sections.items()},
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def start(self) -> None:
+        """Start periodic snapshots, once, in the running event loop."""
+        if not self.enabled:
+            return
+        if not self._started:
+            self._started = True
+            atexit.register(self._write_on_exit)
+        if self.interval and (self._writer is None or self._writer.done()):
+            self._writer = asyncio.get_running_loop().create_task(self._periodic())
+
+    async def _periodic(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                started = time.perf_counter()
+                # Encode on the event loop, where the state is mutated
+                sections = self.collect()
+                size = await asyncio.to_thread(self.write_file, sections)
+                self._record(sections, size, started)
+            except Exception:
+                logger.exception("Snapshot write failed")
+
+    def _write_on_exit(self) -> None:
+        try:
+            self.write()
+            logger.info(f"Wrote snapshot {self.path}")
+        except Exception:
+            logger.exception("Snapshot write failed")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "interval": self.interval,
+            "loaded": self._reader is not None,
+            "restored": self.restored,
+            "pending": {
+                section: len(entries)
+                for section, entries in (
+                    self._reader.index.items() if self._reader else ()
+                )
+            },
+            "writes": self.writes,
+            "last_write": self.last_write,
+        }
+
+
+store = SnapshotStore(cfg.SNAPSHOT_PATH, cfg.SNAPSHOT_INTERVAL)
+
+
+def snapshot_resource() -> dict[str, Any]:
+    """Warm-start snapshot status resource."""
+    return {"success": True, **store.stats()}
@@ -0,0 +1,278 @@
+"""Process-isolated module workers.
+
+Modules listed in ``WORKER_MODULES`` run in a pool of ``WORKER_PROCESSES``
+dedicated worker processes instead of the server process. The loader still
+registers their tools, resources and prompts with the server, but each
+registered function is replaced by a proxy that sends the call over a pipe
+to a worker and returns its result, so CPU-heavy modules run in parallel
+across cores without holding the server's GIL.
+
+Workers handle one call at a time. Calls naming a document or collection are
+always routed to the same worker, so per-document state lives in exactly one
+process; other calls go to the least busy worker. A worker that crashes or
+exceeds ``WORKER_CALL_TIMEOUT`` is killed and restarted on its next call and
+the call fails with a retryable error, leaving the server itself running.
+State held by a restarted worker is lost.
+"""
+
+import asyncio
+import contextlib
+import functools
+import importlib
+import inspect
+import multiprocessing
+import signal
+import zlib
+from collections.abc import Callable, Iterator
+from multiprocessing.connection import Connection
+from typing import Any
+
+from mcp_server import snapshot
+from mcp_server.settings import Config as cfg
+from mcp_server.settings.logging import get_app_logger
+
+logger = get_app_logger("mcp_server.workers")
+
+# Arguments whose value pins a call to one worker
+ROUTING_ARGUMENTS = ("document_id", "collection")
+
+# Workers are started with spawn: forking a process running an event loop
+# and background threads is unsafe
+_context = multiprocessing.get_context("spawn")
+
+# Set by ``_serve`` in worker processes
+_in_worker = False
+
+
+class WorkerError(Exception):
+    """A call raised an exception inside a worker process."""
+
+
+class WorkerUnavailable(WorkerError):
+    """A worker crashed or timed out before completing a call."""
+
+
+def _serve(conn: Connection) -> None:
+    """Worker process main loop: run calls received over ``conn``."""
+    global _in_worker
+    _in_worker = True
+    # Snapshots hold the server process's state; workers start cold
+    snapshot.store.disable()
+    loop = asyncio.new_event_loop()
+    while True:
+        try:
+            module, name, args, kwargs = conn.recv()
+        except EOFError:
+            return
+        try:
+            result = getattr(importlib.import_module(module), name)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = loop.run_until_complete(result)
+            conn.send((True, result))
+        except Exception as e:
+            # Only the message crosses the pipe, so keep the traceback here
+            logger.exception(f"Call to {module}.{name} failed")
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+def _exchange(conn: Connection, call: tuple) -> Any:
+    """Send a call to a worker and wait for its reply."""
+    conn.send(call)
+    return conn.recv()
+
+
+class Worker:
+    """A single worker process and the pipe used to reach it."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: Any = None
+        self._conn: Connection | None = None
+        self._lock = asyncio.Lock()
+        self.pending = 0
+        self.calls = 0
+        self.failures = 0
+        self.restarts = 0
+
+    def _start(self) -> Connection:
+        if self.process is not None:
+            self.restarts += 1
+        parent, child = _context.Pipe()
+        self.process = _context.Process(
+            target=_serve,
+            args=(child,),
+            name=f"mcp-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self._conn = parent
+        return parent
+
+    def _stop(self) -> None:
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def call(
+        self,
+        module: str,
+        name: str,
+        args: tuple,
+        kwargs: dict,
+        timeout: float | None = None,
+    ) -> Any:
+        if timeout is None:
+            timeout = cfg.WORKER_CALL_TIMEOUT
+        self.pending += 1
+        try:
+            async with self._lock:
+                conn = self._conn
+                if conn is None or not self.process.is_alive():
+                    self._stop()
+                    conn = self._start()
+
+                self.calls += 1
+                loop = asyncio.get_running_loop()
+                try:
+                    # Pickling and writing large arguments must not block the loop
+                    ok, result = await asyncio.wait_for(
+                        loop.run_in_executor(
+                            None, _exchange, conn, (module, name, args, kwargs)
+                        ),
+                        timeout or None,
+                    )
+                except TimeoutError:
+                    self.failures += 1
+                    self._stop()
+                    raise WorkerUnavailable(
+                        f"Worker {self.index} timed out after {timeout}s"
+                    ) from None
+                except (EOFError, OSError) as e:
+                    self.failures += 1
+                    self._stop()
+                    raise WorkerUnavailable(
+                        f"Worker {self.index} crashed: {e!r}"
+                    ) from None
+
+                if not ok:
+                    raise WorkerError(result)
+                return result
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict[str, Any]:
+        alive = self.process is not None and self.process.is_alive()
+        return {
+            "index": self.index,
+            "pid": self.process.pid if alive else None,
+            "alive": alive,
+            "pending": self.pending,
+            "calls": self.calls,
+            "failures": self.failures,
+            "restarts": self.restarts,
+        }
+
+
+class WorkerPool:
+    """Fixed pool of worker processes, started lazily on first use."""
+
+    def __init__(self, size: int) -> None:
+        self.workers = [Worker(i) for i in range(max(size, 1))]
+
+    def route(self, kwargs: dict[str, Any]) -> Worker:
+        for argument in ROUTING_ARGUMENTS:
+            key = kwargs.get(argument)
+            if key is not None:
+                index = zlib.crc32(str(key).encode()) % len(self.workers)
+                return self.workers[index]
+        return min(self.workers, key=lambda worker: worker.pending)
+
+    async def call(
+        self,
+        fn: Callable,
+        args: tuple,
+        kwargs: dict,
+        timeout: float | None = None,
+    ) -> Any:
+        worker = self.route(kwargs)
+        return await worker.call(fn.__module__, fn.__name__, args, kwargs, timeout)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [worker.stats() for worker in self.workers]
+
+
+pool = WorkerPool(cfg.WORKER_PROCESSES)
+
+
+def in_worker() -> bool:
+    """Whether this is a worker process, which cannot start workers itself."""
+    return _in_worker
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Raise ``TimeoutError`` in the block once it runs for ``seconds``.
+
+    Relies on SIGALRM, so it only works on a process's main thread, which is
+    where workers run their calls. Regular expression matching checks for
+    signals, so this also interrupts a long match.
+    """
+
+    def expire(signum: int, frame: Any) -> None:
+        raise TimeoutError(f"Exceeded deadline of {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def is_isolated(fn: Callable) -> bool:
+    """Whether ``fn`` belongs to a module configured to run in workers."""
+    return any(
+        fn.__module__.startswith(f"mcp_server.modules.{module}.")
+        for module in cfg.WORKER_MODULES
+    )
+
+
+def isolated(fn: Callable, tool: bool = False) -> Callable:
+    """Return a proxy running ``fn`` in a worker process when configured.
+
+    Tool proxies report worker failures as error results, retryable when the
+    worker crashed or timed out; resource and prompt proxies raise them.
+    """
+    if not is_isolated(fn):
+        return fn
+
+    @functools.wraps(fn)
+    async def proxy(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return await pool.call(fn, args, kwargs)
+        except WorkerError as e:
+            logger.error(f"Worker call to {fn.__name__} failed: {e}")
+            if not tool:
+                raise
+            result: dict[str, Any] = {
+                "success": False,
+                "error": f"Worker call failed: {e}",
+            }
+            if isinstance(e, WorkerUnavailable):
+                result |= {"retryable": True, "retry_after": 1.0}
+            return result
+
+    return proxy
+
+
+def workers_resource() -> dict[str, Any]:
+    """Worker process statistics resource."""
+    return {
+        "success": True,
+        "modules": cfg.WORKER_MODULES,
+        "workers": pool.stats() if cfg.WORKER_MODULES else [],
+    }
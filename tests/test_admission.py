@@ -0,0 +1,100 @@
+"""Tests for per-subject and global admission control."""
+
+import asyncio
+
+import pytest
+
+from mcp_server.admission import AdmissionController, AdmissionError
+
+
+async def _hold(controller, subject, release):
+    async with controller.admit(subject):
+        await release.wait()
+
+
+async def _attempt(controller, subject):
+    """Start a call for ``subject``; return its task, or the rejection."""
+    task = asyncio.create_task(_hold(controller, subject, asyncio.Event()))
+    await asyncio.sleep(0)
+    if task.done() and isinstance(task.exception(), AdmissionError):
+        return task.exception()
+    return task
+
+
+def test_queued_calls_count_towards_the_subject_cap():
+    async def scenario():
+        controller = AdmissionController(
+            rate=0,
+            burst=1,
+            max_in_flight_per_subject=2,
+            max_concurrent=1,
+            max_queued=100,
+        )
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, "other", release))
+        await asyncio.sleep(0)
+
+        attempts = [await _attempt(controller, "noisy") for _ in range(20)]
+        rejected = [a for a in attempts if isinstance(a, AdmissionError)]
+        assert len(rejected) == 18
+        assert controller.queued == 2
+
+        for attempt in attempts:
+            if isinstance(attempt, asyncio.Task):
+                attempt.cancel()
+        await asyncio.gather(
+            *(a for a in attempts if isinstance(a, asyncio.Task)),
+            return_exceptions=True,
+        )
+        # Cancelled waiters give their per-subject slots back
+        assert controller.queued == 0
+        assert "noisy" not in controller._in_flight
+
+        release.set()
+        await holder
+        assert controller.running == 0
+        assert not controller._in_flight
+
+    asyncio.run(scenario())
+
+
+def test_queue_overflow_releases_the_subject_slot():
+    async def scenario():
+        controller = AdmissionController(
+            rate=0,
+            burst=1,
+            max_in_flight_per_subject=5,
+            max_concurrent=1,
+            max_queued=0,
+        )
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, "a", release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionError, match="overloaded"):
+            async with controller.admit("b"):
+                pass
+        assert "b" not in controller._in_flight
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+
+
+def test_unauthenticated_calls_skip_per_subject_limits():
+    async def scenario():
+        controller = AdmissionController(
+            rate=1,
+            burst=1,
+            max_in_flight_per_subject=1,
+            max_concurrent=0,
+            max_queued=0,
+        )
+        for _ in range(10):
+            async with controller.admit(None):
+                pass
+        with pytest.raises(AdmissionError, match="Rate limit"):
+            for _ in range(2):
+                async with controller.admit("subject"):
+                    pass
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+"""Tests for per-call compact responses."""
+
+import asyncio
+import json
+
+import pytest
+from fastmcp import Client
+
+from mcp_server.app import mcp
+from mcp_server.settings import Config as cfg
+
+
+def call(tool: str, arguments: dict) -> str:
+    async def scenario():
+        async with Client(mcp) as client:
+            return (await client.call_tool(tool, arguments))[0].text
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("server_compact", [False, True])
+def test_compact_argument_overrides_the_server_setting(monkeypatch, server_compact):
+    monkeypatch.setattr(cfg, "COMPACT_RESPONSES", server_compact)
+    arguments = {"text": "Hello World", "case_type": "upper"}
+
+    compact = call("text_transform_case", arguments | {"compact": True})
+    assert "\n" not in compact
+    assert json.loads(compact) == {"success": True, "transformed": "HELLO WORLD"}
+
+    verbose = call("text_transform_case", arguments | {"compact": False})
+    assert "\n  " in verbose
+    assert json.loads(verbose)["original"] == "Hello World"
+
+    default = call("text_transform_case", arguments)
+    assert ("\n" not in default) == server_compact
+
+
+def test_later_tools_drop_their_echoes():
+    diff = json.loads(
+        call(
+            "text_diff",
+            {"original": "a\n", "modified": "b\n", "compact": True},
+        )
+    )
+    assert "granularity" not in diff and "output_format" not in diff
+    assert diff["diff"]
+
+    call(
+        "text_search_add_documents",
+        {"collection": "compact-test", "documents": {"d": "hello world"}},
+    )
+    found = json.loads(
+        call(
+            "text_search_query",
+            {"collection": "compact-test", "query": "hello", "compact": True},
+        )
+    )
+    assert "query" not in found and "collection" not in found
+    assert found["total_results"] == 1
+    call("text_search_delete_collection", {"collection": "compact-test"})
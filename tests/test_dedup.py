@@ -0,0 +1,80 @@
+"""Tests for MinHash near-duplicate detection."""
+
+import random
+
+import pytest
+
+from mcp_server.modules.text.dedup import (
+    DedupIndex,
+    find_clusters,
+    minhash,
+    shingle_hashes,
+    similarity,
+)
+
+
+def hash_sets(rng, shared, only_a, only_b):
+    distinct = set()
+    while len(distinct) < shared + only_a + only_b:
+        distinct.add(rng.getrandbits(64))
+    values = sorted(distinct)
+    rng.shuffle(values)
+    common = set(values[:shared])
+    return (
+        common | set(values[shared : shared + only_a]),
+        common | set(values[shared + only_a :]),
+    )
+
+
+# Small sets fill most buckets by densification, so their estimates are coarser
+@pytest.mark.parametrize("size, tolerance", [(20, 0.35), (200, 0.18), (2000, 0.18)])
+def test_minhash_estimates_exact_jaccard(size, tolerance):
+    rng = random.Random(size)
+    errors = []
+    for _ in range(50):
+        shared = rng.randint(0, size)
+        a, b = hash_sets(rng, shared, size - shared, rng.randint(0, size - shared))
+        exact = len(a & b) / len(a | b)
+        estimate = similarity(minhash(a), minhash(b))
+        assert abs(estimate - exact) < tolerance
+        errors.append(estimate - exact)
+    assert abs(sum(errors) / len(errors)) < 0.03
+
+
+def test_identical_and_disjoint_documents():
+    rng = random.Random(1)
+    a, b = hash_sets(rng, 0, 300, 300)
+    assert similarity(minhash(a), minhash(a)) == 1.0
+    assert similarity(minhash(a), minhash(b)) < 0.05
+
+
+def test_lsh_groups_known_near_duplicates():
+    rng = random.Random(5)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    documents = {}
+    expected = []
+    for base in range(20):
+        words = rng.choices(vocabulary, k=300)
+        group = [f"doc{base}"]
+        documents[group[0]] = " ".join(words)
+        for copy in range(base % 3):
+            edited = list(words)
+            for i in rng.sample(range(len(words)), 2):
+                edited[i] = rng.choice(vocabulary)
+            group.append(f"doc{base}-{copy}")
+            documents[group[-1]] = " ".join(edited)
+        expected.append(group)
+
+    # Every near-duplicate is well above the threshold, every other pair far below
+    for group in expected:
+        hashes = [shingle_hashes(documents[name], 5) for name in group]
+        for other in hashes[1:]:
+            assert len(hashes[0] & other) / len(hashes[0] | other) > 0.9
+
+    order = list(documents)
+    rng.shuffle(order)
+    clusters = find_clusters(
+        DedupIndex(0.8, 5), {name: documents[name] for name in order}
+    )
+    found = sorted(sorted(cluster["ids"]) for cluster in clusters)
+    assert found == sorted(sorted(group) for group in expected if len(group) > 1)
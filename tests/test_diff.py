@@ -0,0 +1,58 @@
+"""Round-trip tests for text_diff and text_apply_patch."""
+
+import asyncio
+import random
+
+import pytest
+
+from mcp_server.modules.text.diff import PatchError, apply_unified
+from mcp_server.modules.text.tools import apply_patch, text_diff
+
+
+def round_trip(original: str, modified: str, output_format: str = "unified") -> str:
+    diff = asyncio.run(text_diff(original, modified, output_format=output_format))
+    assert diff["success"] is True
+    if output_format == "unified":
+        result = asyncio.run(apply_patch(original, diff=diff["diff"]))
+    else:
+        result = asyncio.run(apply_patch(original, hunks=diff["hunks"]))
+    assert result["success"] is True, result
+    return result["patched"]
+
+
+@pytest.mark.parametrize(
+    "original, modified",
+    [
+        ("SELECT 1;\n-- old comment\nSELECT 2;\n", "SELECT 1;\nSELECT 2;\n"),
+        ("a\nb\n", "a\n++ x\nb\n"),
+        ("--- a/file\n+++ b/file\nkeep\n", "keep\n--- c/file\n+++ d/file\n"),
+        ("x\n-- y\n", "x\n-- y\n++ z"),
+        ("@@ -1 +1 @@\n", "@@ -2 +2 @@\n"),
+        ("", "-- only\n"),
+        ("-- only\n", ""),
+    ],
+)
+def test_unified_round_trip_with_header_like_lines(original, modified):
+    assert round_trip(original, modified) == modified
+
+
+def test_round_trip_fuzz():
+    rng = random.Random(7)
+    vocabulary = ["a\n", "b\n", "-- c\n", "++ d\n", "--- e\n", "+++ f\n", "\n", " g\n"]
+    for _ in range(300):
+        original = "".join(rng.choices(vocabulary, k=rng.randint(0, 12)))
+        modified = "".join(rng.choices(vocabulary, k=rng.randint(0, 12)))
+        if rng.random() < 0.3:
+            modified = modified.rstrip("\n")
+        assert round_trip(original, modified) == modified
+        assert round_trip(original, modified, "structured") == modified
+
+
+def test_file_headers_between_hunks_are_skipped():
+    patch = "--- a/notes\n+++ b/notes\n@@ -1,2 +1,2 @@\n--- old\n+++ new\n keep\n"
+    assert apply_unified("-- old\nkeep\n", patch) == "++ new\nkeep\n"
+
+
+def test_hunk_longer_than_its_header_is_rejected():
+    with pytest.raises(PatchError, match="longer than its header"):
+        apply_unified("a\n", "@@ -1 +1 @@\n-a\n-b\n+c\n")
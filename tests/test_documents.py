@@ -0,0 +1,65 @@
+"""Tests for incrementally maintained document indexes."""
+
+import asyncio
+import random
+import re
+
+import pytest
+
+from mcp_server.modules.text import documents
+from mcp_server.modules.text.documents import DocumentIndex
+from mcp_server.modules.text.tools import analyze_text
+
+
+def check(document: DocumentIndex, text: str) -> None:
+    assert document.text == text
+    assert len(document) == len(text)
+
+    expected = asyncio.run(analyze_text(text))["analysis"]
+    analysis = document.analysis()
+    assert analysis.pop("line_count") == (text.count("\n") + 1 if text else 0)
+    assert analysis == expected
+
+    lines = text.split("\n") if text else []
+    assert [document.line(i) for i in range(document.line_count)] == lines
+    sentences = [s.strip() for s in re.split(r"[.!?]+", text) if s.strip()]
+    assert [document.sentence(i) for i in range(document.sentence_count)] == sentences
+
+
+@pytest.mark.parametrize("chunk_size", [4, 16, 16384])
+def test_random_patches_match_a_full_rescan(monkeypatch, chunk_size):
+    monkeypatch.setattr(documents, "CHUNK_SIZE", chunk_size)
+    rng = random.Random(chunk_size)
+    pieces = ["a", "bc", " ", "  ", "\n", ".", "!?", "x. ", "9", "é", "\t", "end.\n"]
+    document = DocumentIndex()
+    text = ""
+    for _ in range(500):
+        insert = "".join(rng.choices(pieces, k=rng.randint(0, 6)))
+        if rng.random() < 0.3:
+            start = end = len(text)
+        else:
+            start = rng.randint(0, len(text))
+            end = rng.randint(start, min(len(text), start + rng.randint(0, 12)))
+        document.patch(start, end, insert)
+        text = text[:start] + insert + text[end:]
+        check(document, text)
+    assert document.version == 500
+
+    restored = DocumentIndex.from_state(document.state())
+    check(restored, text)
+
+
+def test_state_round_trip_keeps_boundaries(monkeypatch):
+    monkeypatch.setattr(documents, "CHUNK_SIZE", 8)
+    text = "One two. Three\nfour! Five six seven?\n\nEight nine ten. "
+    document = DocumentIndex(text)
+    restored = DocumentIndex.from_state(document.state())
+    assert restored.state() == document.state()
+    restored.append("Eleven.")
+    check(restored, text + "Eleven.")
+
+
+def test_invalid_range_is_rejected():
+    document = DocumentIndex("short")
+    with pytest.raises(ValueError, match="Invalid range 3:9"):
+        document.patch(3, 9, "x")
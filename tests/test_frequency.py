@@ -0,0 +1,85 @@
+"""Tests for streaming word and n-gram counting."""
+
+import asyncio
+import random
+from collections import Counter
+
+from mcp_server.modules.text.frequency import (
+    ENGLISH_STOPWORDS,
+    CountMinSketch,
+    count_ngrams,
+    iter_tokens,
+)
+from mcp_server.modules.text.tools import word_frequency
+
+
+def top_terms(result, n):
+    return {entry["term"]: entry["count"] for entry in result["ngrams"][str(n)]["top"]}
+
+
+def test_ngrams_keep_inner_stopwords():
+    result = asyncio.run(
+        word_frequency(
+            "The state of the art. State of the art!",
+            ngram_sizes=[1, 3],
+            stopword_list="english",
+        )
+    )
+    assert top_terms(result, 1) == {"state": 2, "art": 2}
+    assert top_terms(result, 3) == {
+        "state of the": 2,
+        "of the art": 2,
+        "the state of": 1,
+        "the art state": 1,
+        "art state of": 1,
+    }
+
+
+def test_ngrams_of_only_stopwords_are_skipped():
+    counts = count_ngrams(
+        iter_tokens("x of the y of it"), [2], 10, stopwords=ENGLISH_STOPWORDS
+    )
+    terms = {entry["term"] for entry in counts[2]["top"]}
+    assert terms == {"x of", "the y", "y of"}
+
+
+def test_stopwords_match_any_case_without_case_folding():
+    result = asyncio.run(
+        word_frequency(
+            "The Cat and THE dog",
+            case_fold=False,
+            stopword_list="english",
+            stopwords=["CAT"],
+        )
+    )
+    assert top_terms(result, 1) == {"dog": 1}
+
+
+def test_sketch_never_undercounts():
+    rng = random.Random(3)
+    sketch = CountMinSketch(width_bits=8)
+    exact: Counter[str] = Counter()
+    for _ in range(20000):
+        term = f"t{int(rng.paretovariate(1.2))}"
+        exact[term] += 1
+        sketch.add(term)
+    for term, count in exact.items():
+        estimate = sketch.add(term, 0)
+        assert count <= estimate <= count + sketch.error_bound
+
+
+def test_sketch_top_k_matches_exact_counts():
+    rng = random.Random(7)
+    # A skewed vocabulary far larger than the exact counting limit
+    tokens = [f"w{int(rng.paretovariate(1.1))}" for _ in range(50000)]
+    exact = Counter(tokens)
+    report = count_ngrams(tokens, [1], 10, max_vocabulary=100)[1]
+    assert report["exact"] is False
+    assert report["total"] == len(tokens)
+
+    top = {entry["term"]: entry["count"] for entry in report["top"]}
+    expected = [term for term, _ in exact.most_common(10)]
+    # Terms well clear of the cut-off are found, with counts within the bound
+    assert set(expected[:5]) <= set(top)
+    for term, count in top.items():
+        assert exact[term] <= count <= exact[term] + report["error_bound"]
@@ -0,0 +1,145 @@
+"""Tests for memory budget accounting around admission control."""
+
+import asyncio
+import tracemalloc
+
+import pytest
+
+from mcp_server import admission
+from mcp_server.admission import AdmissionController
+from mcp_server.memory import DEFAULT_AMPLIFICATION, MemoryBudget, tracer
+from mcp_server.settings import Config as cfg
+
+ARGUMENT = "x" * 1_000_000
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    budget = MemoryBudget(budget=0, heavy_bytes=1, defer_timeout=0.1, sample_every=1)
+    monkeypatch.setattr(admission, "budget", budget)
+    monkeypatch.setattr(admission, "current_subject", lambda: "subject")
+    return budget
+
+
+async def grow(text: str):
+    copies = [text + str(i) for i in range(4)]
+    return {"success": True, "length": sum(len(copy) for copy in copies)}
+
+
+def test_rejected_calls_do_not_skew_the_learned_ratio(budget, monkeypatch):
+    controller = AdmissionController(
+        rate=0.001, burst=1, max_in_flight_per_subject=0, max_concurrent=0, max_queued=0
+    )
+    monkeypatch.setattr(admission, "controller", controller)
+    tool = admission.limited(grow)
+
+    async def scenario():
+        assert (await tool(text=ARGUMENT))["success"] is True
+        ratio = budget.tools["grow"].ratio
+        for _ in range(5):
+            result = await tool(text=ARGUMENT)
+            assert result["retryable"] is True
+        assert budget.tools["grow"].samples == 1
+        assert budget.tools["grow"].ratio == ratio
+        assert ratio > 3
+
+    asyncio.run(scenario())
+
+
+def test_queued_calls_hold_no_reservation(budget, monkeypatch):
+    controller = AdmissionController(
+        rate=0, burst=1, max_in_flight_per_subject=0, max_concurrent=1, max_queued=10
+    )
+    monkeypatch.setattr(admission, "controller", controller)
+    release = asyncio.Event()
+
+    async def slow(text: str):
+        await release.wait()
+        return {"success": True}
+
+    tool = admission.limited(slow)
+
+    async def scenario():
+        calls = [asyncio.create_task(tool(text=ARGUMENT)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert controller.queued == 2
+        assert budget.in_flight == 1
+        release.set()
+        await asyncio.gather(*calls)
+        assert budget.in_flight == 0
+        assert budget.reserved == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_calls_are_not_sampled(budget):
+    async def broken(text: str):
+        raise RuntimeError("boom")
+
+    tool = admission.limited(broken)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await tool(text=ARGUMENT)
+        assert "broken" not in budget.tools
+        assert budget.reserved == 0
+
+    asyncio.run(scenario())
+
+
+def test_worker_tools_are_not_charged(budget, monkeypatch):
+    monkeypatch.setattr(cfg, "WORKER_MODULES", ["text"])
+    seen = []
+
+    async def remote(text: str):
+        seen.append(budget.in_flight)
+        return {"success": True}
+
+    remote.__module__ = "mcp_server.modules.text.tools"
+    tool = admission.limited(remote)
+
+    async def scenario():
+        await tool(text=ARGUMENT)
+        assert seen == [0]
+        assert "remote" not in budget.tools
+        assert budget.estimate("remote", 1000) == 1000 * DEFAULT_AMPLIFICATION
+
+    asyncio.run(scenario())
+
+
+def test_overlapping_calls_are_not_sampled(budget):
+    release = asyncio.Event()
+
+    async def held(text: str):
+        await release.wait()
+        return await grow(text)
+
+    tool = admission.limited(held)
+
+    async def scenario():
+        calls = [asyncio.create_task(tool(text=ARGUMENT)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*calls)
+        assert "held" not in budget.tools
+        assert not tracemalloc.is_tracing()
+
+        # Alone, the next call is sampled
+        await tool(text=ARGUMENT)
+        assert budget.tools["held"].samples == 1
+
+    asyncio.run(scenario())
+
+
+def test_sampling_leaves_the_profiler_tracing(budget):
+    tool = admission.limited(grow)
+
+    async def scenario():
+        profiled = tracer.start()
+        await tool(text=ARGUMENT)
+        assert tracemalloc.is_tracing()
+        assert "grow" not in budget.tools
+        assert tracer.stop(profiled) > len(ARGUMENT)
+        assert not tracemalloc.is_tracing()
+
+    asyncio.run(scenario())
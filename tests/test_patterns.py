@@ -0,0 +1,147 @@
+"""Tests for custom pattern safety checks and the pattern time box."""
+
+import asyncio
+import re
+
+import pytest
+
+from mcp_server import workers
+from mcp_server.modules.text.patterns import (
+    BUILTIN_PATTERNS,
+    UnsafePatternError,
+    check_pattern,
+)
+from mcp_server.modules.text.tools import extract_patterns
+from mcp_server.settings import Config as cfg
+
+CATASTROPHIC = [
+    # Long repeats inside bounded repeats
+    r"(.*a){12}b",
+    r"(?:x.*){10}y",
+    # Long repeats inside long repeats
+    r"(a+)+",
+    r"(\w+\s?)*",
+    r"(\s*)+$",
+    r"(a*b*)*c",
+    # Repeated ambiguous groups
+    r"(a|aa)+",
+    r"(a{1,2})*b",
+    # Bounded repeats multiplying into too many ways
+    r"(a{1,50}){1,50}b",
+    r"(?:(?:.?\w?){5}.{0,20}){2}c",
+]
+
+SAFE = [
+    r"(?:ab?)*",
+    r"(?:\d[-.]?)+",
+    r"(\d{1,3}\.){3}\d{1,3}",
+    r"(a|b)*c",
+    r"(?:a[^a]*)*",
+    r".*foo.*",
+    r"(?:\w+\s?)*+",
+    r"^\s*#.*$",
+    # Log fields: repeats competing in a sequence are left to the deadline
+    r"^\[(.*?)\] (\w+): (.*)$",
+    r"user=(\w+).*ip=(\S+).*status=(\d+)",
+    r"([^\s]+\s)*$",
+    r"(?:\w+-)*\w+!",
+    r"(?:a[^a]*)*b",
+    r"\d*\d*",
+]
+
+
+@pytest.mark.parametrize("pattern", CATASTROPHIC)
+def test_catastrophic_patterns_are_rejected(pattern):
+    with pytest.raises(UnsafePatternError):
+        check_pattern(pattern)
+
+
+@pytest.mark.parametrize("pattern", SAFE)
+def test_safe_patterns_are_accepted(pattern):
+    check_pattern(pattern)
+
+
+@pytest.mark.parametrize("name", ["email", "phone", "hashtag", "mention", "ip"])
+def test_builtin_patterns_pass_the_check(name):
+    check_pattern(BUILTIN_PATTERNS[name].pattern)
+
+
+def test_extract_patterns_rejects_unsafe_custom_pattern():
+    result = asyncio.run(extract_patterns("x" * 40, "custom", {"bad": r"(?:x.*){10}y"}))
+    assert result["success"] is False
+    assert "Invalid custom pattern bad" in result["error"]
+
+
+def test_slow_custom_pattern_is_stopped_at_its_deadline(monkeypatch):
+    monkeypatch.setattr(cfg, "TEXT_PATTERN_TIMEOUT", 1.0)
+    # Accepted by the checker, but cubic in the length of the text
+    result = asyncio.run(extract_patterns("a" * 5000, "custom", {"slow": r".*a.*b"}))
+    assert result == {
+        "success": False,
+        "error": "Custom patterns did not finish within 1.0s",
+    }
+
+    result = asyncio.run(extract_patterns("a1 b2", "custom", {"pair": r"[a-z]\d"}))
+    assert result["success"] is True
+    assert result["results"] == {"pair": ["a1", "b2"]}
+
+
+def test_slow_custom_pattern_is_interrupted_inside_a_worker(monkeypatch):
+    monkeypatch.setattr(cfg, "TEXT_PATTERN_TIMEOUT", 0.5)
+    monkeypatch.setattr(workers, "_in_worker", True)
+    result = asyncio.run(extract_patterns("a" * 5000, "custom", {"slow": r".*a.*b"}))
+    assert result == {
+        "success": False,
+        "error": "Custom patterns did not finish within 0.5s",
+    }
+
+
+PAGED = {
+    # Empty matches, alone and next to non-empty ones
+    "word_or_gap": r"\w*",
+    "boundary": r"\b",
+    "dashes": r"-*|x",
+    # Lookbehinds and anchors must see text before the page boundary
+    "after_a": r"(?<=a)\w",
+    "line_start": r"^\w",
+    "line_end": r"$",
+    "word_start": r"\b\w",
+}
+
+
+def paged(text, page_size):
+    records = []
+    cursor = None
+    # A cursor that fails to advance would otherwise page forever
+    for _ in range(200):
+        result = asyncio.run(
+            extract_patterns(text, "custom", PAGED, ["multiline"], page_size, cursor)
+        )
+        assert result["success"] is True
+        assert len(result["matches"]) <= page_size
+        records += result["matches"]
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return records
+    pytest.fail("Paging did not finish")
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 7, 50])
+def test_pages_match_a_single_pass(monkeypatch, page_size):
+    monkeypatch.setattr(cfg, "TEXT_PATTERN_TIMEOUT", 0)
+    text = "ab--a\n\nxaa-b ab\nba x-"
+    expected = [
+        {"type": name, "match": m.group(), "start": m.start(), "end": m.end()}
+        for name, source in PAGED.items()
+        for m in re.finditer(source, text, re.MULTILINE)
+    ]
+    assert paged(text, page_size) == expected
+
+
+def test_first_n_is_capped_at_the_page_size(monkeypatch):
+    monkeypatch.setattr(cfg, "TEXT_MAX_PAGE_SIZE", 10)
+    result = asyncio.run(extract_patterns("a@b.co", counts_only=True, first_n=11))
+    assert result == {"success": False, "error": "first_n must be between 0 and 10"}
+
+    result = asyncio.run(extract_patterns("a@b.co", counts_only=True, first_n=10))
+    assert result["success"] is True
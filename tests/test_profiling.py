@@ -0,0 +1,83 @@
+"""Tests for tool call tracing."""
+
+import asyncio
+
+import pytest
+
+from mcp_server import profiling
+from mcp_server.profiling import SlowCallSampler, SpanExporter, traced
+
+
+class FailingExporter(SpanExporter):
+    def export(self, span):
+        raise RuntimeError("collector unavailable")
+
+
+class ListExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+async def echo(text: str):
+    return {"success": True, "text": text}
+
+
+def test_exporter_must_implement_export():
+    class Incomplete(SpanExporter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_exporter_errors_do_not_replace_the_result(monkeypatch):
+    monkeypatch.setattr(profiling, "exporter", FailingExporter())
+    result = asyncio.run(traced("echo")(echo)(text="hi"))
+    assert result == {"success": True, "text": "hi"}
+
+
+def test_spans_are_exported(monkeypatch):
+    exporter = ListExporter()
+    monkeypatch.setattr(profiling, "exporter", exporter)
+    asyncio.run(traced("echo")(echo)(text="hello"))
+    [span] = exporter.spans
+    assert span["tool"] == "echo"
+    assert span["outcome"] == "ok"
+    assert span["argument_sizes"] == {"text": 5}
+
+
+async def slow(text: str):
+    await asyncio.sleep(0.1)
+    return {"success": True}
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    sampler = SlowCallSampler(threshold_ms=10, interval_ms=2, max_reports=10)
+    monkeypatch.setattr(profiling, "sampler", sampler)
+    monkeypatch.setattr(profiling, "exporter", ListExporter())
+    return sampler
+
+
+def test_slow_call_alone_is_attributed(sampler):
+    asyncio.run(traced("slow")(slow)(text="x"))
+    [report] = sampler.reports
+    assert report["samples"] > 0
+    assert report["shared_samples"] == 0
+    assert report["tracemalloc_peak_shared"] is False
+
+
+def test_concurrent_calls_on_the_loop_are_not_attributed(sampler):
+    async def scenario():
+        tool = traced("slow")(slow)
+        await asyncio.gather(tool(text="a"), tool(text="b"))
+
+    asyncio.run(scenario())
+    assert len(sampler.reports) == 2
+    for report in sampler.reports:
+        assert report["samples"] == 0
+        assert report["shared_samples"] > 0
+        assert report["tracemalloc_peak_shared"] is True
@@ -0,0 +1,119 @@
+"""Tests for the in-process full-text search index."""
+
+import asyncio
+import math
+import random
+
+import pytest
+
+from mcp_server.modules.text import search
+from mcp_server.modules.text.search import (
+    BM25_B,
+    BM25_K1,
+    SearchCollection,
+    parse_query,
+)
+from mcp_server.modules.text.tools import search_add_documents
+from mcp_server.settings import Config as cfg
+
+WORDS = ["red", "green", "blue", "cat", "dog", "the", "a", "runs"]
+
+
+def occurrences(tokens, terms):
+    n = len(terms)
+    return sum(tokens[i : i + n] == terms for i in range(len(tokens) - n + 1))
+
+
+def reference_scores(documents, query, require_all=False):
+    """BM25 scores computed directly from the live documents' text."""
+    tokens = {
+        name: [token for token, _, _ in search.tokenize(text)]
+        for name, text in documents.items()
+    }
+    average_length = sum(map(len, tokens.values())) / len(tokens) or 1
+    clauses = parse_query(query)
+    scores = {}
+    hits = dict.fromkeys(tokens, 0)
+    for terms in clauses:
+        tfs = {name: occurrences(words, terms) for name, words in tokens.items()}
+        df = sum(1 for tf in tfs.values() if tf)
+        idf = math.log(1 + (len(tokens) - df + 0.5) / (df + 0.5))
+        for name, tf in tfs.items():
+            if not tf:
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens[name]) / average_length)
+            scores[name] = scores.get(name, 0.0) + idf * tf * (BM25_K1 + 1) / (
+                tf + norm
+            )
+            hits[name] += 1
+    if require_all:
+        scores = {name: s for name, s in scores.items() if hits[name] == len(clauses)}
+    return scores
+
+
+def check(index, documents, query, require_all=False):
+    expected = reference_scores(documents, query, require_all)
+    results = index.search(query, limit=len(documents) + 1, require_all=require_all)
+    found = {result["document_id"]: result["score"] for result in results}
+    assert found == pytest.approx(expected, abs=1e-5)
+    ranked = [result["score"] for result in results]
+    assert ranked == sorted(ranked, reverse=True)
+
+
+def random_text(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+
+
+def test_ranking_matches_brute_force_through_removals_and_compaction():
+    rng = random.Random(11)
+    index = SearchCollection()
+    documents = {}
+    queries = ["cat", "red dog", '"the cat"', '"red cat runs" dog', '"a a"', "fish"]
+    compactions = 0
+    for step in range(400):
+        name = f"d{rng.randrange(30)}"
+        if documents and rng.random() < 0.4:
+            removed = rng.choice(sorted(documents))
+            del documents[removed]
+            slots = len(index._names)
+            assert index.remove(removed)
+            compactions += len(index._names) < slots
+        else:
+            documents[name] = random_text(rng)
+            index.add(name, documents[name])
+
+        assert len(index) == len(documents)
+        assert index.characters == sum(map(len, documents.values()))
+        if documents and step % 5 == 0:
+            for query in queries:
+                check(index, documents, query)
+                check(index, documents, query, require_all=True)
+
+    assert compactions > 0
+
+
+def test_phrase_matches_only_adjacent_terms():
+    index = SearchCollection()
+    index.add("near", "the red cat sat")
+    index.add("apart", "the red big cat")
+    index.add("reversed", "cat red")
+    [result] = index.search('"red cat"')
+    assert result["document_id"] == "near"
+
+
+def test_adding_beyond_the_character_limit_is_refused(monkeypatch):
+    monkeypatch.setattr(cfg, "TEXT_MAX_SEARCH_CHARACTERS", 10)
+    monkeypatch.setattr(search, "_collections", search.OrderedDict())
+
+    result = asyncio.run(search_add_documents("c", {"a": "12345", "b": "12345"}))
+    assert result["success"] is True
+
+    result = asyncio.run(search_add_documents("c", {"c": "1"}))
+    assert result == {
+        "success": False,
+        "error": "Collection c would exceed 10 characters of text",
+    }
+
+    # Replacing a document only counts the difference in length
+    result = asyncio.run(search_add_documents("c", {"a": "1234", "c": "1"}))
+    assert result["success"] is True
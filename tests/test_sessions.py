@@ -0,0 +1,161 @@
+"""Tests for session tracking, limits and idle eviction."""
+
+import asyncio
+import itertools
+
+from mcp_server.sessions import SessionMiddleware, SessionTable
+
+
+class StubApp:
+    """ASGI app issuing session ids the way the MCP transports do."""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.deleted = []
+
+    async def __call__(self, scope, receive, send):
+        if scope["method"] == "DELETE":
+            self.deleted.append(scope)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+        elif scope["path"] == "/sse":
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            body = f"event: endpoint\ndata: /messages/?session_id={next(self.ids)}\n\n"
+            await send({"type": "http.response.body", "body": body.encode()})
+            while (await receive())["type"] != "http.disconnect":
+                pass
+        else:
+            headers = [(b"mcp-session-id", str(next(self.ids)).encode())]
+            await send(
+                {"type": "http.response.start", "status": 200, "headers": headers}
+            )
+            await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def request(app, method, path, headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"host", b"server"), *headers],
+    }
+    await app(scope, receive, send)
+    return messages
+
+
+def streamable(table):
+    stub = StubApp()
+    return stub, SessionMiddleware(stub, "streamable-http", "/mcp", table)
+
+
+def test_idle_session_is_terminated_with_the_client_credentials():
+    async def scenario():
+        table = SessionTable(max_sessions=10, idle_timeout=0.05, sweep_interval=60)
+        stub, app = streamable(table)
+        headers = [(b"authorization", b"Bearer token"), (b"x-trace", b"1")]
+        await request(app, "POST", "/mcp", headers)
+        assert len(table) == 1
+
+        assert await table.evict_idle() == 0
+        await asyncio.sleep(0.1)
+        assert await table.evict_idle() == 1
+        return table, stub
+
+    table, stub = asyncio.run(scenario())
+    assert len(table) == 0
+    assert table.evicted == 1
+    [delete] = stub.deleted
+    assert sorted(delete["headers"]) == [
+        (b"authorization", b"Bearer token"),
+        (b"host", b"server"),
+        (b"mcp-session-id", b"1"),
+    ]
+
+
+def test_sessions_with_requests_in_flight_are_not_evicted():
+    async def scenario():
+        table = SessionTable(max_sessions=10, idle_timeout=0.01, sweep_interval=60)
+        _, app = streamable(table)
+        await request(app, "POST", "/mcp")
+        table.get("1").active += 1
+        await asyncio.sleep(0.05)
+        return await table.evict_idle()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_new_sessions_beyond_the_limit_are_refused():
+    async def scenario():
+        table = SessionTable(max_sessions=1, idle_timeout=0.05, sweep_interval=60)
+        stub, app = streamable(table)
+        await request(app, "POST", "/mcp")
+        refused = await request(app, "POST", "/mcp")
+
+        # Once the first session has gone idle it makes room for a new one
+        await asyncio.sleep(0.1)
+        admitted = await request(app, "POST", "/mcp")
+        return table, stub, refused, admitted
+
+    table, stub, refused, admitted = asyncio.run(scenario())
+    assert refused[0]["status"] == 503
+    assert (b"retry-after", b"5") in refused[0]["headers"]
+    assert table.rejected == 1
+    assert admitted[0]["status"] == 200
+    assert table.get("2") is not None
+    assert [scope["headers"][-1] for scope in stub.deleted] == [
+        (b"mcp-session-id", b"1")
+    ]
+
+
+def test_full_table_without_idle_timeout_keeps_its_sessions():
+    async def scenario():
+        table = SessionTable(max_sessions=1, idle_timeout=0, sweep_interval=60)
+        _, app = streamable(table)
+        await request(app, "POST", "/mcp")
+        refused = await request(app, "POST", "/mcp")
+        return table, refused
+
+    table, refused = asyncio.run(scenario())
+    assert refused[0]["status"] == 503
+    assert table.get("1") is not None
+
+
+def test_idle_sse_stream_is_disconnected():
+    async def scenario():
+        table = SessionTable(max_sessions=10, idle_timeout=0.05, sweep_interval=60)
+        stub = StubApp()
+        app = SessionMiddleware(stub, "sse", "/sse", table)
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        async def send(message):
+            pass
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/sse",
+            "query_string": b"",
+            "headers": [],
+        }
+        stream = asyncio.ensure_future(app(scope, receive, send))
+        await asyncio.sleep(0.1)
+        assert len(table) == 1
+        await table.evict_idle()
+        await asyncio.wait_for(stream, 1)
+        return table, stub
+
+    table, stub = asyncio.run(scenario())
+    assert len(table) == 0
+    assert table.evicted == 1
+    assert stub.deleted == []
@@ -0,0 +1,58 @@
+"""Tests for warm-start snapshot files."""
+
+from mcp_server.modules.text.documents import DocumentIndex
+from mcp_server.snapshot import SnapshotStore
+
+
+def written(path, entries, schema=1):
+    store = SnapshotStore(str(path), 0)
+    store.register("section", lambda: entries, schema=schema)
+    store.write()
+    return store
+
+
+def restarted(path, schema=1):
+    store = SnapshotStore(str(path), 0)
+    store.register("section", lambda: [], schema=schema)
+    return store
+
+
+def test_round_trip_through_the_mapped_file(tmp_path):
+    path = tmp_path / "warm.snap"
+    document = DocumentIndex("One two. Three\nfour!")
+    written(path, [("doc", document.state()), ("other", (1, b"x"))])
+
+    store = restarted(path)
+    restored = store.take("section", "doc", DocumentIndex.from_state)
+    assert restored is not None
+    assert restored.state() == document.state()
+    assert store.take("section", "doc") is None
+    assert store.stats()["pending"] == {"section": 1}
+
+    # Entries not taken are carried into the next snapshot
+    store.write()
+    assert restarted(path).take_all("section") == [("other", (1, b"x"))]
+
+
+def test_section_with_another_schema_is_dropped(tmp_path):
+    path = tmp_path / "warm.snap"
+    written(path, [("doc", ("old", "layout"))], schema=1)
+
+    store = restarted(path, schema=2)
+    assert store.take("section", "doc") is None
+    assert store.restored == 0
+
+    store.write()
+    assert restarted(path, schema=1).take("section", "doc") is None
+
+
+def test_entry_that_fails_to_load_is_dropped(tmp_path):
+    path = tmp_path / "warm.snap"
+    written(path, [("doc", ("too", "short")), ("ok", DocumentIndex("a").state())])
+
+    store = restarted(path)
+    assert store.take("section", "doc", DocumentIndex.from_state) is None
+    assert [key for key, _ in store.take_all("section", DocumentIndex.from_state)] == [
+        "ok"
+    ]
+    assert store.restored == 1
@@ -0,0 +1,113 @@
+"""Tests for process-isolated module workers."""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from mcp_server import workers
+from mcp_server.workers import WorkerError, WorkerPool, WorkerUnavailable
+
+
+def pid(document_id=None, collection=None):
+    return os.getpid()
+
+
+def crash(document_id):
+    os._exit(1)
+
+
+def hang(document_id):
+    time.sleep(60)
+
+
+def fail(document_id):
+    raise ValueError("bad input")
+
+
+def length(text, document_id):
+    return len(text)
+
+
+def inside(document_id=None):
+    return workers.in_worker()
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(3)
+    yield pool
+    for worker in pool.workers:
+        worker._stop()
+
+
+def test_calls_naming_a_document_or_collection_stay_on_one_worker(pool):
+    async def scenario():
+        for key in ("a", "b", "c", "d"):
+            pids = {await pool.call(pid, (), {"document_id": key}) for _ in range(3)}
+            assert len(pids) == 1
+            worker = pool.route({"document_id": key})
+            assert pids == {worker.process.pid}
+            assert pool.route({"collection": key}) is worker
+
+    asyncio.run(scenario())
+
+
+def test_crashed_worker_is_restarted_on_next_call(pool):
+    async def scenario():
+        first = await pool.call(pid, (), {"document_id": "a"})
+        with pytest.raises(WorkerUnavailable, match="crashed"):
+            await pool.call(crash, (), {"document_id": "a"})
+        second = await pool.call(pid, (), {"document_id": "a"})
+        assert second != first
+        stats = pool.route({"document_id": "a"}).stats()
+        assert stats["failures"] == 1
+        assert stats["restarts"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_worker_is_killed_and_restarted(pool):
+    async def scenario():
+        worker = pool.route({"document_id": "a"})
+        with pytest.raises(WorkerUnavailable, match="timed out"):
+            await pool.call(hang, (), {"document_id": "a"}, timeout=0.5)
+        assert worker.process is not None
+        worker.process.join(5)
+        assert not worker.process.is_alive()
+        assert await pool.call(pid, (), {"document_id": "a"}) == worker.process.pid
+
+    asyncio.run(scenario())
+
+
+def test_exceptions_are_reported_without_restarting(pool):
+    async def scenario():
+        first = await pool.call(pid, (), {"document_id": "a"})
+        with pytest.raises(WorkerError, match="ValueError: bad input") as raised:
+            await pool.call(fail, (), {"document_id": "a"})
+        assert not isinstance(raised.value, WorkerUnavailable)
+        assert await pool.call(pid, (), {"document_id": "a"}) == first
+
+    asyncio.run(scenario())
+
+
+def test_calls_are_sent_and_received_off_the_event_loop(pool, monkeypatch):
+    threads = []
+    exchange = workers._exchange
+
+    def recording(conn, call):
+        threads.append(threading.current_thread())
+        return exchange(conn, call)
+
+    monkeypatch.setattr(workers, "_exchange", recording)
+    text = "x" * 10_000_000
+    result = asyncio.run(pool.call(length, (text,), {"document_id": "a"}))
+    assert result == len(text)
+    assert threads and threading.main_thread() not in threads
+
+
+def test_only_worker_processes_report_being_in_a_worker(pool):
+    assert workers.in_worker() is False
+    assert asyncio.run(pool.call(inside, (), {})) is True